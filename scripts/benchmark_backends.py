@@ -0,0 +1,115 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+INFERENCE_DIR = ROOT / "src" / "inference"
+
+
+def read_rss_kb() -> int:
+    with open("/proc/self/status", encoding="utf-8") as handle:
+        for line in handle:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def worker(model_dir: str, engine: str, label_col: str, repeats: int, batch_rows: int, results) -> None:
+    # Each backend runs in a fresh process so import, load and memory are its own
+    os.environ["AZUREML_MODEL_DIR"] = model_dir
+    os.environ["SCORING_ENGINE"] = engine
+    os.environ["SCORING_TABLE"] = "off"
+    sys.path.insert(0, str(INFERENCE_DIR))
+
+    start = time.perf_counter()
+    import score
+
+    imported = time.perf_counter()
+    score.init()
+    loaded = time.perf_counter()
+
+    import pandas as pd
+
+    X = pd.read_parquet(Path(model_dir) / "test.parquet").drop(columns=[label_col], errors="ignore")
+    X = X[score.FEATURE_COLUMNS].to_numpy(dtype=np.float32)
+    latencies = []
+    for index in range(repeats):
+        row = X[index % len(X)][None, :]
+        begin = time.perf_counter()
+        score.score_batch(row)
+        latencies.append(time.perf_counter() - begin)
+    batch = X[np.arange(batch_rows) % len(X)]
+    begin = time.perf_counter()
+    score.score_batch(batch)
+    batch_seconds = time.perf_counter() - begin
+
+    results.put(
+        {
+            "engine": engine,
+            "model": type(score.MODEL).__name__,
+            "import_ms": (imported - start) * 1000.0,
+            "init_ms": (loaded - imported) * 1000.0,
+            "row_p50_ms": float(np.percentile(latencies, 50)) * 1000.0,
+            "row_p99_ms": float(np.percentile(latencies, 99)) * 1000.0,
+            "batch_rows_per_sec": batch_rows / batch_seconds,
+            "rss_kb": read_rss_kb(),
+            "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "probabilities": score.score_batch(X)[1].tolist(),
+        }
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare cold start, per-row latency, memory and parity across scoring backends.")
+    parser.add_argument("--model_dir", required=True, help="Directory produced by src/training/train.py")
+    parser.add_argument("--label_col", default="label", help="Label column name")
+    parser.add_argument("--engines", default="sklearn,compiled,onnx", help="Comma-separated backends")
+    parser.add_argument("--repeats", type=int, default=500, help="Single-row requests timed per backend")
+    parser.add_argument("--batch_rows", type=int, default=10000, help="Rows in the throughput batch")
+    parser.add_argument("--atol", type=float, default=1e-5, help="Largest probability deviation from sklearn allowed")
+    parser.add_argument("--output", default=None, help="Optional path to write results as JSON")
+    args = parser.parse_args()
+
+    model_dir = Path(args.model_dir)
+    context = multiprocessing.get_context("spawn")
+    rows = []
+    for engine in args.engines.split(","):
+        if engine == "onnx" and not (model_dir / "model.onnx").exists():
+            print("engine=onnx skipped: model.onnx not found (retrain with --export_onnx)")
+            continue
+        results = context.Queue()
+        process = context.Process(
+            target=worker, args=(str(model_dir), engine, args.label_col, args.repeats, args.batch_rows, results)
+        )
+        process.start()
+        rows.append(results.get())
+        process.join()
+
+    reference = next((row["probabilities"] for row in rows if row["engine"] == "sklearn"), None)
+    for row in rows:
+        probabilities = np.asarray(row.pop("probabilities"))
+        row["max_deviation"] = float(np.abs(probabilities - reference).max()) if reference is not None else None
+        deviation = "n/a" if row["max_deviation"] is None else f"{row['max_deviation']:.2e}"
+        print(
+            f"engine={row['engine']:<8} import={row['import_ms']:>7.1f}ms init={row['init_ms']:>8.1f}ms "
+            f"row_p50={row['row_p50_ms']:>7.3f}ms row_p99={row['row_p99_ms']:>7.3f}ms "
+            f"batch={row['batch_rows_per_sec']:>11,.0f} rows/s rss={row['rss_kb']:>8,}kB "
+            f"peak={row['peak_rss_kb']:>8,}kB max_dev={deviation}"
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(rows, indent=2) + "\n", encoding="utf-8")
+    drifted = [row["engine"] for row in rows if row["max_deviation"] is not None and row["max_deviation"] > args.atol]
+    if drifted:
+        raise SystemExit(f"Backends deviating from sklearn by more than {args.atol:g}: {', '.join(drifted)}")
+
+
+if __name__ == "__main__":
+    main()
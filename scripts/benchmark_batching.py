@@ -0,0 +1,89 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src" / "inference"))
+
+import score  # noqa: E402
+from batching import MicroBatcher  # noqa: E402
+
+
+def drive(payloads: list, threads: int, requests_per_thread: int) -> tuple:
+    latencies = [[] for _ in range(threads)]
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(index: int) -> None:
+        barrier.wait()
+        for request_index in range(requests_per_thread):
+            payload = payloads[(index * requests_per_thread + request_index) % len(payloads)]
+            start = time.perf_counter()
+            score.run(payload)
+            latencies[index].append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return np.concatenate(latencies) * 1000.0, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure the latency/throughput tradeoff of request micro-batching.")
+    parser.add_argument("--model_dir", required=True, help="Directory containing model.joblib and test.parquet")
+    parser.add_argument("--label_col", default="label", help="Label column name")
+    parser.add_argument("--windows_ms", default="0,0.5,1,2,5", help="Comma-separated batch windows (0 disables)")
+    parser.add_argument("--max_batch_rows", type=int, default=256, help="Maximum rows per coalesced batch")
+    parser.add_argument("--threads", type=int, default=16, help="Concurrent client threads")
+    parser.add_argument("--requests_per_thread", type=int, default=200, help="Single-row requests per thread")
+    parser.add_argument("--output", default=None, help="Optional path to write results as JSON")
+    args = parser.parse_args()
+
+    model_dir = Path(args.model_dir)
+    os.environ["AZUREML_MODEL_DIR"] = str(model_dir)
+    score.init()
+
+    sample = pd.read_parquet(model_dir / "test.parquet").drop(columns=[args.label_col], errors="ignore")
+    payloads = [{"data": [record]} for record in sample.to_dict(orient="records")]
+
+    results = []
+    for window in [float(value) for value in args.windows_ms.split(",")]:
+        score.BATCHER = MicroBatcher(score.score_batch, window, args.max_batch_rows) if window > 0 else None
+        drive(payloads, args.threads, 5)
+        if score.BATCHER is not None:
+            score.BATCHER.reset_stats()
+        latencies, elapsed = drive(payloads, args.threads, args.requests_per_thread)
+        stats = score.batch_stats() or {}
+        row = {
+            "window_ms": window,
+            "threads": args.threads,
+            "requests": len(latencies),
+            "requests_per_sec": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 4),
+            "p99_ms": round(float(np.percentile(latencies, 99)), 4),
+            "mean_requests_per_batch": round(stats.get("mean_requests_per_batch", 1.0), 2),
+            "requests_per_batch": stats.get("requests_per_batch", {}),
+        }
+        results.append(row)
+        print(
+            f"window={window:>4}ms throughput={row['requests_per_sec']:>9,.0f} req/s "
+            f"p50={row['p50_ms']:.3f}ms p99={row['p99_ms']:.3f}ms "
+            f"batch={row['mean_requests_per_batch']:.2f} req"
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
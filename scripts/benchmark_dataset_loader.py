@@ -0,0 +1,144 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+TRAINING_DIR = ROOT / "src" / "training"
+INFERENCE_DIR = ROOT / "src" / "inference"
+sys.path.insert(0, str(INFERENCE_DIR))
+
+from lookup import GOLD_DOMAIN  # noqa: E402
+
+MODES = ("legacy", "frame", "arrays")
+
+
+def read_rss_kb() -> int:
+    with open("/proc/self/status", encoding="utf-8") as handle:
+        for line in handle:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def make_gold(directory: Path, partitions: int, rows: int, extra_columns: int, label_col: str, csv: bool) -> list:
+    # Gold-domain features plus unused audit columns, split into many small files
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    rng = np.random.default_rng(0)
+    features = []
+    columns = {}
+    for names, values in GOLD_DOMAIN:
+        if values == "one_hot":
+            position = rng.integers(len(names) + 1, size=partitions * rows)
+            for index, name in enumerate(names):
+                columns[name] = (position == index).astype(np.int64)
+        else:
+            columns[names[0]] = rng.choice(np.asarray(values, dtype=np.float64), size=partitions * rows)
+        features += names
+    columns[label_col] = rng.integers(2, size=partitions * rows)
+    for index in range(extra_columns):
+        columns[f"audit_{index}"] = rng.random(partitions * rows)
+    table = pa.table(columns)
+    for part in range(partitions):
+        pq.write_table(table.slice(part * rows, rows), directory / f"part-{part:05d}.parquet")
+    if csv:
+        (directory / "csv").mkdir()
+        table.to_pandas().to_csv(directory / "csv" / "gold.csv", index=False)
+    return features
+
+
+def digest(X: np.ndarray, y: np.ndarray) -> str:
+    return hashlib.sha1(np.ascontiguousarray(X, dtype=np.float64).tobytes() + np.asarray(y, dtype=np.int64).tobytes()).hexdigest()
+
+
+def worker(mode: str, data_path: str, features: list, label_col: str, results) -> None:
+    sys.path.insert(0, str(TRAINING_DIR))
+    import pyarrow  # noqa: F401
+
+    from dataset import load_arrays, load_dataset
+
+    data_path = Path(data_path)
+    baseline_kb = read_rss_kb()
+    start = time.perf_counter()
+    if mode == "arrays":
+        X, y, _ = load_arrays(data_path, label_col, features)
+    else:
+        if mode == "legacy":
+            # The loader train.py and evaluate.py each carried before
+            if data_path.is_dir():
+                df = pd.concat([pd.read_parquet(file) for file in sorted(data_path.glob("*.parquet"))], ignore_index=True)
+            else:
+                df = pd.read_csv(data_path)
+        else:
+            df = load_dataset(data_path, features + [label_col])
+        df = df.dropna(subset=[label_col])
+        y = df[label_col].astype(int).to_numpy()
+        X = df[features].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    seconds = time.perf_counter() - start
+    results.put(
+        {
+            "mode": mode,
+            "seconds": seconds,
+            "rows": int(len(X)),
+            "peak_delta_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_kb,
+            "digest": digest(X, y),
+        }
+    )
+
+
+def run_mode(context, mode: str, data_path: Path, features: list, label_col: str) -> dict:
+    results = context.Queue()
+    process = context.Process(target=worker, args=(mode, str(data_path), features, label_col, results))
+    process.start()
+    row = results.get()
+    process.join()
+    return row
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load time and peak memory of the shared gold loader vs serial read + concat.")
+    parser.add_argument("--partitions", type=int, default=2000, help="Parquet files in the synthetic gold folder")
+    parser.add_argument("--rows_per_partition", type=int, default=500, help="Rows per file")
+    parser.add_argument("--extra_columns", type=int, default=10, help="Unused columns the loader should skip")
+    parser.add_argument("--label_col", default="label", help="Label column name")
+    parser.add_argument("--csv", action="store_true", help="Also time a single CSV of the same rows")
+    parser.add_argument("--output", default=None, help="Optional path to write results as JSON")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        started = time.perf_counter()
+        features = make_gold(directory, args.partitions, args.rows_per_partition, args.extra_columns, args.label_col, args.csv)
+        print(f"wrote {args.partitions} partitions x {args.rows_per_partition} rows in {time.perf_counter() - started:.1f}s")
+        sources = [("parquet", directory)] + ([("csv", directory / "csv" / "gold.csv")] if args.csv else [])
+        for source, data_path in sources:
+            for mode in MODES:
+                row = dict(run_mode(context, mode, data_path, features, args.label_col), source=source)
+                rows.append(row)
+                print(
+                    f"source={source:<7} mode={mode:<6} rows={row['rows']:>9,} time={row['seconds']:>7.3f}s "
+                    f"peak_delta={row['peak_delta_kb'] / 1024:>8.1f}MiB"
+                )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(rows, indent=2) + "\n", encoding="utf-8")
+    for source in {row["source"] for row in rows}:
+        digests = {row["digest"] for row in rows if row["source"] == source}
+        if len(digests) != 1:
+            raise SystemExit(f"Loaders disagree on the {source} data")
+
+
+if __name__ == "__main__":
+    main()
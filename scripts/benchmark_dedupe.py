@@ -0,0 +1,105 @@
+import argparse
+import json
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from sklearn.pipeline import Pipeline
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src" / "training"))
+
+from dataset import deduplicate, load_training_frame  # noqa: E402
+from search import CV_FOLDS, CountBootstrapForest, WarmStartGridSearch, fold_counts  # noqa: E402
+
+
+def splitter(seed: int) -> StratifiedKFold:
+    return StratifiedKFold(n_splits=CV_FOLDS, shuffle=True, random_state=seed)
+
+
+def search_once(X, y, trees: int, seed: int, **fit_params) -> tuple:
+    base_model = Pipeline(
+        steps=[
+            ("imputer", SimpleImputer(strategy="median")),
+            # As train.py --dedupe: bootstrap as many count-weighted draws as original rows
+            ("model", CountBootstrapForest(random_state=seed) if fit_params else RandomForestClassifier(random_state=seed)),
+        ]
+    )
+    search = WarmStartGridSearch(base_model, {"model__n_estimators": [trees]}, cv=splitter(seed), n_jobs=-1)
+    start = time.perf_counter()
+    search.fit(X, y, **fit_params)
+    return search, time.perf_counter() - start
+
+
+def main() -> None:
+    # The exact checks (rows, imputer medians, per-fold ROC-AUC) are in tests/test_dedupe.py
+    parser = argparse.ArgumentParser(description="Seed-to-seed ROC-AUC and fit time of training on deduplicated, count-weighted rows.")
+    parser.add_argument("--data_path", required=True, help="Gold dataset (file or folder)")
+    parser.add_argument("--label_col", default="label", help="Label column name")
+    parser.add_argument("--test_size", type=float, default=0.2, help="Test split ratio, as in train.py")
+    parser.add_argument("--random_state", type=int, default=42, help="Split seed")
+    parser.add_argument("--seeds", type=int, default=30, help="Forest seeds to compare over; few seeds make the gap test flaky")
+    parser.add_argument("--trees", type=int, default=100, help="Trees per forest")
+    parser.add_argument("--z", type=float, default=3.0, help="Allowed mean ROC-AUC gap in standard errors of the seed-to-seed spread")
+    parser.add_argument("--output", default=None, help="Optional path to write results as JSON")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore", category=UserWarning)
+
+    X, y = load_training_frame(Path(args.data_path), args.label_col)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=args.test_size, random_state=args.random_state, stratify=y
+    )
+    X_unique, y_unique, _, inverse = deduplicate(X_train, y_train)
+    print(f"rows={len(X_train)} unique={len(X_unique)} factor={len(X_train) / len(X_unique):.2f}")
+
+    failures = []
+    results = {"full": {"cv": [], "test": [], "seconds": []}, "dedupe": {"cv": [], "test": [], "seconds": []}}
+    for seed in range(args.seeds):
+        for name in results:
+            if name == "full":
+                search, seconds = search_once(X_train, y_train, args.trees, seed)
+            else:
+                seed_folds = fold_counts(splitter(seed), y_train, inverse, len(X_unique))
+                search, seconds = search_once(X_unique, y_unique, args.trees, seed, fold_counts=seed_folds)
+            results[name]["cv"].append(search.best_score_)
+            results[name]["test"].append(roc_auc_score(y_test, search.best_estimator_.predict_proba(X_test)[:, 1]))
+            results[name]["seconds"].append(seconds)
+
+    report = {"rows": len(X_train), "unique_rows": len(X_unique), "metrics": {}}
+    for metric in ("cv", "test"):
+        full, dedupe = np.asarray(results["full"][metric]), np.asarray(results["dedupe"][metric])
+        gap = float(dedupe.mean() - full.mean())
+        standard_error = float(np.sqrt(full.var(ddof=1) / len(full) + dedupe.var(ddof=1) / len(dedupe))) if len(full) > 1 else 0.0
+        report["metrics"][metric] = {
+            "full_mean": round(float(full.mean()), 6),
+            "dedupe_mean": round(float(dedupe.mean()), 6),
+            "gap": round(gap, 6),
+            "standard_error": round(standard_error, 6),
+        }
+        print(
+            f"{metric:<4} roc_auc full={full.mean():.4f}±{full.std():.4f} dedupe={dedupe.mean():.4f}±{dedupe.std():.4f} "
+            f"gap={gap:+.4f} ({gap / standard_error if standard_error else 0.0:+.2f} se)"
+        )
+        if abs(gap) > args.z * standard_error:
+            failures.append(f"{metric} ROC-AUC gap {gap:+.4f} exceeds {args.z:g} standard errors")
+    speedup = np.mean(results["full"]["seconds"]) / np.mean(results["dedupe"]["seconds"])
+    report["search_seconds"] = {name: round(float(np.mean(values["seconds"])), 3) for name, values in results.items()}
+    print(
+        f"cv+refit seconds full={report['search_seconds']['full']:.2f} dedupe={report['search_seconds']['dedupe']:.2f} "
+        f"speedup={speedup:.2f}x"
+    )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    if failures:
+        raise SystemExit("; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src" / "inference"))
+
+from forest import FOREST_FILE, compile_forest, load_forest  # noqa: E402
+from scoring import labels_from_proba, load_scoring_config, resolve_threshold  # noqa: E402
+
+
+def best_of(fn, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Trees evaluated and deviation from the full ensemble with early exit.")
+    parser.add_argument("--model_dir", required=True, help="Directory produced by src/training/train.py")
+    parser.add_argument("--label_col", default="label", help="Label column name")
+    parser.add_argument("--decision_threshold", type=float, default=None, help="Override the threshold in scoring.json")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed repetitions (best is reported)")
+    parser.add_argument("--max_label_changes", type=int, default=0, help="Exit non-zero above this many flipped labels")
+    parser.add_argument("--output", default=None, help="Optional path to write results as JSON")
+    args = parser.parse_args()
+
+    model_dir = Path(args.model_dir)
+    config = load_scoring_config(model_dir)
+    if "early_exit" not in config:
+        raise SystemExit(f"No early_exit margins in {model_dir / 'scoring.json'}; retrain with --early_exit_chunk")
+    early_exit = config["early_exit"]
+    threshold = resolve_threshold(config, args.decision_threshold)
+
+    forest_path = model_dir / FOREST_FILE
+    forest = load_forest(forest_path) if forest_path.exists() else compile_forest(joblib.load(model_dir / "model.joblib"))
+    X = pd.read_parquet(model_dir / "test.parquet").drop(columns=[args.label_col], errors="ignore")
+    X = X.to_numpy(dtype=np.float32)
+
+    def early():
+        return forest.predict_proba_early(X, threshold, early_exit["margins"], early_exit["chunk_trees"])
+
+    full = forest.predict_proba(X)
+    proba, n_trees = early()
+    deviation = np.abs(proba[:, 1] - full[:, 1])
+    flipped = labels_from_proba(proba, forest.classes_, threshold) != labels_from_proba(full, forest.classes_, threshold)
+    checkpoints, counts = np.unique(n_trees, return_counts=True)
+
+    report = {
+        "rows": int(len(X)),
+        "n_estimators": forest.n_estimators,
+        "chunk_trees": early_exit["chunk_trees"],
+        "threshold": threshold,
+        "mean_trees": round(float(n_trees.mean()), 3),
+        "stopped_early": round(float((n_trees < forest.n_estimators).mean()), 4),
+        "rows_per_checkpoint": {int(trees): int(count) for trees, count in zip(checkpoints, counts)},
+        "max_deviation": float(deviation.max()),
+        "mean_deviation": float(deviation.mean()),
+        "label_changes": int(flipped.sum()),
+        "full_ms": round(best_of(lambda: forest.predict_proba(X), args.repeats), 3),
+        "early_exit_ms": round(best_of(early, args.repeats), 3),
+    }
+    print(
+        f"rows={report['rows']} trees/row={report['mean_trees']:.1f} of {forest.n_estimators} "
+        f"stopped_early={report['stopped_early']:.1%} max_deviation={report['max_deviation']:.6f} "
+        f"label_changes={report['label_changes']}"
+    )
+    print(f"full={report['full_ms']:.3f}ms early_exit={report['early_exit_ms']:.3f}ms per checkpoint={report['rows_per_checkpoint']}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    if report["label_changes"] > args.max_label_changes:
+        raise SystemExit(f"{report['label_changes']} label(s) differ from the full ensemble")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import argparse
+import json
+import pickle
+import sys
+import time
+import tracemalloc
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src" / "inference"))
+
+from forest import compile_forest  # noqa: E402
+
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+
+def parity_inputs(sample: pd.DataFrame, seed: int) -> list:
+    rng = np.random.default_rng(seed)
+    shifted = sample.astype(float) + rng.integers(-10, 11, size=sample.shape)
+    noisy = pd.DataFrame(
+        rng.normal(sample.mean().values, sample.std().values + 1.0, size=(5000, sample.shape[1])),
+        columns=sample.columns,
+    )
+    with_missing = noisy.mask(rng.random(noisy.shape) < 0.1)
+    return [("test", sample), ("shifted", shifted), ("noisy", noisy), ("missing", with_missing)]
+
+
+def check_parity(model, compiled, inputs: list) -> list:
+    results = []
+    for name, X in inputs:
+        expected = model.predict_proba(X)
+        actual = compiled.predict_proba(X)
+        results.append(
+            {
+                "input": name,
+                "rows": len(X),
+                "max_abs_diff": float(np.max(np.abs(expected - actual))),
+                "exact": bool(np.array_equal(expected, actual)),
+                "label_agreement": float(np.mean(model.predict(X) == compiled.predict(X))),
+            }
+        )
+    return results
+
+
+def throughput(predict_proba, X: np.ndarray, min_seconds: float) -> float:
+    predict_proba(X)
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        predict_proba(X)
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return calls * len(X) / elapsed
+
+
+def peak_allocated(predict_proba, X: np.ndarray) -> int:
+    tracemalloc.start()
+    predict_proba(X)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check parity and benchmark the compiled forest against sklearn.")
+    parser.add_argument("--model_dir", required=True, help="Directory containing model.joblib and test.parquet")
+    parser.add_argument("--label_col", default="label", help="Label column name")
+    parser.add_argument("--batch_sizes", default="1,100,10000", help="Comma-separated batch sizes")
+    parser.add_argument("--min_seconds", type=float, default=1.0, help="Minimum timing window per case")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for synthetic inputs")
+    parser.add_argument("--output", default=None, help="Optional path to write results as JSON")
+    args = parser.parse_args()
+
+    model_dir = Path(args.model_dir)
+    model = joblib.load(model_dir / "model.joblib")
+    start = time.perf_counter()
+    compiled = compile_forest(model)
+    compile_seconds = time.perf_counter() - start
+
+    sample = pd.read_parquet(model_dir / "test.parquet").drop(columns=[args.label_col], errors="ignore")
+    parity = check_parity(model, compiled, parity_inputs(sample, args.seed))
+    for row in parity:
+        print(
+            f"parity input={row['input']:<8} rows={row['rows']:>5} exact={row['exact']} "
+            f"max_abs_diff={row['max_abs_diff']:.3g} label_agreement={row['label_agreement']:.4f}"
+        )
+
+    rng = np.random.default_rng(args.seed)
+    speed = []
+    for n_rows in [int(size) for size in args.batch_sizes.split(",")]:
+        X = sample.to_numpy(dtype=np.float32)[rng.integers(0, len(sample), size=n_rows)]
+        row = {"rows": n_rows}
+        for engine, predict_proba in (("sklearn", model.predict_proba), ("compiled", compiled.predict_proba)):
+            row[f"{engine}_rows_per_sec"] = round(throughput(predict_proba, X, args.min_seconds), 1)
+            row[f"{engine}_peak_alloc_bytes"] = peak_allocated(predict_proba, X)
+        speed.append(row)
+        print(
+            f"rows={n_rows:>6} sklearn={row['sklearn_rows_per_sec']:>12,.0f} rows/s "
+            f"compiled={row['compiled_rows_per_sec']:>12,.0f} rows/s "
+            f"peak_alloc sklearn={row['sklearn_peak_alloc_bytes']:,}B compiled={row['compiled_peak_alloc_bytes']:,}B"
+        )
+
+    footprint = {
+        "compile_seconds": round(compile_seconds, 4),
+        "sklearn_pickle_bytes": len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)),
+        "compiled_array_bytes": compiled.nbytes,
+        "n_estimators": compiled.n_estimators,
+        "n_nodes": int(compiled.threshold.shape[0]),
+        "max_depth": compiled.max_depth,
+    }
+    print(
+        f"model sklearn_pickle={footprint['sklearn_pickle_bytes']:,}B "
+        f"compiled_arrays={footprint['compiled_array_bytes']:,}B compile={footprint['compile_seconds']}s"
+    )
+
+    if args.output:
+        report = {"parity": parity, "throughput": speed, "footprint": footprint}
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    if not all(row["exact"] for row in parity):
+        raise SystemExit("Compiled forest does not match sklearn predict_proba")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src" / "inference"))
+
+
+def publish(staged: Path, name: str) -> None:
+    # Same bytes under a new mtime, written next to the target and renamed over it
+    temporary = staged / f".{name}.incoming"
+    shutil.copy2(staged / name, temporary)
+    os.utime(temporary)
+    os.replace(temporary, staged / name)
+
+
+def percentiles(latencies_ms: list) -> dict:
+    if not latencies_ms:
+        return {"requests": 0}
+    values = np.asarray(latencies_ms)
+    return {
+        "requests": int(values.size),
+        "p50_ms": round(float(np.percentile(values, 50)), 4),
+        "p99_ms": round(float(np.percentile(values, 99)), 4),
+        "max_ms": round(float(values.max()), 4),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure model swap latency and request stalls during hot reload.")
+    parser.add_argument("--model_dir", required=True, help="Directory produced by src/training/train.py")
+    parser.add_argument("--label_col", default="label", help="Label column name")
+    parser.add_argument("--threads", type=int, default=4, help="Client threads sending requests")
+    parser.add_argument("--batch_size", type=int, default=10, help="Rows per request")
+    parser.add_argument("--reloads", type=int, default=3, help="New versions published during the run")
+    parser.add_argument("--interval_s", type=float, default=0.2, help="SCORING_RELOAD_INTERVAL_S for the watcher")
+    parser.add_argument("--settle_s", type=float, default=1.0, help="Steady-state time before and between reloads")
+    parser.add_argument("--output", default=None, help="Optional path to write results as JSON")
+    args = parser.parse_args()
+
+    model_dir = Path(args.model_dir)
+    with tempfile.TemporaryDirectory() as staging:
+        staged = Path(staging)
+        for path in model_dir.iterdir():
+            if path.is_file():
+                shutil.copy2(path, staged / path.name)
+        os.environ["SCORING_MODEL_DIR"] = str(staged)
+        os.environ["SCORING_RELOAD_INTERVAL_S"] = str(args.interval_s)
+
+        import score
+
+        score.init()
+        sample = pd.read_parquet(model_dir / "test.parquet").drop(columns=[args.label_col], errors="ignore")
+        rows = sample.sample(n=args.batch_size, replace=True, random_state=0).reset_index(drop=True)
+        payload = json.dumps({"data": rows.to_dict(orient="records")})
+        expected = score.run(payload)
+
+        stop = threading.Event()
+        timeline = [[] for _ in range(args.threads)]
+        mismatches = []
+
+        def client(index: int) -> None:
+            while not stop.is_set():
+                start = time.perf_counter()
+                result = score.run(payload)
+                timeline[index].append((start, time.perf_counter() - start))
+                if result != expected:
+                    mismatches.append(result)
+
+        clients = [threading.Thread(target=client, args=(index,)) for index in range(args.threads)]
+        for thread in clients:
+            thread.start()
+
+        artifact = "forest.joblib" if (staged / "forest.joblib").exists() else "model.joblib"
+        windows, swaps = [], []
+        time.sleep(args.settle_s)
+        for _ in range(args.reloads):
+            reloads = score.reload_stats()["reloads"]
+            published = time.perf_counter()
+            publish(staged, artifact)
+            while score.reload_stats()["reloads"] == reloads:
+                if score.reload_stats()["failures"]:
+                    raise SystemExit(f"Reload failed: {score.reload_stats()['last_error']}")
+                time.sleep(0.005)
+            stats = score.reload_stats()
+            # The watcher waits one full interval for the files to settle before loading
+            windows.append((stats["last_reload_at"] - stats["last_reload_ms"] / 1000.0, stats["last_reload_at"]))
+            swaps.append(
+                {
+                    "publish_to_swap_ms": round((stats["last_reload_at"] - published) * 1000.0, 3),
+                    "load_and_warmup_ms": round(stats["last_reload_ms"], 3),
+                }
+            )
+            time.sleep(args.settle_s)
+        stop.set()
+        for thread in clients:
+            thread.join()
+        score.WATCHER.stop()
+
+    steady, during = [], []
+    for start, latency in (entry for entries in timeline for entry in entries):
+        overlaps = any(start < end and start + latency > begin for begin, end in windows)
+        (during if overlaps else steady).append(latency * 1000.0)
+
+    report = {
+        "artifact": artifact,
+        "threads": args.threads,
+        "batch_size": args.batch_size,
+        "interval_s": args.interval_s,
+        "swaps": swaps,
+        "steady": percentiles(steady),
+        "during_reload": percentiles(during),
+        "mismatched_responses": len(mismatches),
+    }
+    for index, swap in enumerate(swaps):
+        print(
+            f"reload {index + 1}: publish->swap={swap['publish_to_swap_ms']:>9.2f}ms "
+            f"load+warmup={swap['load_and_warmup_ms']:>8.2f}ms"
+        )
+    for label in ("steady", "during_reload"):
+        entry = report[label]
+        if entry["requests"]:
+            print(
+                f"{label:<14} requests={entry['requests']:>7} p50={entry['p50_ms']:>8.3f}ms "
+                f"p99={entry['p99_ms']:>8.3f}ms max={entry['max_ms']:>8.3f}ms"
+            )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    if mismatches:
+        raise SystemExit(f"{len(mismatches)} response(s) differed from the pre-reload model")
+
+
+if __name__ == "__main__":
+    main()
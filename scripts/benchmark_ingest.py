@@ -0,0 +1,152 @@
+import argparse
+import json
+import multiprocessing
+import queue
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+TRAINING_DIR = ROOT / "src" / "training"
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from benchmark_dataset_loader import make_gold, read_rss_kb  # noqa: E402
+
+MODES = ("legacy", "float64", "compact")
+
+
+def reset_peak_rss() -> bool:
+    # Writing 5 to clear_refs restarts VmHWM, so the next peak covers fit alone
+    try:
+        Path("/proc/self/clear_refs").write_text("5")
+        return True
+    except OSError:
+        return False
+
+
+def read_peak_rss_kb() -> int:
+    with open("/proc/self/status", encoding="utf-8") as handle:
+        for line in handle:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def worker(mode: str, data_path: str, label_col: str, trees: int, max_depth: int, results) -> None:
+    sys.path.insert(0, str(TRAINING_DIR))
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.impute import SimpleImputer
+    from sklearn.model_selection import train_test_split
+    from sklearn.pipeline import Pipeline
+
+    from dataset import load_training_frame
+
+    data_path = Path(data_path)
+    baseline_kb = read_rss_kb()
+    start = time.perf_counter()
+    if mode == "legacy":
+        # The ingest train.py used before: pandas concat, then to_numeric over every column
+        df = pd.concat([pd.read_parquet(file) for file in sorted(data_path.glob("*.parquet"))], ignore_index=True)
+        df = df.dropna(subset=[label_col])
+        y = df[label_col].astype(int)
+        X = df.drop(columns=[label_col])
+        X = X.apply(pd.to_numeric, errors="coerce")
+        X = X.dropna(axis=1, how="all")
+    else:
+        X, y = load_training_frame(data_path, label_col, mode)
+    ingest_seconds = time.perf_counter() - start
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    model = Pipeline(
+        steps=[
+            ("imputer", SimpleImputer(strategy="median")),
+            ("model", RandomForestClassifier(n_estimators=trees, max_depth=max_depth, random_state=42)),
+        ]
+    )
+    ingest_peak_kb = read_peak_rss_kb()
+    before_fit_kb = read_rss_kb()
+    fit_peak_reset = reset_peak_rss()
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    fit_peak_kb = read_peak_rss_kb() if fit_peak_reset else ingest_peak_kb
+    proba = model.predict_proba(X_test.iloc[:100000])[:, 1]
+    results.put(
+        {
+            "mode": mode,
+            "rows": int(len(X)),
+            "dtypes": {str(dtype): int(count) for dtype, count in X.dtypes.astype(str).value_counts().items()},
+            "ingest_seconds": round(ingest_seconds, 3),
+            "ingest_peak_delta_mib": round((ingest_peak_kb - baseline_kb) / 1024, 1),
+            "before_fit_delta_mib": round((before_fit_kb - baseline_kb) / 1024, 1),
+            "fit_peak_delta_mib": round((fit_peak_kb - baseline_kb) / 1024, 1),
+            "fit_seconds": round(fit_seconds, 3),
+            "probabilities": proba.tolist(),
+        }
+    )
+
+
+def run_mode(context, mode: str, data_path: Path, args) -> dict:
+    results = context.Queue()
+    process = context.Process(target=worker, args=(mode, str(data_path), args.label_col, args.trees, args.max_depth, results))
+    process.start()
+    # A mode that runs out of memory is killed; report that instead of waiting forever
+    while True:
+        try:
+            row = results.get(timeout=1.0)
+            break
+        except queue.Empty:
+            if not process.is_alive():
+                return {"mode": mode, "error": f"worker exited with code {process.exitcode}"}
+    process.join()
+    return row
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Peak RSS during fit with the legacy, float64 and compact training ingest.")
+    parser.add_argument("--rows", type=int, default=10_000_000, help="Synthetic gold rows")
+    parser.add_argument("--partitions", type=int, default=20, help="Parquet files the rows are split into")
+    parser.add_argument("--label_col", default="label", help="Label column name")
+    parser.add_argument("--trees", type=int, default=4, help="Trees per forest; memory does not depend on it")
+    parser.add_argument("--max_depth", type=int, default=8, help="Tree depth, to keep fit time bounded")
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated ingest modes to run")
+    parser.add_argument("--output", default=None, help="Optional path to write results as JSON")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        started = time.perf_counter()
+        # Written from a child so the generator's buffers do not stay in this process
+        writer = context.Process(target=make_gold, args=(directory, args.partitions, args.rows // args.partitions, 0, args.label_col, False))
+        writer.start()
+        writer.join()
+        print(f"wrote {args.rows:,} rows in {args.partitions} partitions in {time.perf_counter() - started:.1f}s")
+        for mode in args.modes.split(","):
+            row = run_mode(context, mode, directory, args)
+            rows.append(row)
+            if "error" in row:
+                print(f"mode={mode:<8} {row['error']}")
+                continue
+            print(
+                f"mode={mode:<8} ingest={row['ingest_seconds']:>6.2f}s peak={row['ingest_peak_delta_mib']:>7.1f}MiB | "
+                f"before_fit={row['before_fit_delta_mib']:>7.1f}MiB fit_peak={row['fit_peak_delta_mib']:>7.1f}MiB "
+                f"fit={row['fit_seconds']:>6.2f}s dtypes={row['dtypes']}"
+            )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps([{k: v for k, v in row.items() if k != "probabilities"} for row in rows], indent=2) + "\n", encoding="utf-8")
+    # float32 storage must not change the forest: sklearn fits on float32 either way
+    finished = [row for row in rows if "error" not in row]
+    for row in finished[1:]:
+        if not np.array_equal(np.asarray(row["probabilities"]), np.asarray(finished[0]["probabilities"])):
+            raise SystemExit(f"mode={row['mode']} predicts differently from mode={finished[0]['mode']}")
+
+
+if __name__ == "__main__":
+    main()
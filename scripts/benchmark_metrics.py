@@ -0,0 +1,87 @@
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src" / "inference"))
+
+from metrics import ScoringMetrics, StageTimer  # noqa: E402
+
+
+def instrumentation_us(repeats: int, rounds: int = 5) -> float:
+    # The exact calls score.run makes per request, without any scoring work;
+    # folding is included since observe() triggers it. Best of a few rounds
+    timings = []
+    for _ in range(rounds):
+        metrics = ScoringMetrics()
+        start = time.perf_counter()
+        for _ in range(repeats):
+            timer = StageTimer()
+            timer.mark("parse")
+            timer.mark("decode")
+            timer.mark("predict")
+            timer.mark("serialize")
+            metrics.observe(timer, 1, "json")
+        metrics.render()
+        timings.append((time.perf_counter() - start) / repeats * 1e6)
+    return min(timings)
+
+
+def request_us(score, payload: str, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        score.run(payload)
+        timings.append(time.perf_counter() - start)
+    return float(np.percentile(timings, 50)) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-request cost of the score.run stage timings and metrics.")
+    parser.add_argument("--model_dir", required=True, help="Directory produced by src/training/train.py")
+    parser.add_argument("--label_col", default="label", help="Label column name")
+    parser.add_argument("--repeats", type=int, default=2000, help="Requests timed per configuration")
+    parser.add_argument("--budget_us", type=float, default=5.0, help="Exit non-zero above this instrumentation cost")
+    parser.add_argument("--output", default=None, help="Optional path to write results as JSON")
+    args = parser.parse_args()
+
+    os.environ["AZUREML_MODEL_DIR"] = args.model_dir
+    import score
+
+    score.init()
+    X = pd.read_parquet(Path(args.model_dir) / "test.parquet").drop(columns=[args.label_col], errors="ignore")
+    X = X[score.FEATURE_COLUMNS]
+    payload = json.dumps({"columns": list(X.columns), "data": X.head(1).values.tolist()})
+
+    metrics = score.METRICS
+    score.METRICS = None
+    off_us = request_us(score, payload, args.repeats)
+    score.METRICS = metrics or ScoringMetrics()
+    on_us = request_us(score, payload, args.repeats)
+
+    report = {
+        "instrumentation_us": round(instrumentation_us(args.repeats * 10), 3),
+        "request_off_p50_us": round(off_us, 3),
+        "request_on_p50_us": round(on_us, 3),
+        "exposition_bytes": len(score.metrics_text()),
+    }
+    print(
+        f"instrumentation={report['instrumentation_us']:.2f}us/request "
+        f"run() p50 off={report['request_off_p50_us']:.1f}us on={report['request_on_p50_us']:.1f}us "
+        f"exposition={report['exposition_bytes']} bytes"
+    )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    if report["instrumentation_us"] > args.budget_us:
+        raise SystemExit(f"Instrumentation costs {report['instrumentation_us']:.2f}us per request (> {args.budget_us:g}us)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src" / "inference"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Hit rate, evictions and latency of multi-model serving under a memory budget.")
+    parser.add_argument("--model_dir", required=True, help="Directory produced by src/training/train.py")
+    parser.add_argument("--label_col", default="label", help="Label column name")
+    parser.add_argument("--versions", type=int, default=6, help="Copies of the model served under different names")
+    parser.add_argument("--resident", type=int, default=3, help="Versions the memory budget should hold")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests sent")
+    parser.add_argument("--zipf", type=float, default=1.2, help="Skew of the version popularity (Zipf exponent)")
+    parser.add_argument("--batch_size", type=int, default=10, help="Rows per request")
+    parser.add_argument("--output", default=None, help="Optional path to write results as JSON")
+    args = parser.parse_args()
+
+    model_dir = Path(args.model_dir)
+    with tempfile.TemporaryDirectory() as staging:
+        models_root = Path(staging)
+        names = [f"v{index}" for index in range(args.versions)]
+        for name in names:
+            (models_root / name).mkdir()
+            for path in model_dir.iterdir():
+                if path.is_file() and path.name != "test.parquet":
+                    shutil.copy2(path, models_root / name / path.name)
+        os.environ["AZUREML_MODEL_DIR"] = str(model_dir)
+        os.environ["SCORING_MODELS_DIR"] = str(models_root)
+
+        import score
+
+        score.init()
+        # Size the budget from one loaded version so it holds --resident of them
+        score.predict(np.zeros((1, len(score.FEATURE_COLUMNS)), dtype=np.float32), names[0])
+        per_model = score.model_stats()["resident_bytes"]
+        score.REGISTRY = score.ModelRegistry(models_root, score.load_selectable, per_model * args.resident)
+
+        sample = pd.read_parquet(model_dir / "test.parquet").drop(columns=[args.label_col], errors="ignore")
+        rows = sample.sample(n=args.batch_size, replace=True, random_state=0).reset_index(drop=True)
+        payload = {"data": rows.to_dict(orient="records")}
+        expected = score.run(payload)
+
+        weights = 1.0 / np.arange(1, args.versions + 1) ** args.zipf
+        rng = np.random.default_rng(0)
+        selected = rng.choice(names, size=args.requests, p=weights / weights.sum())
+
+        hit_ms, miss_ms, mismatches = [], [], 0
+        for name in selected:
+            misses = score.model_stats()["misses"]
+            start = time.perf_counter()
+            result = score.run({**payload, "model": str(name)})
+            elapsed = (time.perf_counter() - start) * 1000.0
+            (miss_ms if score.model_stats()["misses"] > misses else hit_ms).append(elapsed)
+            mismatches += result != expected
+        stats = score.model_stats()
+
+    def summary(values: list) -> dict:
+        if not values:
+            return {"requests": 0}
+        return {
+            "requests": len(values),
+            "p50_ms": round(float(np.percentile(values, 50)), 4),
+            "p99_ms": round(float(np.percentile(values, 99)), 4),
+        }
+
+    report = {
+        "versions": args.versions,
+        "per_model_bytes": per_model,
+        "max_bytes": stats["max_bytes"],
+        "resident_bytes": stats["resident_bytes"],
+        "hits": stats["hits"],
+        "misses": stats["misses"],
+        "evictions": stats["evictions"],
+        "hit_rate": round(stats["hits"] / max(stats["hits"] + stats["misses"], 1), 4),
+        "hit_latency": summary(hit_ms),
+        "miss_latency": summary(miss_ms),
+        "mismatched_responses": int(mismatches),
+    }
+    print(
+        f"versions={args.versions} budget={stats['max_bytes']:,}B ({args.resident} models) hits={stats['hits']} "
+        f"misses={stats['misses']} evictions={stats['evictions']} hit_rate={report['hit_rate']:.1%}"
+    )
+    for label in ("hit_latency", "miss_latency"):
+        entry = report[label]
+        if entry["requests"]:
+            print(f"{label:<13} requests={entry['requests']:>6} p50={entry['p50_ms']:>9.3f}ms p99={entry['p99_ms']:>9.3f}ms")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    if mismatches:
+        raise SystemExit(f"{mismatches} response(s) differed from the default model")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+INFERENCE_DIR = ROOT / "src" / "inference"
+
+MODES = {
+    # mode: (SCORING_ENGINE, keep forest.joblib sidecar)
+    "sklearn": ("sklearn", False),
+    "compiled": ("compiled", False),
+    "mmap": ("compiled", True),
+}
+
+
+def read_memory_kb() -> dict:
+    # smaps_rollup gives PSS, which splits shared page-cache pages between the processes mapping them
+    memory = {}
+    with open("/proc/self/smaps_rollup", encoding="utf-8") as handle:
+        for line in handle:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss", "Shared_Clean", "Private_Clean", "Private_Dirty"):
+                memory[key.lower()] = int(rest.split()[0])
+    return memory
+
+
+def worker(model_dir: str, engine: str, label_col: str, ready, done, results) -> None:
+    os.environ["AZUREML_MODEL_DIR"] = model_dir
+    os.environ["SCORING_ENGINE"] = engine
+    sys.path.insert(0, str(INFERENCE_DIR))
+
+    import pandas as pd
+    import score
+
+    start = time.perf_counter()
+    score.init()
+    init_seconds = time.perf_counter() - start
+
+    sample = pd.read_parquet(Path(model_dir) / "test.parquet").drop(columns=[label_col], errors="ignore")
+    score.run({"data": sample.to_dict(orient="records")})
+
+    ready.wait()
+    results.put({"pid": os.getpid(), "init_seconds": init_seconds, **read_memory_kb()})
+    done.wait()
+
+
+def run_mode(model_dir: Path, mode: str, workers: int, label_col: str) -> list:
+    engine, keep_sidecar = MODES[mode]
+    with tempfile.TemporaryDirectory() as staging:
+        staged = Path(staging)
+        for path in model_dir.iterdir():
+            if path.name == "forest.joblib" and not keep_sidecar:
+                continue
+            if path.is_file():
+                shutil.copy2(path, staged / path.name)
+
+        context = multiprocessing.get_context("spawn")
+        ready = context.Barrier(workers + 1)
+        done = context.Barrier(workers + 1)
+        results = context.Queue()
+        processes = [
+            context.Process(target=worker, args=(str(staged), engine, label_col, ready, done, results))
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        ready.wait()
+        rows = [results.get() for _ in range(workers)]
+        done.wait()
+        for process in processes:
+            process.join()
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Report per-worker memory and init() time for each model loading mode.")
+    parser.add_argument("--model_dir", required=True, help="Directory produced by src/training/train.py")
+    parser.add_argument("--label_col", default="label", help="Label column name")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes per mode")
+    parser.add_argument("--modes", default="sklearn,compiled,mmap", help="Comma-separated modes to compare")
+    parser.add_argument("--output", default=None, help="Optional path to write results as JSON")
+    args = parser.parse_args()
+
+    model_dir = Path(args.model_dir)
+    summary = []
+    for mode in args.modes.split(","):
+        if mode == "mmap" and not (model_dir / "forest.joblib").exists():
+            print("mode=mmap skipped: forest.joblib not found (retrain with --compiled_forest to write the sidecar)")
+            continue
+        rows = run_mode(model_dir, mode, args.workers, args.label_col)
+        entry = {
+            "mode": mode,
+            "workers": args.workers,
+            "mean_init_ms": round(sum(row["init_seconds"] for row in rows) / len(rows) * 1000.0, 2),
+            "mean_rss_kb": round(sum(row["rss"] for row in rows) / len(rows)),
+            "mean_pss_kb": round(sum(row["pss"] for row in rows) / len(rows)),
+            "total_pss_kb": sum(row["pss"] for row in rows),
+            "workers_detail": rows,
+        }
+        summary.append(entry)
+        print(
+            f"mode={mode:<8} workers={args.workers} init={entry['mean_init_ms']:>8.2f}ms "
+            f"rss/worker={entry['mean_rss_kb']:>8,}kB pss/worker={entry['mean_pss_kb']:>8,}kB "
+            f"total_pss={entry['total_pss_kb']:>9,}kB"
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(summary, indent=2) + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src" / "inference"))
+
+from forest import compile_forest  # noqa: E402
+from parallel import (  # noqa: E402
+    CALIBRATION_SIZES,
+    PARALLEL_CONFIG_KEY,
+    ParallelScorer,
+    available_cores,
+    calibrate_min_rows,
+    make_pool,
+)
+from scoring import write_scoring_config  # noqa: E402
+
+
+def best_of(fn, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time row-parallel forest scoring and calibrate the crossover batch size.")
+    parser.add_argument("--model_dir", required=True, help="Directory containing model.joblib and test.parquet")
+    parser.add_argument("--label_col", default="label", help="Label column name")
+    parser.add_argument("--engines", default="sklearn,compiled", help="Comma-separated engines to measure")
+    parser.add_argument("--batch_sizes", default=",".join(str(size) for size in CALIBRATION_SIZES), help="Comma-separated batch sizes")
+    parser.add_argument("--workers", type=int, default=available_cores(), help="Thread pool size")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed repetitions per case (best is reported)")
+    parser.add_argument("--write", action="store_true", help="Store the calibrated crossover in scoring.json")
+    parser.add_argument("--output", default=None, help="Optional path to write results as JSON")
+    args = parser.parse_args()
+
+    model_dir = Path(args.model_dir)
+    model = joblib.load(model_dir / "model.joblib")
+    sample = pd.read_parquet(model_dir / "test.parquet").drop(columns=[args.label_col], errors="ignore")
+    scorers = {"sklearn": (model, sample), "compiled": (compile_forest(model), sample.to_numpy(dtype=np.float32))}
+
+    results, crossover, mismatches = [], {}, 0
+    with make_pool(args.workers) as pool:
+        for engine in args.engines.split(","):
+            scorer, X = scorers[engine]
+            parallel = ParallelScorer(scorer, 1, pool, args.workers)
+            for n_rows in [int(size) for size in args.batch_sizes.split(",")]:
+                index = np.arange(n_rows) % len(X)
+                batch = X.iloc[index] if hasattr(X, "iloc") else X[index]
+                equal = np.array_equal(scorer.predict_proba(batch), parallel.predict_proba(batch))
+                mismatches += not equal
+                row = {
+                    "engine": engine,
+                    "rows": n_rows,
+                    "workers": parallel.workers_for(n_rows),
+                    "inline_ms": round(best_of(lambda: scorer.predict_proba(batch), args.repeats), 3),
+                    "parallel_ms": round(best_of(lambda: parallel.predict_proba(batch), args.repeats), 3),
+                    "identical": bool(equal),
+                }
+                row["speedup"] = round(row["inline_ms"] / row["parallel_ms"], 3)
+                results.append(row)
+                print(
+                    f"engine={engine:<8} rows={n_rows:>6} workers={row['workers']:>2} inline={row['inline_ms']:>9.3f}ms "
+                    f"parallel={row['parallel_ms']:>9.3f}ms speedup={row['speedup']:>5.2f}x identical={equal}"
+                )
+            rows = calibrate_min_rows(scorer, X, pool, args.workers, repeats=args.repeats)
+            if rows is not None:
+                crossover[engine] = rows
+            print(f"engine={engine:<8} crossover={'n/a (single core)' if rows is None else rows}")
+
+    if args.write and crossover:
+        write_scoring_config(model_dir, **{PARALLEL_CONFIG_KEY: crossover})
+        print(f"Wrote {PARALLEL_CONFIG_KEY}={crossover} to {model_dir / 'scoring.json'}")
+    if args.output:
+        Path(args.output).write_text(json.dumps({"crossover": crossover, "cases": results}, indent=2) + "\n", encoding="utf-8")
+    if mismatches:
+        raise SystemExit(f"{mismatches} case(s) differ between inline and parallel scoring")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src" / "inference"))
+
+import score  # noqa: E402
+
+
+def build_payloads(sample: pd.DataFrame, n_rows: int, seed: int) -> dict:
+    rows = sample.sample(n=n_rows, replace=True, random_state=seed)
+    return {
+        "records": json.dumps({"data": rows.to_dict(orient="records")}),
+        "columnar": json.dumps({"columns": list(rows.columns), "data": rows.values.tolist()}),
+    }
+
+
+def time_run(raw_data: str, repeats: int) -> dict:
+    score.run(raw_data)
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        score.run(raw_data)
+        latencies.append(time.perf_counter() - start)
+    latencies_ms = np.array(latencies) * 1000.0
+    return {
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 4),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 4),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare pandas and array decoding latency in score.run.")
+    parser.add_argument("--model_dir", required=True, help="Directory containing model.joblib and test.parquet")
+    parser.add_argument("--label_col", default="label", help="Label column name")
+    parser.add_argument("--batch_sizes", default="1,10,100,10000", help="Comma-separated batch sizes")
+    parser.add_argument("--max_repeats", type=int, default=200, help="Upper bound on timed calls per case")
+    parser.add_argument("--output", default=None, help="Optional path to write results as JSON")
+    args = parser.parse_args()
+
+    model_dir = Path(args.model_dir)
+    os.environ["AZUREML_MODEL_DIR"] = str(model_dir)
+    score.init()
+
+    sample = pd.read_parquet(model_dir / "test.parquet").drop(columns=[args.label_col], errors="ignore")
+    results = []
+    for n_rows in [int(size) for size in args.batch_sizes.split(",")]:
+        repeats = max(10, min(args.max_repeats, 20000 // n_rows))
+        for shape, raw_data in build_payloads(sample, n_rows, seed=n_rows).items():
+            for path, fast in (("pandas", False), ("array", True)):
+                score.FAST_PATH = fast
+                stats = time_run(raw_data, repeats)
+                results.append({"rows": n_rows, "shape": shape, "path": path, "repeats": repeats, **stats})
+                print(f"rows={n_rows:>6} shape={shape:<8} path={path:<6} p50={stats['p50_ms']:.3f}ms p99={stats['p99_ms']:.3f}ms")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
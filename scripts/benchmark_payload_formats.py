@@ -0,0 +1,110 @@
+import argparse
+import io
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src" / "inference"))
+
+import score  # noqa: E402
+from payload import (  # noqa: E402
+    ARROW_CONTENT_TYPE,
+    NPY_CONTENT_TYPE,
+    decode_arrow,
+    decode_npy,
+    dumps_json,
+    encode_arrow,
+    encode_npy,
+    loads_json,
+)
+
+
+def encode_request(rows: pd.DataFrame, fmt: str) -> bytes:
+    if fmt in ("json", "json_fast"):
+        return json.dumps({"data": rows.to_dict(orient="records")}).encode("utf-8")
+    if fmt == "json_columnar":
+        return json.dumps({"columns": list(rows.columns), "data": rows.values.tolist()}).encode("utf-8")
+    if fmt == "npy":
+        buffer = io.BytesIO()
+        np.save(buffer, rows.to_numpy(dtype=np.float32), allow_pickle=False)
+        return buffer.getvalue()
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(rows, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def codec(fmt: str):
+    if fmt.startswith("json"):
+        style = "fast" if fmt.endswith("_fast") else "compat"
+        return (
+            lambda body: score.fill_missing(score.decode_features(loads_json(body))),
+            lambda preds, probs: dumps_json(preds, probs, style, score.RESPONSE_FIELDS),
+        )
+    if fmt == "npy":
+        return (lambda body: score.fill_missing(decode_npy(body, score.FEATURE_COLUMNS)), encode_npy)
+    return (lambda body: score.fill_missing(decode_arrow(body, score.FEATURE_COLUMNS)), encode_arrow)
+
+
+def best_of(fn, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare bytes on wire and codec time per scoring payload format.")
+    parser.add_argument("--model_dir", required=True, help="Directory containing model.joblib and test.parquet")
+    parser.add_argument("--label_col", default="label", help="Label column name")
+    parser.add_argument("--batch_sizes", default="1000,100000", help="Comma-separated batch sizes")
+    parser.add_argument("--formats", default="json,json_fast,json_columnar,npy,arrow", help="Comma-separated formats")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed repetitions per case (best is reported)")
+    parser.add_argument("--output", default=None, help="Optional path to write results as JSON")
+    args = parser.parse_args()
+
+    model_dir = Path(args.model_dir)
+    os.environ["AZUREML_MODEL_DIR"] = str(model_dir)
+    score.init()
+    sample = pd.read_parquet(model_dir / "test.parquet").drop(columns=[args.label_col], errors="ignore")
+
+    results = []
+    for n_rows in [int(size) for size in args.batch_sizes.split(",")]:
+        rows = sample.sample(n=n_rows, replace=True, random_state=n_rows).reset_index(drop=True)
+        preds, probs = score.score_batch(rows.to_numpy(dtype=np.float32))
+        for fmt in args.formats.split(","):
+            decode, encode = codec(fmt)
+            body = encode_request(rows, fmt)
+            response = encode(preds, probs)
+            row = {
+                "rows": n_rows,
+                "format": fmt,
+                "content_type": {"npy": NPY_CONTENT_TYPE, "arrow": ARROW_CONTENT_TYPE}.get(fmt, "application/json"),
+                "request_bytes": len(body),
+                "response_bytes": len(response),
+                "decode_ms": round(best_of(lambda: decode(body), args.repeats), 3),
+                "encode_ms": round(best_of(lambda: encode(preds, probs), args.repeats), 3),
+            }
+            results.append(row)
+            print(
+                f"rows={n_rows:>7} format={fmt:<13} request={row['request_bytes']:>11,}B "
+                f"response={row['response_bytes']:>10,}B decode={row['decode_ms']:>9.3f}ms encode={row['encode_ms']:>8.3f}ms"
+            )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src" / "inference"))
+
+from predictions import WRITER_NICE, PredictionLog  # noqa: E402
+
+
+def latencies_ms(score, payload: str, requests: int, load: float) -> list:
+    # Idles after each request so scoring keeps the core busy only a load
+    # share of the time, as a server below saturation would
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        score.run(payload)
+        elapsed = time.perf_counter() - start
+        latencies.append(elapsed * 1000.0)
+        if load < 1.0:
+            time.sleep(elapsed * (1.0 / load - 1.0))
+    return latencies
+
+
+def percentiles(latencies) -> dict:
+    return {
+        "p50_ms": round(float(np.percentile(latencies, 50)), 4),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 4),
+    }
+
+
+def flood(log: PredictionLog, X: np.ndarray, threads: int, batches: int) -> float:
+    # Clients logging as fast as they can, far beyond what the writer drains
+    probs = np.zeros(len(X))
+
+    def worker() -> None:
+        for _ in range(batches):
+            log.log(X, probs, probs)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    log.close()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Request latency with and without the Parquet prediction log, plus backpressure.")
+    parser.add_argument("--model_dir", required=True, help="Directory produced by src/training/train.py")
+    parser.add_argument("--label_col", default="label", help="Label column name")
+    parser.add_argument("--batch_sizes", default="1,100", help="Comma-separated rows per request")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per round and setting")
+    parser.add_argument("--rounds", type=int, default=20, help="Alternating off/on rounds per batch size")
+    parser.add_argument(
+        "--load",
+        type=float,
+        default=0.5,
+        help="Share of wall time spent scoring in the latency rounds (1 runs requests back to back)",
+    )
+    parser.add_argument("--rotate_rows", type=int, default=20000, help="Rows per Parquet file")
+    parser.add_argument("--nice", type=int, default=WRITER_NICE, help="Niceness of the writer process")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Relative p99 increase beyond the measured noise treated as a regression")
+    parser.add_argument("--output", default=None, help="Optional path to write results as JSON")
+    args = parser.parse_args()
+
+    os.environ["AZUREML_MODEL_DIR"] = args.model_dir
+    import score
+
+    score.init()
+    sample = pd.read_parquet(Path(args.model_dir) / "test.parquet").drop(columns=[args.label_col], errors="ignore")
+    sample = sample[score.FEATURE_COLUMNS]
+
+    report = {"cases": [], "backpressure": []}
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        log = PredictionLog(directory, score.FEATURE_COLUMNS, rotate_rows=args.rotate_rows, nice=args.nice)
+        expected = []
+        for n_rows in [int(size) for size in args.batch_sizes.split(",")]:
+            rows = sample.sample(n=n_rows, replace=True, random_state=n_rows).reset_index(drop=True)
+            payload = json.dumps({"columns": list(rows.columns), "data": rows.values.tolist()})
+            response = score.run(payload)
+            off, on = ([], []), []
+            # Alternating rounds so drift in machine load hits both settings
+            # alike; odd and even "off" rounds against each other give the noise
+            for round_index in range(args.rounds):
+                score.PREDICTION_LOG = None
+                off[round_index % 2].extend(latencies_ms(score, payload, args.requests, args.load))
+                score.PREDICTION_LOG = log
+                on += latencies_ms(score, payload, args.requests, args.load)
+            score.PREDICTION_LOG = None
+            expected.append((args.rounds * args.requests, response["probabilities"]))
+
+            case = {"rows": n_rows, "off": percentiles(off[0] + off[1]), "on": percentiles(on)}
+            case["p99_change"] = round(case["on"]["p99_ms"] / case["off"]["p99_ms"] - 1.0, 4)
+            case["p99_noise"] = round(abs(np.percentile(off[1], 99) / np.percentile(off[0], 99) - 1.0), 4)
+            report["cases"].append(case)
+            print(
+                f"rows={n_rows:>5} off p50={case['off']['p50_ms']:.3f}ms p99={case['off']['p99_ms']:.3f}ms | "
+                f"on p50={case['on']['p50_ms']:.3f}ms p99={case['on']['p99_ms']:.3f}ms "
+                f"({case['p99_change']:+.1%}, off-vs-off noise {case['p99_noise']:.1%})"
+            )
+            if case["p99_change"] > args.tolerance + case["p99_noise"]:
+                failures.append(f"rows={n_rows} p99 {case['p99_change']:+.1%}")
+
+        log.close()
+        stats = log.stats()
+        import pyarrow.parquet as pq
+
+        files = sorted(Path(directory).glob("*.parquet"))
+        table = pq.read_table(files) if files else None
+        probabilities = table.column("probability").to_numpy() if table is not None else np.array([])
+        offset = 0
+        for requests, probs in expected:
+            chunk = probabilities[offset : offset + requests * len(probs)]
+            if len(chunk) != requests * len(probs) or not np.array_equal(np.round(chunk, 6), np.tile(probs, requests)):
+                failures.append("logged probabilities differ from the responses")
+                break
+            offset += len(chunk)
+        report["log"] = dict(stats, parquet_files=len(files), parquet_rows=len(probabilities))
+        report["log"]["bytes_per_row"] = round(sum(path.stat().st_size for path in files) / max(len(probabilities), 1), 2)
+        print(
+            f"logged={stats['logged_rows']} written={stats['written_rows']} dropped={stats['dropped_rows']} "
+            f"files={len(files)} rows_read_back={len(probabilities)} bytes/row={report['log']['bytes_per_row']}"
+        )
+        # The log is an audit trail: at the default policy every scored row must reach a file
+        if stats["dropped_rows"] or stats["failed_rows"] or len(probabilities) != stats["logged_rows"]:
+            failures.append("rows were dropped or lost at normal load")
+
+    X = sample.sample(n=100, replace=True, random_state=0).to_numpy(dtype=np.float32)
+    for policy in ("drop", "block"):
+        with tempfile.TemporaryDirectory() as directory:
+            log = PredictionLog(directory, score.FEATURE_COLUMNS, capacity_rows=1000, policy=policy, flush_rows=1000, nice=args.nice)
+            seconds = flood(log, X, threads=4, batches=500)
+            stats = log.stats()
+            written = sum(pq.ParquetFile(path).metadata.num_rows for path in Path(directory).glob("*.parquet"))
+        row = {
+            "policy": policy,
+            "offered_rows": 4 * 500 * len(X),
+            "logged_rows": stats["logged_rows"],
+            "dropped_rows": stats["dropped_rows"],
+            "written_rows": written,
+            "blocked_ms": round(stats["blocked_ms"], 1),
+            "seconds": round(seconds, 3),
+        }
+        report["backpressure"].append(row)
+        print(
+            f"policy={policy:<5} offered={row['offered_rows']} logged={row['logged_rows']} dropped={row['dropped_rows']} "
+            f"written={row['written_rows']} blocked={row['blocked_ms']:.1f}ms in {row['seconds']:.3f}s"
+        )
+        if row["logged_rows"] + row["dropped_rows"] != row["offered_rows"] or row["written_rows"] != row["logged_rows"]:
+            failures.append(f"policy={policy} row accounting does not add up")
+        if policy == "block" and row["dropped_rows"]:
+            failures.append("policy=block dropped rows")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    if failures:
+        raise SystemExit("; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
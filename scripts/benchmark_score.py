@@ -0,0 +1,203 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+INFERENCE_DIR = ROOT / "src" / "inference"
+sys.path.insert(0, str(INFERENCE_DIR))
+
+COLD_START_SNIPPET = """
+import json, os, resource, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {inference_dir!r})
+import score
+imported = time.perf_counter()
+score.init()
+loaded = time.perf_counter()
+print(json.dumps({{
+    "import_seconds": imported - start,
+    "init_seconds": loaded - imported,
+    "load_seconds": score.COLD_START["load_ms"] / 1000.0,
+    "warmup_seconds": score.COLD_START["warmup_ms"] / 1000.0,
+    "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}}))
+"""
+
+# Which way is better for each per-case metric checked by --compare
+METRIC_DIRECTIONS = {
+    "p50_ms": "lower",
+    "p95_ms": "lower",
+    "p99_ms": "lower",
+    "rows_per_sec": "higher",
+}
+
+
+def build_payload(rows: pd.DataFrame, shape: str) -> str:
+    if shape == "records":
+        return json.dumps({"data": rows.to_dict(orient="records")})
+    if shape == "columnar":
+        return json.dumps({"columns": list(rows.columns), "data": rows.values.tolist()})
+    if shape == "rows":
+        return json.dumps({"data": rows.values.tolist()})
+    raise ValueError(f"Unknown payload shape: {shape}")
+
+
+def measure_cold_start(model_dir: Path, repeats: int) -> dict:
+    env = dict(os.environ, AZUREML_MODEL_DIR=str(model_dir))
+    runs = []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, "-c", COLD_START_SNIPPET.format(inference_dir=str(INFERENCE_DIR))],
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {key: float(np.median([run[key] for run in runs])) for key in runs[0]}
+
+
+def measure_case(score, payload: str, n_rows: int, threads: int, requests: int) -> dict:
+    per_thread = max(1, requests // threads)
+    latencies = [[] for _ in range(threads)]
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(index: int) -> None:
+        barrier.wait()
+        for _ in range(per_thread):
+            start = time.perf_counter()
+            score.run(payload)
+            latencies[index].append(time.perf_counter() - start)
+
+    for _ in range(3):
+        score.run(payload)
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.concatenate(latencies) * 1000.0
+    return {
+        "requests": int(latencies_ms.size),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 4),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 4),
+        "rows_per_sec": round(latencies_ms.size * n_rows / elapsed, 1),
+    }
+
+
+def case_key(case: dict) -> tuple:
+    return (case["shape"], case["rows"], case["threads"])
+
+
+def compare_reports(baseline: dict, current: dict, tolerance: float) -> list:
+    regressions = []
+    baseline_cases = {case_key(case): case for case in baseline["cases"]}
+    for case in current["cases"]:
+        before = baseline_cases.get(case_key(case))
+        if before is None:
+            continue
+        for metric, direction in METRIC_DIRECTIONS.items():
+            old, new = before[metric], case[metric]
+            if old <= 0:
+                continue
+            change = (new - old) / old
+            worse = change > tolerance if direction == "lower" else change < -tolerance
+            label = f"shape={case['shape']} rows={case['rows']} threads={case['threads']} {metric}"
+            print(f"{label:<58} {old:>12.4f} -> {new:>12.4f} ({change:+.1%}){'  REGRESSION' if worse else ''}")
+            if worse:
+                regressions.append(label)
+    for metric in ("import_seconds", "init_seconds", "load_seconds", "warmup_seconds"):
+        if metric not in baseline["cold_start"]:
+            continue
+        old, new = baseline["cold_start"][metric], current["cold_start"][metric]
+        change = (new - old) / old if old > 0 else 0.0
+        worse = change > tolerance
+        print(f"{'cold_start ' + metric:<58} {old:>12.4f} -> {new:>12.4f} ({change:+.1%}){'  REGRESSION' if worse else ''}")
+        if worse:
+            regressions.append(f"cold_start {metric}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark score.init/score.run in-process and compare runs.")
+    parser.add_argument("--model_dir", required=True, help="Directory produced by src/training/train.py")
+    parser.add_argument("--label_col", default="label", help="Label column name")
+    parser.add_argument("--batch_sizes", default="1,10,100,1000", help="Comma-separated rows per request")
+    parser.add_argument("--shapes", default="records,columnar", help="Payload shapes: records, columnar, rows")
+    parser.add_argument("--threads", default="1,4", help="Comma-separated client thread counts")
+    parser.add_argument("--rows_budget", type=int, default=20000, help="Approximate rows scored per case")
+    parser.add_argument("--max_requests", type=int, default=500, help="Upper bound on requests per case")
+    parser.add_argument("--cold_start_repeats", type=int, default=3, help="Fresh processes used for cold start")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this path")
+    parser.add_argument("--compare", default=None, help="Baseline JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Relative change treated as a regression")
+    args = parser.parse_args()
+
+    model_dir = Path(args.model_dir)
+    os.environ["AZUREML_MODEL_DIR"] = str(model_dir)
+    cold_start = measure_cold_start(model_dir, args.cold_start_repeats)
+
+    import score
+
+    score.init()
+    sample = pd.read_parquet(model_dir / "test.parquet").drop(columns=[args.label_col], errors="ignore")
+
+    cases = []
+    for shape in args.shapes.split(","):
+        for n_rows in [int(size) for size in args.batch_sizes.split(",")]:
+            rows = sample.sample(n=n_rows, replace=True, random_state=n_rows).reset_index(drop=True)
+            payload = build_payload(rows, shape)
+            requests = max(10, min(args.max_requests, args.rows_budget // n_rows))
+            for threads in [int(count) for count in args.threads.split(",")]:
+                case = {"shape": shape, "rows": n_rows, "threads": threads}
+                case.update(measure_case(score, payload, n_rows, threads, requests))
+                cases.append(case)
+                print(
+                    f"shape={shape:<8} rows={n_rows:>6} threads={threads:>2} p50={case['p50_ms']:>9.3f}ms "
+                    f"p95={case['p95_ms']:>9.3f}ms p99={case['p99_ms']:>9.3f}ms rows/s={case['rows_per_sec']:>12,.0f}"
+                )
+
+    report = {
+        "model_dir": str(model_dir),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "settings": {
+            name: os.environ[name] for name in sorted(os.environ) if name.startswith("SCORING_")
+        },
+        "cold_start": cold_start,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "cases": cases,
+    }
+    print(
+        f"cold_start import={cold_start['import_seconds'] * 1000:.1f}ms init={cold_start['init_seconds'] * 1000:.1f}ms "
+        f"(load={cold_start['load_seconds'] * 1000:.1f}ms warmup={cold_start['warmup_seconds'] * 1000:.1f}ms) "
+        f"peak_rss={cold_start['peak_rss_kb']:,.0f}kB; suite peak_rss={report['peak_rss_kb']:,}kB"
+    )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare_reports(baseline, report, args.tolerance)
+        if regressions:
+            raise SystemExit(f"{len(regressions)} metric(s) regressed beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
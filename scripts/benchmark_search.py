@@ -0,0 +1,126 @@
+import argparse
+import json
+import sys
+import warnings
+from pathlib import Path
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src" / "training"))
+
+from dataset import load_training_frame  # noqa: E402
+from search import HALVING_RESOURCES, PARAM_GRID, build_search, run_search  # noqa: E402
+
+
+def grid_key(params: dict) -> tuple:
+    # Halving over trees ends on the largest forest in the grid; a winner from a
+    # shorter schedule is scored as the nearest tree count the grid has
+    params = dict(params)
+    if "model__n_estimators" in params:
+        params["model__n_estimators"] = min(
+            PARAM_GRID["model__n_estimators"], key=lambda trees: abs(trees - params["model__n_estimators"])
+        )
+    return tuple(sorted(params.items(), key=lambda item: item[0]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Wall time and winner of the train.py grid vs its warm-start and successive-halving searches.")
+    parser.add_argument("--data_path", required=True, help="Gold dataset (file or folder)")
+    parser.add_argument("--label_col", default="label", help="Label column name")
+    parser.add_argument("--rows", type=int, default=10000, help="Stratified sample of rows to search on (0 keeps all)")
+    parser.add_argument("--random_state", type=int, default=42, help="Random seed")
+    parser.add_argument("--factor", type=float, default=3, help="Halving factor")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.005,
+        help="Largest allowed gap between the grid's best CV ROC-AUC and its score for the halving winner",
+    )
+    parser.add_argument(
+        "--searches",
+        default="grid,warm_grid,halving:n_samples,halving:n_estimators",
+        help="Comma-separated searches to run; grid always runs first as the reference",
+    )
+    parser.add_argument("--output", default=None, help="Optional path to write results as JSON")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore", category=UserWarning)
+
+    X, y = load_training_frame(Path(args.data_path), args.label_col)
+    if args.rows and args.rows < len(X):
+        X, _, y, _ = train_test_split(X, y, train_size=args.rows, random_state=args.random_state, stratify=y)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=args.random_state, stratify=y)
+    base_model = Pipeline(
+        steps=[
+            ("imputer", SimpleImputer(strategy="median")),
+            ("model", RandomForestClassifier(random_state=args.random_state)),
+        ]
+    )
+
+    searches = ["grid"] + [name for name in args.searches.split(",") if name != "grid"]
+    rows = []
+    failures = []
+    for name in searches:
+        strategy, _, resource = name.partition(":")
+        if strategy == "halving" and resource not in HALVING_RESOURCES:
+            raise SystemExit(f"Unknown halving resource in {name!r}, expected one of {HALVING_RESOURCES}")
+        search = build_search(
+            base_model,
+            strategy,
+            random_state=args.random_state,
+            resource=resource or "n_samples",
+            factor=args.factor,
+        )
+        summary = run_search(search, X_train, y_train)
+        row = {
+            "search": name,
+            "seconds": round(summary["seconds"], 2),
+            "fits": summary["fits"],
+            "best_params": summary["best_params"],
+            "cv_best_roc_auc": round(summary["best_score"], 6),
+            "test_roc_auc": round(roc_auc_score(y_test, search.best_estimator_.predict_proba(X_test)[:, 1]), 6),
+        }
+        note = ""
+        if "n_resources" in summary:
+            row["schedule"] = list(zip(summary["n_candidates"], summary["n_resources"]))
+            note = f"schedule={row['schedule']}"
+        if strategy == "grid":
+            grid = search
+            results = search.cv_results_
+            grid_scores = {grid_key(params): score for params, score in zip(results["params"], results["mean_test_score"])}
+            grid_best = max(grid_scores.values())
+        if strategy == "warm_grid":
+            # Growing forests with warm_start must reproduce the grid bit for bit
+            splits = [key for key in grid.cv_results_ if key.startswith("split") and key.endswith("_test_score")]
+            row["identical"] = bool(
+                search.cv_results_["params"] == grid.cv_results_["params"]
+                and all(np.array_equal(search.cv_results_[key], grid.cv_results_[key]) for key in splits)
+                and np.array_equal(search.best_estimator_.predict_proba(X_test), grid.best_estimator_.predict_proba(X_test))
+            )
+            note = f"identical={row['identical']}"
+            if not row["identical"]:
+                failures.append(f"{name} differs from grid")
+        # How much CV ROC-AUC the exhaustive grid gives up with this winner
+        row["regret"] = round(grid_best - grid_scores[grid_key(summary["best_params"])], 6)
+        rows.append(row)
+        print(
+            f"search={row['search']:<21} time={row['seconds']:>8.2f}s fits={row['fits']:>3} "
+            f"cv_roc_auc={row['cv_best_roc_auc']:.4f} test_roc_auc={row['test_roc_auc']:.4f} "
+            f"regret={row['regret']:.4f} best={row['best_params']} {note}"
+        )
+        if row["regret"] > args.tolerance:
+            failures.append(f"{name} winner is {row['regret']:.4f} CV ROC-AUC below the grid's best")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(rows, indent=2) + "\n", encoding="utf-8")
+    if failures:
+        raise SystemExit("; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src" / "inference"))
+
+from drift import DRIFT_PROFILE_FILE, PSI_ALERT, build_profile, compare_profiles, load_profile, merge_profiles  # noqa: E402
+
+
+def read_profile(path: Path, feature_names, label_col: str) -> dict:
+    # A saved profile, a GET /score?drift response, or gold parquet data to profile
+    if path.is_dir() and (path / DRIFT_PROFILE_FILE).exists():
+        path = path / DRIFT_PROFILE_FILE
+    if path.suffix == ".json":
+        profile = load_profile(path)
+        return profile["snapshot"] if "snapshot" in profile else profile
+    files = sorted(path.glob("*.parquet")) if path.is_dir() else [path]
+    if not files:
+        raise FileNotFoundError(f"No profile or parquet files found at {path}")
+    df = pd.concat([pd.read_parquet(file) for file in files], ignore_index=True)
+    df = df.drop(columns=[label_col], errors="ignore").apply(pd.to_numeric, errors="coerce")
+    return build_profile(df, feature_names)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="PSI/KS drift of scored inputs against the training profile.")
+    parser.add_argument("--reference", required=True, help="Model directory or drift_profile.json written by train.py")
+    parser.add_argument(
+        "--current",
+        required=True,
+        nargs="+",
+        help="Snapshots (score.drift_snapshot() or GET /score?drift JSON) or parquet files/folders; several are merged",
+    )
+    parser.add_argument("--label_col", default="label", help="Label column dropped from parquet inputs")
+    parser.add_argument("--psi_alert", type=float, default=PSI_ALERT, help="Exit non-zero when any feature reaches this PSI")
+    parser.add_argument("--output", default=None, help="Optional path to write the report as JSON")
+    args = parser.parse_args()
+
+    reference = read_profile(Path(args.reference), None, args.label_col)
+    feature_names = list(reference["features"])
+    current = merge_profiles(read_profile(Path(path), feature_names, args.label_col) for path in args.current)
+    report = compare_profiles(reference, current)
+
+    print(f"reference_rows={report['reference_rows']} current_rows={report['current_rows']}")
+    for name, entry in sorted(report["features"].items(), key=lambda item: -(item[1]["psi"] or 0.0)):
+        if entry["psi"] is None:
+            print(f"{name:<24} {entry['kind']:<10} missing from the current snapshot")
+            continue
+        print(f"{name:<24} {entry['kind']:<10} psi={entry['psi']:>8.4f} ks={entry['ks']:.4f} {entry['level']}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    drifted = [name for name, entry in report["features"].items() if entry["psi"] is not None and entry["psi"] >= args.psi_alert]
+    if drifted:
+        raise SystemExit(f"Drift at PSI >= {args.psi_alert:g} in: {', '.join(sorted(drifted))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import json
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from forest import FOREST_FILE, compile_forest, load_forest
+
+MODEL_FILE = "model.joblib"
+ONNX_FILE = "model.onnx"
+ONNX_PARITY_ATOL = 1e-5
+
+
+class OnnxModel:
+    # onnxruntime session over the exported pipeline graph. Tree ensembles run
+    # in float32 there, so probabilities match sklearn to ~1e-6, not bit for bit
+
+    def __init__(self, path: Path, threads: int = 0):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.classes_ = np.asarray(json.loads(metadata["classes"]))
+        self.feature_names = json.loads(metadata["feature_names"])
+        self.n_features = self.session.get_inputs()[0].shape[1]
+
+    def predict_proba(self, X) -> np.ndarray:
+        if hasattr(X, "columns"):
+            if self.feature_names is not None and [str(name) for name in X.columns] != self.feature_names:
+                X = X[self.feature_names]
+            X = X.to_numpy()
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        proba = self.session.run(["probabilities"], {self.input_name: X})[0]
+        return proba.astype(np.float64)
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+def _feature_columns(model):
+    feature_names = getattr(model, "feature_names_in_", None)
+    return [str(name) for name in feature_names] if feature_names is not None else None
+
+
+def load_sklearn(model_dir: Path, mmap: bool = True):
+    model_path = model_dir / MODEL_FILE
+    if not model_path.exists():
+        raise FileNotFoundError(f"Model not found at {model_path}")
+    model = joblib.load(model_path)
+    return model, _feature_columns(model)
+
+
+def load_compiled(model_dir: Path, mmap: bool = True):
+    forest_path = model_dir / FOREST_FILE
+    if forest_path.exists():
+        # Memory-mapped sidecar written by train.py, shared across workers
+        model = load_forest(forest_path, mmap=mmap)
+        return model, model.feature_names
+    model, feature_columns = load_sklearn(model_dir)
+    try:
+        return compile_forest(model), feature_columns
+    except TypeError:
+        # Unsupported pipeline shape, keep scoring with sklearn
+        return model, feature_columns
+
+
+def load_onnx(model_dir: Path, mmap: bool = True):
+    onnx_path = model_dir / ONNX_FILE
+    if not onnx_path.exists():
+        raise FileNotFoundError(f"ONNX graph not found at {onnx_path}, export it with train.py --export_onnx")
+    model = OnnxModel(onnx_path)
+    return model, model.feature_names
+
+
+BACKENDS = {
+    "sklearn": load_sklearn,
+    "compiled": load_compiled,
+    "onnx": load_onnx,
+}
+
+
+def load_backend(engine: str, model_dir: Path, mmap: bool = True):
+    if engine not in BACKENDS:
+        raise ValueError(f"Unknown scoring engine {engine!r}, expected one of {sorted(BACKENDS)}")
+    return BACKENDS[engine](Path(model_dir), mmap)
+
+
+def export_onnx(model, X, path: Path) -> Path:
+    from skl2onnx import to_onnx
+
+    X = np.ascontiguousarray(np.asarray(X)[:1], dtype=np.float32)
+    graph = to_onnx(model, X, options={"zipmap": False}, target_opset={"": 17, "ai.onnx.ml": 3})
+    for key, value in (("classes", model.classes_.tolist()), ("feature_names", _feature_columns(model))):
+        entry = graph.metadata_props.add()
+        entry.key = key
+        entry.value = json.dumps(value)
+    Path(path).write_bytes(graph.SerializeToString())
+    return Path(path)
+
+
+def check_onnx_parity(model, path: Path, X, atol: float = ONNX_PARITY_ATOL) -> float:
+    # Largest absolute probability difference against sklearn on X
+    deviation = float(np.abs(OnnxModel(path).predict_proba(X) - model.predict_proba(X)).max())
+    if deviation > atol:
+        raise ValueError(f"ONNX export deviates from sklearn by {deviation:.3g} (> {atol:g})")
+    return deviation
@@ -0,0 +1,106 @@
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+
+import numpy as np
+
+
+@dataclass
+class _Pending:
+    X: np.ndarray
+    future: Future = field(default_factory=Future)
+    enqueued: float = field(default_factory=time.perf_counter)
+
+
+class MicroBatcher:
+    # Coalesces concurrent requests into one score_fn call. A batch closes when
+    # max_wait_ms has passed since its first request or max_batch_rows is reached.
+
+    def __init__(self, score_fn, max_wait_ms: float = 2.0, max_batch_rows: int = 256):
+        if max_wait_ms < 0 or max_batch_rows < 1:
+            raise ValueError("max_wait_ms must be >= 0 and max_batch_rows >= 1")
+        self.score_fn = score_fn
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch_rows = max_batch_rows
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+        self._worker = threading.Thread(target=self._loop, name="score-micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, X: np.ndarray):
+        pending = _Pending(X)
+        self._queue.put(pending)
+        return pending.future.result()
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            self._batches = 0
+            self._requests = 0
+            self._rows = 0
+            self._queue_wait = 0.0
+            self._score_time = 0.0
+            self._requests_per_batch = Counter()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            batches = max(self._batches, 1)
+            requests = max(self._requests, 1)
+            return {
+                "max_wait_ms": self.max_wait * 1000.0,
+                "max_batch_rows": self.max_batch_rows,
+                "batches": self._batches,
+                "requests": self._requests,
+                "rows": self._rows,
+                "mean_requests_per_batch": self._requests / batches,
+                "mean_rows_per_batch": self._rows / batches,
+                "mean_queue_wait_ms": self._queue_wait / requests * 1000.0,
+                "mean_batch_score_ms": self._score_time / batches * 1000.0,
+                "requests_per_batch": dict(sorted(self._requests_per_batch.items())),
+            }
+
+    def _collect(self) -> list:
+        first = self._queue.get()
+        batch = [first]
+        rows = len(first.X)
+        deadline = first.enqueued + self.max_wait
+        while rows < self.max_batch_rows:
+            timeout = deadline - time.perf_counter()
+            try:
+                # Past the deadline, still take whatever is already queued
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            rows += len(item.X)
+        return batch
+
+    def _loop(self) -> None:
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            try:
+                X = batch[0].X if len(batch) == 1 else np.concatenate([item.X for item in batch])
+                preds, probs = self.score_fn(X)
+            except Exception as exc:
+                for item in batch:
+                    item.future.set_exception(exc)
+                continue
+            finished = time.perf_counter()
+
+            offset = 0
+            for item in batch:
+                end = offset + len(item.X)
+                item.future.set_result((preds[offset:end], probs[offset:end]))
+                offset = end
+
+            with self._stats_lock:
+                self._batches += 1
+                self._requests += len(batch)
+                self._rows += offset
+                self._queue_wait += sum(started - item.enqueued for item in batch)
+                self._score_time += finished - started
+                self._requests_per_batch[len(batch)] += 1
@@ -0,0 +1,243 @@
+import copy
+import json
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from lookup import GOLD_DOMAIN
+
+DRIFT_PROFILE_FILE = "drift_profile.json"
+SKETCH_K = 256
+FOLD_ROWS = 4096
+# Conventional PSI reading: below 0.1 stable, 0.1-0.25 moderate, above 0.25 drifted
+PSI_WARN = 0.1
+PSI_ALERT = 0.25
+PSI_EPSILON = 1e-4
+
+
+def feature_domains(feature_names, domain=GOLD_DOMAIN) -> dict:
+    # Sorted values each gold feature can take; one-hot flags are 0 or 1.
+    # Features without a known domain are left out and sketched as continuous
+    domains = {}
+    for columns, values in domain:
+        for column in columns:
+            domains[column] = [0.0, 1.0] if values == "one_hot" else sorted(float(value) for value in values)
+    return {name: domains[name] for name in feature_names if name in domains}
+
+
+class QuantileSketch:
+    # KLL-style compactor stack: level i holds items that each stand for 2**i
+    # inputs. A level over k items is sorted and every other item, from a
+    # random offset, moves up a level, so memory stays O(k log(n / k)) and
+    # rank error O(log(n / k) / k). Updates take whole arrays at a time.
+
+    def __init__(self, k: int = SKETCH_K, seed: int = 0):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values: np.ndarray) -> None:
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        level = 0
+        while level < len(self.levels) and len(self.levels[level]) > self.k:
+            items = np.sort(self.levels[level])
+            even = len(items) - len(items) % 2
+            self.levels[level] = items[even:]
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], items[self._rng.integers(2) : even : 2]])
+            level += 1
+
+    def to_dict(self) -> dict:
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2**level) for level, items in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        return {"items": items[order].tolist(), "weights": weights[order].astype(int).tolist()}
+
+
+class DriftSketch:
+    # Constant-memory per-feature summaries of the rows scored so far: counts
+    # over the known discrete domain (plus out-of-domain and missing) and a
+    # quantile sketch for everything else. update() only queues the batch;
+    # queued rows are folded in vectorised every fold_rows rows and before
+    # snapshot(), whose output has the same layout as the training profile
+
+    def __init__(self, feature_names, domains=None, k: int = SKETCH_K, fold_rows: int = FOLD_ROWS):
+        self.feature_names = list(feature_names)
+        self.domains = feature_domains(self.feature_names) if domains is None else dict(domains)
+        self.fold_rows = fold_rows
+        self.rows = 0
+        self._values = {name: np.asarray(values, dtype=np.float64) for name, values in self.domains.items()}
+        # Last two slots count out-of-domain and missing values
+        self._counts = {name: np.zeros(len(values) + 2, dtype=np.int64) for name, values in self._values.items()}
+        self._sketches = {name: QuantileSketch(k) for name in self.feature_names if name not in self._values}
+        self._missing = {name: 0 for name in self._sketches}
+        self._pending = []
+        self._pending_rows = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_profile(cls, profile: dict, k: int = SKETCH_K, fold_rows: int = FOLD_ROWS) -> "DriftSketch":
+        # Same features and discrete buckets as a saved profile, so the two compare bucket for bucket
+        features = profile["features"]
+        domains = {name: spec["values"] for name, spec in features.items() if spec["kind"] == "discrete"}
+        return cls(list(features), domains, k, fold_rows)
+
+    def update(self, X) -> None:
+        with self._lock:
+            self._pending.append(X)
+            self._pending_rows += len(X)
+            if self._pending_rows >= self.fold_rows:
+                self._fold()
+
+    def _fold(self) -> None:
+        pending, self._pending, self._pending_rows = self._pending, [], 0
+        if not pending:
+            return
+        arrays = []
+        for X in pending:
+            if hasattr(X, "columns"):
+                X = X[self.feature_names].to_numpy()
+            arrays.append(np.asarray(X, dtype=np.float64))
+        X = np.concatenate(arrays)
+        self.rows += len(X)
+        for index, name in enumerate(self.feature_names):
+            column = X[:, index]
+            missing = np.isnan(column)
+            if name in self._values:
+                values = self._values[name]
+                position = np.minimum(np.searchsorted(values, column), len(values) - 1)
+                slot = np.where(values[position] == column, position, np.where(missing, len(values) + 1, len(values)))
+                self._counts[name] += np.bincount(slot, minlength=len(values) + 2)
+            else:
+                self._missing[name] += int(missing.sum())
+                self._sketches[name].update(column[~missing])
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._fold()
+            features = {}
+            for name in self.feature_names:
+                if name in self._values:
+                    counts = self._counts[name]
+                    features[name] = {
+                        "kind": "discrete",
+                        "values": self._values[name].tolist(),
+                        "counts": counts[:-2].tolist(),
+                        "other": int(counts[-2]),
+                        "missing": int(counts[-1]),
+                    }
+                else:
+                    features[name] = {"kind": "continuous", "missing": self._missing[name], **self._sketches[name].to_dict()}
+            return {"rows": self.rows, "features": features}
+
+
+def build_profile(X, feature_names=None, k: int = SKETCH_K) -> dict:
+    feature_names = [str(name) for name in X.columns] if feature_names is None else list(feature_names)
+    sketch = DriftSketch(feature_names, k=k, fold_rows=max(len(X), 1))
+    sketch.update(X)
+    return sketch.snapshot()
+
+
+def save_profile(profile: dict, path: Path) -> Path:
+    Path(path).write_text(json.dumps(profile) + "\n", encoding="utf-8")
+    return Path(path)
+
+
+def load_profile(path: Path) -> dict:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def merge_profiles(profiles) -> dict:
+    # Snapshots from several workers: counts add up, sketch items pool
+    profiles = list(profiles)
+    merged = {"rows": sum(profile["rows"] for profile in profiles), "features": {}}
+    for profile in profiles:
+        for name, spec in profile["features"].items():
+            target = merged["features"].get(name)
+            if target is None:
+                merged["features"][name] = copy.deepcopy(spec)
+                continue
+            if target["kind"] != spec["kind"]:
+                raise ValueError(f"Feature {name} is {target['kind']} in one profile and {spec['kind']} in another")
+            target["missing"] += spec["missing"]
+            if spec["kind"] == "discrete":
+                counts = dict(zip(target["values"], target["counts"]))
+                for value, count in zip(spec["values"], spec["counts"]):
+                    counts[value] = counts.get(value, 0) + count
+                target["values"] = sorted(counts)
+                target["counts"] = [counts[value] for value in target["values"]]
+                target["other"] += spec["other"]
+            else:
+                items = np.concatenate([target["items"], spec["items"]])
+                weights = np.concatenate([target["weights"], spec["weights"]])
+                order = np.argsort(items, kind="stable")
+                target["items"], target["weights"] = items[order].tolist(), weights[order].astype(int).tolist()
+    return merged
+
+
+def _psi(reference: np.ndarray, current: np.ndarray) -> float:
+    reference = np.maximum(reference / max(reference.sum(), 1), PSI_EPSILON)
+    current = np.maximum(current / max(current.sum(), 1), PSI_EPSILON)
+    return float(np.sum((current - reference) * np.log(current / reference)))
+
+
+def _weighted_cdf(items: np.ndarray, weights: np.ndarray, points: np.ndarray) -> np.ndarray:
+    cumulative = np.concatenate([[0.0], np.cumsum(weights)])
+    total = cumulative[-1]
+    if total == 0:
+        return np.zeros(len(points))
+    return cumulative[np.searchsorted(items, points, side="right")] / total
+
+
+def _compare_discrete(reference: dict, current: dict) -> tuple:
+    values = sorted(set(reference["values"]) | set(current["values"]))
+
+    def buckets(spec: dict) -> np.ndarray:
+        counts = dict(zip(spec["values"], spec["counts"]))
+        return np.asarray([counts.get(value, 0) for value in values] + [spec["other"], spec["missing"]], dtype=np.float64)
+
+    ref, cur = buckets(reference), buckets(current)
+    # KS over the ordered domain; out-of-domain and missing only enter the PSI
+    ks = np.abs(np.cumsum(ref[:-2]) / max(ref.sum(), 1) - np.cumsum(cur[:-2]) / max(cur.sum(), 1))
+    return _psi(ref, cur), float(ks.max()) if len(ks) else 0.0
+
+
+def _compare_continuous(reference: dict, current: dict) -> tuple:
+    ref_items, ref_weights = np.asarray(reference["items"], dtype=np.float64), np.asarray(reference["weights"], dtype=np.float64)
+    cur_items, cur_weights = np.asarray(current["items"], dtype=np.float64), np.asarray(current["weights"], dtype=np.float64)
+    # PSI over the reference deciles, with missing values as an extra bucket
+    cumulative = np.cumsum(ref_weights)
+    edges = np.unique(ref_items[np.searchsorted(cumulative, cumulative[-1] * np.arange(1, 10) / 10.0)]) if len(ref_items) else np.empty(0)
+
+    def buckets(items, weights, missing) -> np.ndarray:
+        cdf = np.concatenate([[0.0], _weighted_cdf(items, weights, edges), [1.0]]) * weights.sum()
+        return np.append(np.diff(cdf), missing)
+
+    ref = buckets(ref_items, ref_weights, reference["missing"])
+    cur = buckets(cur_items, cur_weights, current["missing"])
+    points = np.union1d(ref_items, cur_items)
+    ks = np.abs(_weighted_cdf(ref_items, ref_weights, points) - _weighted_cdf(cur_items, cur_weights, points))
+    return _psi(ref, cur), float(ks.max()) if len(ks) else 0.0
+
+
+def compare_profiles(reference: dict, current: dict) -> dict:
+    features = {}
+    for name, ref in reference["features"].items():
+        cur = current["features"].get(name)
+        if cur is None or cur["kind"] != ref["kind"]:
+            features[name] = {"kind": ref["kind"], "psi": None, "ks": None}
+            continue
+        compare = _compare_discrete if ref["kind"] == "discrete" else _compare_continuous
+        psi, ks = compare(ref, cur)
+        level = "alert" if psi >= PSI_ALERT else "warn" if psi >= PSI_WARN else "ok"
+        features[name] = {"kind": ref["kind"], "psi": round(psi, 6), "ks": round(ks, 6), "level": level}
+    scores = [entry["psi"] for entry in features.values() if entry["psi"] is not None]
+    return {
+        "reference_rows": reference["rows"],
+        "current_rows": current["rows"],
+        "max_psi": max(scores) if scores else None,
+        "drifted": sorted(name for name, entry in features.items() if entry.get("level") == "alert"),
+        "features": features,
+    }
@@ -0,0 +1,306 @@
+import threading
+from dataclasses import dataclass, fields
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+FOREST_FILE = "forest.joblib"
+ROW_CHUNK_SIZE = 512
+
+
+@dataclass
+class CompiledForest:
+    # Node arrays are concatenated across trees with global indices. Siblings
+    # are stored next to each other (right == left + 1) and leaves point at
+    # themselves with an infinite threshold, so every row can walk max_depth
+    # steps without branching. Thresholds are float32 rounded down, which keeps
+    # x > threshold identical to sklearn's float64 comparison for float32 x
+    feature: np.ndarray
+    threshold: np.ndarray
+    left: np.ndarray
+    value: np.ndarray
+    roots: np.ndarray
+    medians: np.ndarray
+    classes_: np.ndarray
+    max_depth: int
+    feature_names: list | None = None
+
+    @property
+    def n_estimators(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_features(self) -> int:
+        return len(self.medians)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.feature, self.threshold, self.left, self.value, self.roots, self.medians)
+        return sum(array.nbytes for array in arrays)
+
+    def _prepare(self, X) -> np.ndarray:
+        if hasattr(X, "columns"):
+            if self.feature_names is not None:
+                columns = [str(name) for name in X.columns]
+                if set(columns) != set(self.feature_names):
+                    missing = sorted(set(self.feature_names) - set(columns))
+                    unexpected = sorted(set(columns) - set(self.feature_names))
+                    raise ValueError(f"Feature mismatch: missing {missing}, unexpected {unexpected}")
+                if columns != self.feature_names:
+                    X = X[self.feature_names]
+            X = X.to_numpy()
+        X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected input with {self.n_features} features, got shape {X.shape}")
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        missing = np.isnan(X)
+        if missing.any():
+            if np.isnan(self.medians).any():
+                raise ValueError("Input contains NaN and the compiled forest has no imputer")
+            X = np.where(missing, self.medians.astype(np.float32), X)
+        return X
+
+    def _leaves(self, X: np.ndarray, roots: np.ndarray | None = None) -> np.ndarray:
+        return walk_trees(self, X, self.roots if roots is None else roots)
+
+    def predict_proba(self, X) -> np.ndarray:
+        X = self._prepare(X)
+        proba = np.empty((X.shape[0], len(self.classes_)), dtype=np.float64)
+        for start in range(0, X.shape[0], ROW_CHUNK_SIZE):
+            leaves = self._leaves(X[start : start + ROW_CHUNK_SIZE])
+            # cumsum adds tree by tree in fit order, so the sums match sklearn bit for bit
+            proba[start : start + ROW_CHUNK_SIZE] = np.cumsum(self.value[leaves], axis=0)[-1]
+        proba /= self.n_estimators
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+    def checkpoints(self, chunk_trees: int) -> np.ndarray:
+        if len(self.classes_) != 2 or chunk_trees < 1:
+            raise ValueError("Early exit needs a binary forest and chunk_trees >= 1")
+        return np.append(np.arange(chunk_trees, self.n_estimators, chunk_trees), self.n_estimators)
+
+    def early_exit_margins(self, X, chunk_trees: int, in_bag=None) -> list:
+        # Largest |p_k - p_full| of the positive class over X after the first
+        # k trees, for every checkpoint k. With in_bag (see in_bag_mask()), X
+        # is the training rows and each row only averages the trees that did
+        # not draw it, so it deviates like an unseen row rather than one the
+        # trees have fit. Fewer trees per average make those margins wider
+        X = self._prepare(X)
+        ends = self.checkpoints(chunk_trees)
+        if in_bag is not None and in_bag.shape != (self.n_estimators, X.shape[0]):
+            raise ValueError(f"Expected an in-bag mask of shape {(self.n_estimators, X.shape[0])}, got {in_bag.shape}")
+        margins = np.zeros(len(ends))
+        for start in range(0, X.shape[0], ROW_CHUNK_SIZE):
+            positive = self.value[self._leaves(X[start : start + ROW_CHUNK_SIZE]), 1]
+            if in_bag is None:
+                totals = np.cumsum(positive, axis=0)[ends - 1]
+                counts = np.broadcast_to(ends[:, None], totals.shape)
+            else:
+                out_of_bag = ~in_bag[:, start : start + ROW_CHUNK_SIZE]
+                totals = np.cumsum(np.where(out_of_bag, positive, 0.0), axis=0)[ends - 1]
+                counts = np.cumsum(out_of_bag, axis=0)[ends - 1]
+            # Rows no tree left out by a checkpoint have no estimate there
+            seen = counts > 0
+            partial = np.divide(totals, counts, out=np.zeros_like(totals), where=seen)
+            deviation = np.where(seen & seen[-1], np.abs(partial - partial[-1]), 0.0)
+            margins = np.maximum(margins, deviation.max(axis=1))
+        return margins.tolist()
+
+    def predict_proba_early(self, X, threshold: float, margins, chunk_trees: int):
+        # Adds trees chunk by chunk and stops a row once its positive
+        # probability is further than the checkpoint's margin from threshold.
+        # Rows that run to the end get exactly predict_proba's result. Returns
+        # the probabilities and the number of trees each row used
+        X = self._prepare(X)
+        ends = self.checkpoints(chunk_trees)
+        if len(margins) != len(ends):
+            raise ValueError(f"Expected {len(ends)} early exit margins, got {len(margins)}")
+        proba = np.empty((X.shape[0], len(self.classes_)), dtype=np.float64)
+        n_trees = np.empty(X.shape[0], dtype=np.intp)
+        for start in range(0, X.shape[0], ROW_CHUNK_SIZE):
+            block = X[start : start + ROW_CHUNK_SIZE]
+            totals = np.zeros((len(block), len(self.classes_)), dtype=np.float64)
+            active = np.arange(len(block), dtype=np.intp)
+            begin = 0
+            for end, margin in zip(ends, margins):
+                values = self.value[self._leaves(block[active], self.roots[begin:end])]
+                # Same tree-by-tree summation order as predict_proba
+                values[0] += totals[active]
+                totals[active] = np.cumsum(values, axis=0)[-1]
+                partial = totals[active] / end
+                done = np.abs(partial[:, 1] - threshold) > margin
+                if end == ends[-1]:
+                    done[:] = True
+                proba[start + active[done]] = partial[done]
+                n_trees[start + active[done]] = end
+                active = active[~done]
+                begin = end
+                if not active.size:
+                    break
+        return proba, n_trees
+
+
+def walk_trees(trees, X: np.ndarray, roots: np.ndarray) -> np.ndarray:
+    # Leaf reached by every row in every tree of a sibling-ordered node layout
+    # (feature, threshold, left, max_depth), see CompiledForest. Tree-major
+    # (n_trees, n_rows) so gathers from one tree stay in cache
+    n_rows = X.shape[0]
+    columns = np.ascontiguousarray(X.T).ravel()
+    rows = np.arange(n_rows, dtype=np.intp)[None, :]
+    node = np.repeat(roots[:, None], n_rows, axis=1)
+    for _ in range(trees.max_depth):
+        go_right = columns[trees.feature[node] * n_rows + rows] > trees.threshold[node]
+        node = trees.left[node] + go_right
+    return node
+
+
+class EarlyExitForest:
+    # Scores with CompiledForest.predict_proba_early and counts the trees used
+
+    def __init__(self, model: CompiledForest, threshold: float, margins, chunk_trees: int):
+        model.checkpoints(chunk_trees)
+        self.model = model
+        self.threshold = threshold
+        self.margins = np.asarray(margins, dtype=np.float64)
+        self.chunk_trees = chunk_trees
+        self.classes_ = model.classes_
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def nbytes(self) -> int:
+        return self.model.nbytes
+
+    def predict_proba(self, X) -> np.ndarray:
+        proba, n_trees = self.model.predict_proba_early(X, self.threshold, self.margins, self.chunk_trees)
+        with self._stats_lock:
+            self.rows += len(n_trees)
+            self.trees += int(n_trees.sum())
+        return proba
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            self.rows = 0
+            self.trees = 0
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "rows": self.rows,
+                "mean_trees": self.trees / max(self.rows, 1),
+                "n_estimators": self.model.n_estimators,
+                "chunk_trees": self.chunk_trees,
+            }
+
+
+def compile_forest(model) -> CompiledForest:
+    from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import Pipeline
+
+    steps = model.steps if isinstance(model, Pipeline) else [("model", model)]
+    *preprocessors, (_, estimator) = steps
+    if not isinstance(estimator, (RandomForestClassifier, ExtraTreesClassifier)):
+        raise TypeError(f"Cannot compile estimator of type {type(estimator).__name__}")
+    if estimator.n_outputs_ != 1:
+        raise TypeError("Only single-output forests can be compiled")
+
+    n_features = estimator.n_features_in_
+    medians = np.full(n_features, np.nan)
+    for name, step in preprocessors:
+        if step in (None, "passthrough"):
+            continue
+        if not isinstance(step, SimpleImputer) or step.add_indicator:
+            raise TypeError(f"Cannot compile preprocessing step '{name}' ({type(step).__name__})")
+        if step.statistics_.shape[0] != n_features or np.isnan(step.statistics_).any():
+            raise TypeError(f"Imputer '{name}' drops features and cannot be compiled")
+        medians = np.asarray(step.statistics_, dtype=np.float64)
+
+    features, thresholds, lefts, values, roots = [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for tree_estimator in estimator.estimators_:
+        tree = tree_estimator.tree_
+        order, left = _sibling_order(tree.children_left, tree.children_right)
+        is_leaf = tree.children_left[order] == -1
+        features.append(np.where(is_leaf, 0, tree.feature[order]).astype(np.intp))
+        thresholds.append(_round_down_float32(np.where(is_leaf, np.inf, tree.threshold[order])))
+        lefts.append((left + offset).astype(np.intp))
+        # Same normalisation as DecisionTreeClassifier.predict_proba
+        value = tree.value[order, 0, :].astype(np.float64)
+        normalizer = value.sum(axis=1)[:, None]
+        normalizer[normalizer == 0.0] = 1.0
+        values.append(value / normalizer)
+        roots.append(offset)
+        offset += tree.node_count
+        max_depth = max(max_depth, tree.max_depth)
+
+    feature_names = getattr(model, "feature_names_in_", None)
+    return CompiledForest(
+        feature=np.concatenate(features),
+        threshold=np.concatenate(thresholds),
+        left=np.concatenate(lefts),
+        value=np.ascontiguousarray(np.concatenate(values)),
+        roots=np.asarray(roots, dtype=np.intp),
+        medians=medians,
+        classes_=np.asarray(estimator.classes_),
+        max_depth=int(max_depth),
+        feature_names=[str(name) for name in feature_names] if feature_names is not None else None,
+    )
+
+
+def in_bag_mask(model, n_rows: int) -> np.ndarray:
+    # (n_trees, n_rows) mask of the n_rows training rows each tree's bootstrap drew
+    steps = getattr(model, "steps", None)
+    estimator = steps[-1][1] if steps else model
+    if not getattr(estimator, "bootstrap", False):
+        raise ValueError("Out-of-bag rows need a forest fitted with bootstrap=True")
+    samples = estimator.estimators_samples_
+    mask = np.zeros((len(samples), n_rows), dtype=bool)
+    for tree, rows in enumerate(samples):
+        mask[tree, rows] = True
+    return mask
+
+
+def save_forest(forest: CompiledForest, path: Path) -> Path:
+    # Uncompressed so load_forest can memory-map every array in place
+    joblib.dump(forest, path)
+    return Path(path)
+
+
+def load_forest(path: Path, mmap: bool = True) -> CompiledForest:
+    # Read-only maps are backed by the page cache, so worker processes on one
+    # host share a single physical copy of the node arrays
+    forest = joblib.load(path, mmap_mode="r" if mmap else None)
+    if not isinstance(forest, CompiledForest):
+        raise TypeError(f"{path} does not contain a compiled forest")
+    for item in fields(forest):
+        value = getattr(forest, item.name)
+        if isinstance(value, np.memmap):
+            # Plain ndarray views over the map skip memmap subclass overhead on every gather
+            setattr(forest, item.name, np.asarray(value))
+    return forest
+
+
+def _sibling_order(children_left: np.ndarray, children_right: np.ndarray):
+    # Breadth-first renumbering that allocates both children of a node as a pair
+    order = [0]
+    left = np.empty(len(children_left), dtype=np.int64)
+    for new_id, old_id in enumerate(order):
+        if children_left[old_id] == -1:
+            left[new_id] = new_id
+        else:
+            left[new_id] = len(order)
+            order.append(children_left[old_id])
+            order.append(children_right[old_id])
+    return np.asarray(order), left
+
+
+def _round_down_float32(threshold: np.ndarray) -> np.ndarray:
+    rounded = threshold.astype(np.float32)
+    too_high = rounded > threshold
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
@@ -0,0 +1,177 @@
+import threading
+import warnings
+from dataclasses import dataclass, fields
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+SCORE_TABLE_FILE = "score_table.joblib"
+BUILD_CHUNK_SIZE = 65536
+
+
+def _bin_midpoints(bins: list) -> list:
+    return [(low + high) / 2.0 for low, high in bins]
+
+
+# Every value the silver -> gold dataflow (terraform/11_adf_dataflow_silver_gold)
+# can emit. Nulls are imputed to 0, so 0 is part of every domain and the
+# one-hot groups allow "no flag set" as well as exactly one flag.
+GOLD_DOMAIN = [
+    (["age_mid"], [0.0] + _bin_midpoints([(low, low + 9) for low in range(10, 100, 10)])),
+    (["tumor_size_mid"], [0.0] + _bin_midpoints([(low, low + 4) for low in range(0, 60, 5)])),
+    (["inv_nodes_mid"], [0.0] + _bin_midpoints([(low, low + 2) for low in range(0, 36, 3)] + [(36, 39)])),
+    (["deg_malig_num"], [0, 1, 2, 3]),
+    (["node_caps_num"], [0, 1]),
+    (["irradiat_num"], [0, 1]),
+    (["breast_right"], [0, 1]),
+    (["menopause_lt40", "menopause_ge40", "menopause_premeno"], "one_hot"),
+    (
+        ["breast_quad_left_up", "breast_quad_left_low", "breast_quad_right_up", "breast_quad_right_low", "breast_quad_central"],
+        "one_hot",
+    ),
+]
+
+
+@dataclass
+class ScoreTable:
+    # A row's cell is the sum of per-column contributions read from lut. Values
+    # are looked up by value * scale, which must be a small non-negative integer
+    # for everything in the domain; -1 marks values outside it. One-hot groups
+    # contribute (flag position + 1) * stride and are valid with at most one flag.
+    feature_names: list
+    axis_columns: list
+    axis_values: list
+    strides: np.ndarray
+    one_hot_columns: list
+    lut: np.ndarray
+    scale: float
+    proba: np.ndarray
+    classes_: np.ndarray
+
+    @property
+    def n_cells(self) -> int:
+        return self.proba.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [self.strides, self.lut, self.proba, *self.axis_columns, *self.axis_values, *self.one_hot_columns]
+        return sum(array.nbytes for array in arrays)
+
+    def locate(self, X: np.ndarray):
+        scaled = np.multiply(X, self.scale, dtype=np.float64)
+        in_range = (scaled >= 0) & (scaled < self.lut.shape[1])
+        index = np.where(in_range, scaled, 0).astype(np.intp)
+        contribution = self.lut[np.arange(X.shape[1]), index]
+        hit = (in_range & (index == scaled) & (contribution >= 0)).all(axis=1)
+        for columns in self.one_hot_columns:
+            hit &= X[:, columns].sum(axis=1) <= 1
+        return np.maximum(contribution, 0).sum(axis=1), hit
+
+
+def _grid(table: ScoreTable, cells: np.ndarray) -> np.ndarray:
+    X = np.zeros((len(cells), len(table.feature_names)), dtype=np.float32)
+    remainder = cells.copy()
+    for columns, values, stride in zip(table.axis_columns, table.axis_values, table.strides):
+        position, remainder = np.divmod(remainder, stride)
+        X[:, columns] = values[position]
+    return X
+
+
+def build_score_table(model, feature_names: list, domain: list = GOLD_DOMAIN, scale: float = 2.0) -> ScoreTable:
+    column_index = {name: index for index, name in enumerate(feature_names)}
+    covered = [name for columns, _ in domain for name in columns]
+    if sorted(covered) != sorted(feature_names):
+        raise ValueError("Score table domain does not cover exactly the model features")
+
+    axis_columns, axis_values, one_hot_columns = [], [], []
+    for columns, values in domain:
+        indices = np.asarray([column_index[name] for name in columns], dtype=np.intp)
+        if values == "one_hot":
+            values = np.vstack([np.zeros(len(columns)), np.eye(len(columns))])
+            one_hot_columns.append(indices)
+        else:
+            values = np.sort(np.asarray(values, dtype=np.float64))[:, None]
+        axis_columns.append(indices)
+        axis_values.append(values)
+
+    sizes = [len(values) for values in axis_values]
+    strides = np.asarray([int(np.prod(sizes[index + 1 :])) for index in range(len(sizes))], dtype=np.intp)
+
+    all_values = np.concatenate([values.ravel() for values in axis_values]) * scale
+    if (all_values < 0).any() or (all_values != np.round(all_values)).any():
+        raise ValueError(f"Domain values must be non-negative multiples of 1/{scale}")
+    lut = np.full((len(feature_names), int(all_values.max()) + 1), -1, dtype=np.intp)
+    for columns, values, stride in zip(axis_columns, axis_values, strides):
+        if len(columns) == 1:
+            lut[columns[0], (values[:, 0] * scale).astype(np.intp)] = np.arange(len(values)) * stride
+        else:
+            for position, column in enumerate(columns, start=1):
+                lut[column, 0] = 0
+                lut[column, int(scale)] = position * stride
+
+    table = ScoreTable(
+        feature_names=list(feature_names),
+        axis_columns=axis_columns,
+        axis_values=axis_values,
+        strides=strides,
+        one_hot_columns=one_hot_columns,
+        lut=lut,
+        scale=float(scale),
+        proba=np.empty((int(np.prod(sizes)), len(model.classes_)), dtype=np.float64),
+        classes_=np.asarray(model.classes_),
+    )
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        for start in range(0, table.n_cells, BUILD_CHUNK_SIZE):
+            cells = np.arange(start, min(start + BUILD_CHUNK_SIZE, table.n_cells), dtype=np.intp)
+            table.proba[cells] = model.predict_proba(_grid(table, cells))
+    return table
+
+
+def save_score_table(table: ScoreTable, path: Path) -> Path:
+    joblib.dump(table, path)
+    return Path(path)
+
+
+def load_score_table(path: Path, mmap: bool = True) -> ScoreTable:
+    table = joblib.load(path, mmap_mode="r" if mmap else None)
+    if not isinstance(table, ScoreTable):
+        raise TypeError(f"{path} does not contain a score table")
+    for item in fields(table):
+        value = getattr(table, item.name)
+        if isinstance(value, np.memmap):
+            setattr(table, item.name, np.asarray(value))
+        elif isinstance(value, list):
+            setattr(table, item.name, [np.asarray(entry) if isinstance(entry, np.memmap) else entry for entry in value])
+    return table
+
+
+class TabulatedModel:
+    # Answers in-domain rows from the table and sends the rest to the model
+
+    def __init__(self, table: ScoreTable, model):
+        self.table = table
+        self.model = model
+        self.classes_ = model.classes_
+        # The parallel scorer and the batcher call predict_proba from several threads
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    def predict_proba(self, X) -> np.ndarray:
+        if not isinstance(X, np.ndarray):
+            return self.model.predict_proba(X)
+        cell, hit = self.table.locate(X)
+        proba = self.table.proba[cell]
+        n_hits = int(hit.sum())
+        if n_hits < len(X):
+            proba[~hit] = self.model.predict_proba(X[~hit])
+        with self._stats_lock:
+            self.hits += n_hits
+            self.misses += len(X) - n_hits
+        return proba
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            self.hits = 0
+            self.misses = 0
@@ -0,0 +1,128 @@
+import threading
+import time
+
+import numpy as np
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Upper bounds in seconds, from a cached table hit to a slow large batch
+STAGE_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+ROW_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 10000, 100000)
+# Requests buffered before their timings are folded into the histograms
+FOLD_EVERY = 256
+
+
+class StageTimer:
+    # Splits one request into consecutive stages; mark(name) closes the stage
+    # that started at the previous mark. Only the timestamp is kept here,
+    # durations are worked out when ScoringMetrics folds the request
+
+    __slots__ = ("started", "marks")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.marks = []
+
+    def mark(self, stage: str) -> None:
+        self.marks.append((stage, time.perf_counter()))
+
+
+class _Histogram:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe_many(self, values) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        counts = np.bincount(np.searchsorted(self.bounds, values, side="left"), minlength=len(self.counts))
+        self.counts = [total + int(count) for total, count in zip(self.counts, counts)]
+        self.sum += float(values.sum())
+
+    def lines(self, name: str, labels: str) -> list:
+        lines, cumulative = [], 0
+        prefix = f"{labels}," if labels else ""
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{prefix}le="{bound:g}"}} {cumulative}')
+        cumulative += self.counts[-1]
+        lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {cumulative}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {self.sum:.9g}")
+        lines.append(f"{name}_count{suffix} {cumulative}")
+        return lines
+
+
+class ScoringMetrics:
+    # In-process histograms and counters for score.run. observe() only buffers
+    # the request under the lock; every FOLD_EVERY requests, and before
+    # render(), the buffer is bucketed with numpy in one pass. render()
+    # returns the Prometheus text exposition format
+
+    def __init__(self, stage_buckets=STAGE_BUCKETS, row_buckets=ROW_BUCKETS, fold_every=FOLD_EVERY):
+        self.stage_buckets = tuple(stage_buckets)
+        self.fold_every = fold_every
+        self._lock = threading.Lock()
+        self._pending = []
+        self._stages = {}
+        self._rows = _Histogram(tuple(row_buckets))
+        self._requests = {}
+
+    def observe(self, timer: StageTimer, rows: int, route: str) -> None:
+        with self._lock:
+            self._pending.append((timer, rows, route))
+            if len(self._pending) >= self.fold_every:
+                self._fold()
+
+    def _fold(self) -> None:
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        values = {"total": []}
+        rows = []
+        for timer, n_rows, route in pending:
+            last = timer.started
+            for stage, now in timer.marks:
+                bucket = values.get(stage)
+                if bucket is None:
+                    bucket = values[stage] = []
+                bucket.append(now - last)
+                last = now
+            values["total"].append(last - timer.started)
+            rows.append(n_rows)
+            key = (route, "ok")
+            self._requests[key] = self._requests.get(key, 0) + 1
+        for stage, seconds in values.items():
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = _Histogram(self.stage_buckets)
+            histogram.observe_many(seconds)
+        self._rows.observe_many(rows)
+
+    def count_error(self, route: str) -> None:
+        with self._lock:
+            key = (route, "error")
+            self._requests[key] = self._requests.get(key, 0) + 1
+
+    def render(self) -> str:
+        with self._lock:
+            self._fold()
+            lines = [
+                "# HELP scoring_stage_seconds Time spent per request in each score.run stage",
+                "# TYPE scoring_stage_seconds histogram",
+            ]
+            for stage in sorted(self._stages):
+                lines += self._stages[stage].lines("scoring_stage_seconds", f'stage="{stage}"')
+            lines += [
+                "# HELP scoring_batch_rows Rows scored per request",
+                "# TYPE scoring_batch_rows histogram",
+            ]
+            lines += self._rows.lines("scoring_batch_rows", "")
+            lines += [
+                "# HELP scoring_requests_total Requests handled by score.run",
+                "# TYPE scoring_requests_total counter",
+            ]
+            for (route, outcome), count in sorted(self._requests.items()):
+                lines.append(f'scoring_requests_total{{route="{route}",outcome="{outcome}"}} {count}')
+        return "\n".join(lines) + "\n"
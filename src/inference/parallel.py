@@ -0,0 +1,95 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+PARALLEL_CONFIG_KEY = "parallel_min_rows"
+DEFAULT_PARALLEL_MIN_ROWS = 4096
+CALIBRATION_SIZES = (256, 512, 1024, 2048, 4096, 8192, 16384)
+
+
+def available_cores() -> int:
+    # Honours CPU affinity (taskset, container cpusets) where the platform has it
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def make_pool(max_workers: int) -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="score-parallel")
+
+
+def resolve_min_rows(config: dict, engine: str, override=None) -> int:
+    if override is not None:
+        return int(override)
+    calibrated = config.get(PARALLEL_CONFIG_KEY, {}).get(engine)
+    return DEFAULT_PARALLEL_MIN_ROWS if calibrated is None else int(calibrated)
+
+
+def _rows(X, index):
+    return X.iloc[index] if hasattr(X, "iloc") else X[index]
+
+
+class ParallelScorer:
+    # Splits batches of at least min_rows into row blocks scored on a shared,
+    # persistent pool, giving every block at least min_rows / 2 rows. Smaller
+    # batches run inline and min_rows=0 never splits. Rows are scored
+    # independently, so the result equals a single call; the compiled forest's
+    # gathers and sklearn's tree traversal both release the GIL.
+
+    def __init__(self, model, min_rows: int, pool: ThreadPoolExecutor, max_workers: int):
+        self.model = model
+        self.min_rows = int(min_rows)
+        self.pool = pool
+        self.max_workers = max_workers
+
+    def __getattr__(self, name):
+        # Anything but scoring is the wrapped model's (classes_, feature names, nbytes)
+        if name == "model":
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    def workers_for(self, n_rows: int) -> int:
+        if self.min_rows <= 0 or n_rows < self.min_rows:
+            return 1
+        return max(1, min(self.max_workers, 2 * n_rows // self.min_rows))
+
+    def predict_proba(self, X) -> np.ndarray:
+        workers = self.workers_for(len(X))
+        if workers <= 1:
+            return self.model.predict_proba(X)
+        bounds = np.linspace(0, len(X), workers + 1).astype(np.intp)
+        blocks = [slice(start, stop) for start, stop in zip(bounds[:-1], bounds[1:])]
+        # The calling thread takes the first block itself
+        futures = [self.pool.submit(self.model.predict_proba, _rows(X, block)) for block in blocks[1:]]
+        first = self.model.predict_proba(_rows(X, blocks[0]))
+        return np.concatenate([first] + [future.result() for future in futures])
+
+    def predict(self, X) -> np.ndarray:
+        return self.model.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+def _best_of(fn, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def calibrate_min_rows(model, X, pool: ThreadPoolExecutor, max_workers: int, sizes=CALIBRATION_SIZES, repeats: int = 3, margin: float = 0.9):
+    # Smallest batch size where two blocks beat one call by the margin, 0 when
+    # none of the sizes does, None when there are not two workers to measure
+    if max_workers < 2:
+        return None
+    split = ParallelScorer(model, 1, pool, 2)
+    for n_rows in sizes:
+        batch = _rows(X, np.arange(n_rows) % len(X))
+        inline_seconds = _best_of(lambda: model.predict_proba(batch), repeats)
+        split_seconds = _best_of(lambda: split.predict_proba(batch), repeats)
+        if split_seconds < inline_seconds * margin:
+            return int(n_rows)
+    return 0
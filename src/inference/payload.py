@@ -0,0 +1,118 @@
+import io
+import json
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_CONTENT_TYPE = "application/json"
+ARROW_CONTENT_TYPE = "application/vnd.apache.arrow.stream"
+NPY_CONTENT_TYPE = "application/x-npy"
+
+
+def media_type(header, default: str = JSON_CONTENT_TYPE) -> str:
+    if not header:
+        return default
+    value = header.split(";", 1)[0].strip().lower()
+    return default if value in ("", "*/*") else value
+
+
+def loads_json(body):
+    if orjson is not None:
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            # Fall through so NaN/Infinity literals and error messages match the stdlib
+            pass
+    return json.loads(body)
+
+
+def response_dict(preds: np.ndarray, probs: np.ndarray, fields: str = "all") -> dict:
+    result = {} if fields == "probabilities" else {"predictions": preds.tolist()}
+    result["probabilities"] = np.round(probs, 6).tolist()
+    return result
+
+
+def dumps_json(preds: np.ndarray, probs: np.ndarray, style: str = "compat", fields: str = "all") -> bytes:
+    # "compat" is byte-identical to json.dumps of response_dict. "fast" lets
+    # orjson serialise the arrays directly (compact separators, no Python lists)
+    # and falls back to "compat" when orjson is not installed.
+    if style == "fast" and orjson is not None:
+        result = {} if fields == "probabilities" else {"predictions": preds}
+        result["probabilities"] = np.round(probs, 6)
+        return orjson.dumps(result, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(response_dict(preds, probs, fields)).encode("utf-8")
+
+
+def _finish(X: np.ndarray) -> np.ndarray:
+    # Missing values stay NaN, as from the JSON decoders; score.fill_missing() imputes them
+    return np.ascontiguousarray(X, dtype=np.float32)
+
+
+def decode_npy(body: bytes, feature_columns) -> np.ndarray:
+    array = np.load(io.BytesIO(body), allow_pickle=False)
+    if array.dtype.names:
+        if feature_columns is None:
+            raise ValueError("Structured .npy input requires a model with feature names")
+        missing = [name for name in feature_columns if name not in array.dtype.names]
+        if missing:
+            raise ValueError(f"Missing feature fields: {missing}")
+        X = np.empty((array.shape[0], len(feature_columns)), dtype=np.float32)
+        for index, name in enumerate(feature_columns):
+            X[:, index] = array[name]
+        return _finish(X)
+    if array.ndim == 1:
+        array = array[None, :]
+    if array.ndim != 2 or (feature_columns is not None and array.shape[1] != len(feature_columns)):
+        raise ValueError(f"Expected a 2-D array in training feature order, got shape {array.shape}")
+    return _finish(array)
+
+
+def decode_arrow(body: bytes, feature_columns) -> np.ndarray:
+    import pyarrow as pa
+
+    table = pa.ipc.open_stream(body).read_all()
+    names = feature_columns if feature_columns is not None else table.column_names
+    missing = [name for name in names if name not in table.column_names]
+    if missing:
+        raise ValueError(f"Missing feature columns: {missing}")
+    X = np.empty((table.num_rows, len(names)), dtype=np.float32)
+    for index, name in enumerate(names):
+        column = table.column(name)
+        if column.null_count:
+            column = column.cast(pa.float64())
+        X[:, index] = column.to_numpy()
+    return _finish(X)
+
+
+def encode_npy(preds: np.ndarray, probs: np.ndarray) -> bytes:
+    result = np.empty(len(probs), dtype=[("predictions", preds.dtype), ("probabilities", np.float64)])
+    result["predictions"] = preds
+    result["probabilities"] = probs
+    buffer = io.BytesIO()
+    np.save(buffer, result, allow_pickle=False)
+    return buffer.getvalue()
+
+
+def encode_arrow(preds: np.ndarray, probs: np.ndarray) -> bytes:
+    import pyarrow as pa
+
+    table = pa.table({"predictions": preds, "probabilities": probs})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+DECODERS = {
+    ARROW_CONTENT_TYPE: decode_arrow,
+    NPY_CONTENT_TYPE: decode_npy,
+}
+
+ENCODERS = {
+    ARROW_CONTENT_TYPE: encode_arrow,
+    NPY_CONTENT_TYPE: encode_npy,
+}
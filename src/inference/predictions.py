@@ -0,0 +1,379 @@
+import argparse
+import atexit
+import json
+import os
+import pickle
+import select
+import struct
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+LOG_POLICIES = ("block", "drop")
+FLUSH_ROWS = 8192
+FLUSH_INTERVAL_S = 1.0
+ROTATE_INTERVAL_S = 3600.0
+COMPRESSION = "zstd"
+# Niceness added to the writer process: on a busy core it encodes in the time
+# requests leave idle, and the buffer's drop/block policy absorbs the rest
+WRITER_NICE = 19
+# Every message to the writer process is its payload length and a pickle
+_HEADER = struct.Struct("<Q")
+
+
+class PredictionLog:
+    # Bounded buffer of scored batches written to compressed Parquet files,
+    # one row per scored row: logged_at, model, tier, the feature columns,
+    # prediction and probability. log() only appends references under a
+    # lock. A writer thread packs what is buffered into a few contiguous
+    # arrays and pipes them to a separate writer process (this file run as a
+    # script), which does the Arrow encoding, compression and I/O outside
+    # the serving process and its GIL. When capacity_rows are already
+    # buffered, "block" (the default, so every scored row reaches a file)
+    # makes the request wait for the writer; "drop" is opt-in for callers
+    # that prefer latency over a complete log, and discards and counts the
+    # batch. Files are written as .parquet.tmp and
+    # renamed when rotated after rotate_rows rows or rotate_interval_s, and
+    # at close(), which runs at interpreter exit as well.
+
+    def __init__(
+        self,
+        directory: Path,
+        feature_columns,
+        capacity_rows: int = 65536,
+        policy: str = "block",
+        rotate_rows: int = 1_000_000,
+        flush_rows: int = FLUSH_ROWS,
+        flush_interval_s: float = FLUSH_INTERVAL_S,
+        rotate_interval_s: float = ROTATE_INTERVAL_S,
+        compression: str = COMPRESSION,
+        nice: int = WRITER_NICE,
+    ):
+        if policy not in LOG_POLICIES:
+            raise ValueError(f"Unknown prediction log policy {policy!r}, expected one of {LOG_POLICIES}")
+        if capacity_rows < 1 or rotate_rows < 1:
+            raise ValueError("capacity_rows and rotate_rows must be >= 1")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.feature_columns = list(feature_columns) if feature_columns is not None else None
+        self.capacity_rows = capacity_rows
+        self.policy = policy
+        self.rotate_rows = rotate_rows
+        self.flush_rows = min(flush_rows, capacity_rows)
+        self.flush_interval = flush_interval_s
+        self.rotate_interval = rotate_interval_s
+        self.compression = compression
+        self._buffer = deque()
+        self._buffered_rows = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._logged_rows = 0
+        self._dropped_rows = 0
+        self._blocked_s = 0.0
+        self._sent_rows = 0
+        self._written_rows = 0
+        self._failed_rows = 0
+        self._files = 0
+        self._last_error = None
+        self._process = subprocess.Popen(
+            [
+                sys.executable,
+                str(Path(__file__).resolve()),
+                "--directory",
+                str(self.directory),
+                "--rotate_rows",
+                str(rotate_rows),
+                "--rotate_interval_s",
+                str(rotate_interval_s),
+                "--poll_interval_s",
+                str(flush_interval_s),
+                "--compression",
+                compression,
+                "--nice",
+                str(nice),
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        self._acks = threading.Thread(target=self._read_acks, name="score-prediction-log-acks", daemon=True)
+        self._acks.start()
+        self._worker = threading.Thread(target=self._loop, name="score-prediction-log", daemon=True)
+        self._worker.start()
+        # Buffered rows and the open .parquet.tmp part are written out when the worker exits
+        atexit.register(self.close)
+
+    def log(self, X, preds, probs, model: str = "default", tier: str = "full") -> bool:
+        rows = len(probs)
+        with self._cond:
+            if self._closed:
+                return False
+            # A batch larger than the whole buffer is still taken once it is empty
+            if self._buffered_rows and self._buffered_rows + rows > self.capacity_rows:
+                if self.policy == "drop":
+                    self._dropped_rows += rows
+                    return False
+                started = time.perf_counter()
+                # Wakes the writer once; waiting requests must not keep waking each other
+                self._cond.notify_all()
+                while self._buffered_rows and self._buffered_rows + rows > self.capacity_rows and not self._closed:
+                    self._cond.wait()
+                self._blocked_s += time.perf_counter() - started
+                if self._closed:
+                    return False
+            self._buffer.append((time.time(), model, tier, X, preds, probs))
+            self._buffered_rows += rows
+            self._logged_rows += rows
+            if self._buffered_rows >= self.flush_rows:
+                self._cond.notify_all()
+        return True
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "policy": self.policy,
+                "capacity_rows": self.capacity_rows,
+                "buffered_rows": self._buffered_rows,
+                "logged_rows": self._logged_rows,
+                "dropped_rows": self._dropped_rows,
+                "blocked_ms": self._blocked_s * 1000.0,
+                "written_rows": self._written_rows,
+                "failed_rows": self._failed_rows,
+                "files": self._files,
+                "last_error": self._last_error,
+            }
+
+    def flush(self) -> None:
+        # Waits until everything logged so far has been written
+        with self._cond:
+            target = self._logged_rows
+            while self._written_rows + self._failed_rows < target and not self._closed:
+                self._cond.notify_all()
+                self._cond.wait(self.flush_interval)
+
+    def close(self) -> None:
+        atexit.unregister(self.close)
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join()
+        self._acks.join()
+        self._process.wait()
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                if not self._closed and self._buffered_rows < self.flush_rows:
+                    self._cond.wait(self.flush_interval)
+                batches = list(self._buffer)
+                self._buffer.clear()
+                self._buffered_rows = 0
+                closed = self._closed
+                # Blocked requests can go as soon as the buffer is handed over
+                self._cond.notify_all()
+            if batches:
+                self._send(batches)
+            if closed:
+                break
+        # End of input: the writer process closes its file and exits
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass
+
+    def _send(self, batches: list) -> None:
+        rows = sum(len(batch[5]) for batch in batches)
+        with self._cond:
+            self._sent_rows += rows
+        try:
+            payload = pickle.dumps(self._pack(batches), protocol=pickle.HIGHEST_PROTOCOL)
+            self._process.stdin.write(_HEADER.pack(len(payload)))
+            self._process.stdin.write(payload)
+            self._process.stdin.flush()
+        except Exception as exc:
+            with self._cond:
+                self._sent_rows -= rows
+                self._failed_rows += rows
+                self._last_error = f"{type(exc).__name__}: {exc}"
+                self._cond.notify_all()
+
+    def _pack(self, batches: list) -> dict:
+        logged_at, models, tiers, features, preds, probs = zip(*batches)
+        if self.feature_columns is not None:
+            features = [X[self.feature_columns] if hasattr(X, "columns") else X for X in features]
+        # One concatenate per column rather than per-batch conversions
+        features = np.concatenate(features, dtype=np.float32)
+        return {
+            "logged_at": np.asarray(logged_at),
+            "model": list(models),
+            "tier": list(tiers),
+            "lengths": np.fromiter(map(len, probs), dtype=np.intp, count=len(batches)),
+            "names": self.feature_columns or [str(index) for index in range(features.shape[1])],
+            "features": features,
+            "prediction": np.concatenate(preds),
+            "probability": np.concatenate(probs, dtype=np.float64),
+        }
+
+    def _read_acks(self) -> None:
+        # One JSON line from the writer process per message and per rotated file
+        for line in self._process.stdout:
+            ack = json.loads(line)
+            with self._cond:
+                if ack["event"] == "written":
+                    self._written_rows += ack["rows"]
+                    self._sent_rows -= ack["rows"]
+                elif ack["event"] == "failed":
+                    self._failed_rows += ack["rows"]
+                    self._sent_rows -= ack["rows"]
+                    self._last_error = ack["error"]
+                elif ack["event"] == "file":
+                    self._files += 1
+                self._cond.notify_all()
+        code = self._process.wait()
+        with self._cond:
+            if self._sent_rows:
+                # Rows the writer process never confirmed
+                self._failed_rows += self._sent_rows
+                self._sent_rows = 0
+                self._last_error = f"Prediction log writer exited with code {code}"
+            self._cond.notify_all()
+
+
+class ParquetFiles:
+    # The writer process's side: packed batches in, rotated Parquet files out
+
+    def __init__(self, directory: Path, rotate_rows: int, rotate_interval_s: float, compression: str):
+        self.directory = Path(directory)
+        self.rotate_rows = rotate_rows
+        self.rotate_interval = rotate_interval_s
+        self.compression = compression
+        self._writer = None
+        self._schema = None
+        self._path = None
+        self._file_rows = 0
+        self._file_opened = 0.0
+        self._sequence = 0
+
+    def write(self, packed: dict) -> None:
+        table = self._table(packed)
+        if self._writer is not None and (table.schema != self._schema or self.due()):
+            self.rotate()
+        offset = 0
+        while offset < table.num_rows:
+            if self._writer is None:
+                self._open(table.schema)
+            take = min(table.num_rows - offset, self.rotate_rows - self._file_rows)
+            self._writer.write_table(table.slice(offset, take))
+            self._file_rows += take
+            offset += take
+            if self._file_rows >= self.rotate_rows:
+                self.rotate()
+
+    def due(self) -> bool:
+        return self._writer is not None and time.time() - self._file_opened >= self.rotate_interval
+
+    def _table(self, packed: dict):
+        import pyarrow as pa
+
+        lengths = packed["lengths"]
+        fields = {
+            "logged_at": pa.array(np.repeat(packed["logged_at"] * 1000.0, lengths).astype("datetime64[ms]")),
+            "model": pa.array(np.repeat(np.asarray(packed["model"], dtype=object), lengths), type=pa.string()).dictionary_encode(),
+            "tier": pa.array(np.repeat(np.asarray(packed["tier"], dtype=object), lengths), type=pa.string()).dictionary_encode(),
+        }
+        features = packed["features"]
+        fields.update((name, pa.array(features[:, index])) for index, name in enumerate(packed["names"]))
+        fields["prediction"] = pa.array(packed["prediction"])
+        fields["probability"] = pa.array(packed["probability"])
+        return pa.table(fields)
+
+    def _open(self, schema) -> None:
+        import pyarrow.parquet as pq
+
+        self._sequence += 1
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        self._path = self.directory / f"predictions-{stamp}-{os.getpid()}-{self._sequence:04d}.parquet"
+        # Probabilities and timestamps are near-unique, dictionary pages would only cost time there
+        dictionary = [name for name in schema.names if name not in ("logged_at", "probability")]
+        self._writer = pq.ParquetWriter(f"{self._path}.tmp", schema, compression=self.compression, use_dictionary=dictionary)
+        self._schema = schema
+        self._file_rows = 0
+        self._file_opened = time.time()
+
+    def rotate(self) -> None:
+        if self._writer is None:
+            return
+        try:
+            self._writer.close()
+            os.replace(f"{self._path}.tmp", self._path)
+        finally:
+            self._writer = None
+            self._schema = None
+            _ack("file")
+
+
+def _ack(event: str, **values) -> None:
+    sys.stdout.write(json.dumps({"event": event, **values}) + "\n")
+    sys.stdout.flush()
+
+
+def _read_exact(fd: int, size: int):
+    # None at end of input
+    chunks = []
+    while size:
+        chunk = os.read(fd, min(size, 1 << 20))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Prediction log writer process, started by PredictionLog.")
+    parser.add_argument("--directory", required=True, help="Directory for the Parquet files")
+    parser.add_argument("--rotate_rows", type=int, required=True, help="Rows per file")
+    parser.add_argument("--rotate_interval_s", type=float, required=True, help="Seconds before a file is rotated")
+    parser.add_argument("--poll_interval_s", type=float, required=True, help="Seconds between rotation checks while idle")
+    parser.add_argument("--compression", required=True, help="Parquet compression codec")
+    parser.add_argument("--nice", type=int, default=WRITER_NICE, help="Niceness added to this process")
+    args = parser.parse_args()
+    # Imported before lowering the priority, so a busy core does not stretch the start
+    import pyarrow.parquet  # noqa: F401
+
+    try:
+        os.nice(args.nice)
+    except (AttributeError, OSError):
+        pass
+
+    files = ParquetFiles(args.directory, args.rotate_rows, args.rotate_interval_s, args.compression)
+    fd = sys.stdin.fileno()
+    while True:
+        ready, _, _ = select.select([fd], [], [], args.poll_interval_s)
+        if not ready:
+            if files.due():
+                files.rotate()
+            continue
+        header = _read_exact(fd, _HEADER.size)
+        payload = _read_exact(fd, _HEADER.unpack(header)[0]) if header is not None else None
+        if payload is None:
+            break
+        packed = pickle.loads(payload)
+        rows = len(packed["probability"])
+        try:
+            files.write(packed)
+        except Exception as exc:
+            _ack("failed", rows=rows, error=f"{type(exc).__name__}: {exc}")
+        else:
+            _ack("written", rows=rows)
+    files.rotate()
+
+
+if __name__ == "__main__":
+    main()
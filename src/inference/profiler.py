@@ -0,0 +1,151 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+
+DEFAULT_PROFILE_DIR = Path(tempfile.gettempdir()) / "scoring-profiles"
+SAMPLE_INTERVAL_S = 0.005
+TRACEMALLOC_FRAMES = 8
+TOP_ALLOCATIONS = 30
+# Wall-clock cap on request-count sessions, so one started before traffic
+# stops does not keep the sampler and tracemalloc running indefinitely
+MAX_SESSION_S = 300.0
+# Leaf frames of threads parked on a lock or queue; they would otherwise
+# dominate the profile with the watcher, batcher and pool idling
+IDLE_FRAMES = {("threading.py", "wait")}
+
+
+def parse_budget(value) -> tuple:
+    # "30s" profiles for 30 seconds, "200" for the next 200 requests
+    text = str(value).strip().lower()
+    try:
+        if text.endswith("s"):
+            seconds = float(text[:-1])
+            if seconds > 0:
+                return seconds, None
+        else:
+            requests = int(text)
+            if requests > 0:
+                return None, requests
+    except ValueError:
+        pass
+    raise ValueError(f"Invalid profile budget {value!r}, expected seconds like '30s' or a request count like '200'")
+
+
+def _frame_name(code) -> str:
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class ProfileSession:
+    # Samples every other thread's Python stack on a background thread and
+    # traces allocations with tracemalloc until the time or request budget
+    # runs out (request budgets also end after max_seconds), then writes <stamp>.collapsed (one "frame;frame;... count"
+    # line per stack, for flamegraph.pl or speedscope) and
+    # <stamp>.tracemalloc.txt into directory
+
+    def __init__(self, directory, seconds=None, requests=None, interval_s=SAMPLE_INTERVAL_S, max_seconds=MAX_SESSION_S):
+        if seconds is None and requests is None:
+            raise ValueError("A profile needs a seconds or requests budget")
+        self.directory = Path(directory)
+        self.seconds = seconds
+        self.max_seconds = max_seconds
+        self.requests_left = requests
+        self.interval_s = interval_s
+        self.samples = Counter()
+        self.n_samples = 0
+        self.n_requests = 0
+        self.paths = None
+        self.finished = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._owns_tracemalloc = False
+        self._thread = None
+
+    def start(self) -> "ProfileSession":
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._owns_tracemalloc = True
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample, name="score-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self) -> None:
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        deadline = self._started + (self.max_seconds if self.seconds is None else self.seconds)
+        while not self._stop.wait(self.interval_s):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                leaf = frame.f_code
+                if (os.path.basename(leaf.co_filename), leaf.co_name) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame.f_code))
+                    frame = frame.f_back
+                if ident not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                stack.append(names.get(ident, str(ident)))
+                self.samples[";".join(reversed(stack))] += 1
+            self.n_samples += 1
+            if time.perf_counter() >= deadline:
+                self.stop()
+                return
+
+    def request_done(self) -> bool:
+        # Returns True once the session has finished, so callers can drop it
+        with self._lock:
+            self.n_requests += 1
+            if self.requests_left is not None:
+                self.requests_left -= 1
+                exhausted = self.requests_left <= 0
+            else:
+                exhausted = False
+        if exhausted:
+            self.stop()
+        return self.finished
+
+    def stop(self) -> tuple:
+        with self._lock:
+            if self.finished:
+                return self.paths
+            self.finished = True
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            )
+        )
+        current, peak = tracemalloc.get_traced_memory()
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+        elapsed = time.perf_counter() - self._started
+
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started_at)) + f"-{os.getpid()}"
+        collapsed = self.directory / f"{stamp}.collapsed"
+        collapsed.write_text("".join(f"{stack} {count}\n" for stack, count in self.samples.most_common()), encoding="utf-8")
+
+        statistics = snapshot.statistics("lineno")
+        lines = [
+            f"# {elapsed:.1f}s, {self.n_requests} requests, {self.n_samples} samples",
+            f"# traced current={current / 2**20:.2f}MiB peak={peak / 2**20:.2f}MiB",
+            f"# top {min(TOP_ALLOCATIONS, len(statistics))} of {len(statistics)} allocation sites still live at stop",
+        ]
+        lines += [str(stat) for stat in statistics[:TOP_ALLOCATIONS]]
+        allocations = self.directory / f"{stamp}.tracemalloc.txt"
+        allocations.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+        self.paths = (collapsed, allocations)
+        print(f"score.py profile written: {collapsed} {allocations}")
+        return self.paths
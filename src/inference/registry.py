@@ -0,0 +1,81 @@
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+
+class ModelRegistry:
+    # Loads root/<name> on first use with load_fn(path) -> (entry, nbytes) and
+    # keeps the most recently used entries while their sizes fit max_bytes.
+    # The entry just loaded is never evicted, even if it alone exceeds the
+    # budget, and evicted entries stay valid for requests still holding them.
+
+    def __init__(self, root: Path, load_fn, max_bytes: int):
+        if max_bytes < 0:
+            raise ValueError("max_bytes must be >= 0")
+        self.root = Path(root)
+        self.load_fn = load_fn
+        self.max_bytes = max_bytes
+        self._resident = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._loads = 0
+        self._load_failures = 0
+        self._evictions = 0
+
+    def resolve(self, name: str) -> Path:
+        # Only direct subdirectories of root can be selected
+        if not name or name in (".", "..") or Path(name).name != name:
+            raise ValueError(f"Invalid model name: {name!r}")
+        path = self.root / name
+        if not path.is_dir():
+            raise ValueError(f"Unknown model: {name!r}")
+        return path
+
+    def get(self, name: str):
+        with self._lock:
+            if name in self._resident:
+                self._resident.move_to_end(name)
+                self._hits += 1
+                return self._resident[name][0]
+            self._misses += 1
+            loading = self._loading.setdefault(name, threading.Lock())
+        # One load per name; concurrent requests for it wait here
+        with loading:
+            with self._lock:
+                if name in self._resident:
+                    self._resident.move_to_end(name)
+                    return self._resident[name][0]
+            try:
+                entry, nbytes = self.load_fn(self.resolve(name))
+            except Exception:
+                with self._lock:
+                    self._load_failures += 1
+                    self._loading.pop(name, None)
+                raise
+            with self._lock:
+                self._resident[name] = (entry, nbytes)
+                self._loads += 1
+                self._loading.pop(name, None)
+                while len(self._resident) > 1 and self.resident_bytes() > self.max_bytes:
+                    self._resident.popitem(last=False)
+                    self._evictions += 1
+        return entry
+
+    def resident_bytes(self) -> int:
+        return sum(nbytes for _, nbytes in self._resident.values())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "root": str(self.root),
+                "max_bytes": self.max_bytes,
+                "resident_bytes": self.resident_bytes(),
+                "resident": {name: nbytes for name, (_, nbytes) in self._resident.items()},
+                "hits": self._hits,
+                "misses": self._misses,
+                "loads": self._loads,
+                "load_failures": self._load_failures,
+                "evictions": self._evictions,
+            }
@@ -1,15 +1,150 @@
-import json
-from pathlib import Path
+import time
 
-import joblib
-import numpy as np
-import pandas as pd
+_IMPORT_STARTED = time.perf_counter()
+
+import json  # noqa: E402
+import os  # noqa: E402
+import sys  # noqa: E402
+import threading  # noqa: E402
+import warnings  # noqa: E402
+from dataclasses import fields  # noqa: E402
+from pathlib import Path  # noqa: E402
+
+import numpy as np  # noqa: E402
+
+# Azure ML loads this file by path, so make sibling modules importable
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from backends import MODEL_FILE, ONNX_FILE, load_backend  # noqa: E402
+from batching import MicroBatcher  # noqa: E402
+from drift import DRIFT_PROFILE_FILE, DriftSketch, compare_profiles, load_profile  # noqa: E402
+from forest import FOREST_FILE, CompiledForest, EarlyExitForest  # noqa: E402
+from lookup import SCORE_TABLE_FILE, TabulatedModel, build_score_table, load_score_table  # noqa: E402
+from metrics import PROMETHEUS_CONTENT_TYPE, ScoringMetrics, StageTimer  # noqa: E402
+from parallel import ParallelScorer, available_cores, make_pool, resolve_min_rows  # noqa: E402
+from payload import ARROW_CONTENT_TYPE, DECODERS, ENCODERS, JSON_CONTENT_TYPE, NPY_CONTENT_TYPE, dumps_json, loads_json, media_type, response_dict  # noqa: E402
+from predictions import WRITER_NICE, PredictionLog  # noqa: E402
+from profiler import DEFAULT_PROFILE_DIR, ProfileSession, parse_budget  # noqa: E402
+from registry import ModelRegistry  # noqa: E402
+from scoring import SCORING_CONFIG_FILE, load_scoring_config, predict_scores, resolve_threshold  # noqa: E402
+from student import STUDENT_FILE, load_student  # noqa: E402
+from watcher import DirectoryWatcher  # noqa: E402
+
+try:
+    # Only present inside the Azure ML inference server
+    from azureml_inference_server_http.api.aml_request import rawhttp
+    from azureml_inference_server_http.api.aml_response import AMLResponse
+except ImportError:
+    rawhttp = None
+    AMLResponse = None
 
 MODEL = None
+FEATURE_COLUMNS = None
+DECISION_THRESHOLD = None
+BATCHER = None
+WATCHER = None
+PREDICTION_LOG = None
+DRIFT = None
+DRIFT_REFERENCE = None
+REGISTRY = None
+POOL = None
+COLD_START = {}
+# (model, threshold, student) in use; requests read it once per model call
+ACTIVE = None
+_INIT_LOCK = threading.RLock()
 
+# "sklearn" scores with the fitted pipeline, "compiled" with the flat array
+# forest, "onnx" with model.onnx through onnxruntime. Unset falls back to
+# "engine" in scoring.json, then to "compiled" when train.py wrote
+# forest.joblib (--compiled_forest) and "sklearn" otherwise: the compiled
+# forest starts faster, without importing sklearn or pandas, and wins on small
+# batches, but scores large ones several times slower
+ENGINE = os.environ.get("SCORING_ENGINE")
 
-def init():
-    global MODEL
+# "auto" answers in-domain rows from score_table.joblib when it exists,
+# "build" also tabulates the model at init when it does not, "off" disables
+TABLE_MODE = os.environ.get("SCORING_TABLE", "auto")
+
+# A positive window coalesces concurrent array requests into one model call
+BATCH_WINDOW_MS = float(os.environ.get("SCORING_BATCH_WINDOW_MS", "0"))
+BATCH_MAX_ROWS = int(os.environ.get("SCORING_BATCH_MAX_ROWS", "256"))
+
+# "compat" keeps JSON responses byte-identical to json.dumps, "fast" uses orjson when installed
+JSON_STYLE = os.environ.get("SCORING_JSON_STYLE", "compat")
+# "probabilities" drops the predictions list; requests can override with "response_fields"
+RESPONSE_FIELDS = os.environ.get("SCORING_RESPONSE_FIELDS", "all")
+
+# Set SCORING_FAST_PATH=0 to force every request through the pandas decoder
+FAST_PATH = os.environ.get("SCORING_FAST_PATH", "1") != "0"
+
+# Rows scored by the synthetic warm-up at the end of init(), 0 skips it
+WARMUP_ROWS = int(os.environ.get("SCORING_WARMUP_ROWS", "256"))
+
+# Seconds between checks of the model directory for a new version, 0 disables
+# hot reload. SCORING_MODEL_DIR overrides AZUREML_MODEL_DIR as the directory
+RELOAD_INTERVAL_S = float(os.environ.get("SCORING_RELOAD_INTERVAL_S", "0"))
+RELOAD_FILES = (MODEL_FILE, FOREST_FILE, ONNX_FILE, SCORE_TABLE_FILE, SCORING_CONFIG_FILE, STUDENT_FILE, DRIFT_PROFILE_FILE)
+
+# Set SCORING_EARLY_EXIT=1 to stop adding trees for a row once it is further
+# from the threshold than the margins train.py saved (compiled engine only)
+EARLY_EXIT = os.environ.get("SCORING_EARLY_EXIT", "0") == "1"
+
+# Batches of at least this many rows are split across a persistent thread pool.
+# Unset uses the crossover train.py calibrated into scoring.json, 0 disables
+PARALLEL_MIN_ROWS = os.environ.get("SCORING_PARALLEL_MIN_ROWS")
+PARALLEL_WORKERS = int(os.environ.get("SCORING_PARALLEL_WORKERS", "0")) or available_cores()
+
+# "full" scores with the forest, "student" with the distilled student.joblib.
+# Requests can override it with "tier" (or the X-Scoring-Tier header)
+TIERS = ("full", "student")
+TIER = os.environ.get("SCORING_TIER", "full")
+TIER_HEADER = "X-Scoring-Tier"
+
+# Directory of named model versions, one subdirectory each laid out like
+# AZUREML_MODEL_DIR, that requests pick with "model" (or the X-Scoring-Model
+# header). Unset disables selection. Resident versions share a memory budget
+MODELS_DIR = os.environ.get("SCORING_MODELS_DIR")
+MODELS_MAX_MB = float(os.environ.get("SCORING_MODELS_MAX_MB", "512"))
+MODEL_HEADER = "X-Scoring-Model"
+
+# Per-stage timings, batch sizes and request counts for metrics_text() and
+# GET /score?metrics; SCORING_METRICS=0 turns recording off
+METRICS = ScoringMetrics() if os.environ.get("SCORING_METRICS", "1") != "0" else None
+ROUTES = {JSON_CONTENT_TYPE: "json", ARROW_CONTENT_TYPE: "arrow", NPY_CONTENT_TYPE: "npy"}
+
+# Every scored row and its probability is appended to rotated, compressed
+# Parquet files in SCORING_PREDICTION_LOG_DIR by a background writer process
+# running at SCORING_PREDICTION_LOG_NICE. When SCORING_PREDICTION_LOG_CAPACITY
+# rows are already waiting, "block" (the default, as the log is an audit
+# trail) holds the request until the writer catches up; opting into "drop"
+# skips logging it instead and counts the rows
+PREDICTION_LOG_DIR = os.environ.get("SCORING_PREDICTION_LOG_DIR")
+PREDICTION_LOG_POLICY = os.environ.get("SCORING_PREDICTION_LOG_POLICY", "block")
+PREDICTION_LOG_CAPACITY = int(os.environ.get("SCORING_PREDICTION_LOG_CAPACITY", "65536"))
+PREDICTION_LOG_ROTATE_ROWS = int(os.environ.get("SCORING_PREDICTION_LOG_ROTATE_ROWS", "1000000"))
+PREDICTION_LOG_NICE = int(os.environ.get("SCORING_PREDICTION_LOG_NICE", str(WRITER_NICE)))
+
+# Scored inputs are summarised per feature for drift_report() and
+# GET /score?drift, against the drift_profile.json train.py writes next to
+# the model. SCORING_DRIFT=0 turns the summaries off
+DRIFT_ENABLED = os.environ.get("SCORING_DRIFT", "1") != "0"
+
+# On-demand sampling profiler: SCORING_PROFILE="30s" or "200" (requests, for
+# at most profiler.MAX_SESSION_S) starts one at the end of init(). Requests
+# can start one with "profile" (or the X-Scoring-Profile header) only when
+# SCORING_PROFILE_DIR is set. Output is a collapsed-stack file and a
+# tracemalloc summary in that directory
+PROFILE = os.environ.get("SCORING_PROFILE")
+PROFILE_DIR = os.environ.get("SCORING_PROFILE_DIR")
+PROFILE_HEADER = "X-Scoring-Profile"
+PROFILER = None
+_PROFILE_LOCK = threading.Lock()
+
+# The fast path hands sklearn a bare array in training column order
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+
+def resolve_model_dir() -> Path:
     model_dir = Path(
         # Azure ML sets AZUREML_MODEL_DIR for online endpoints
         # fallback to local "model" folder for dev testing
@@ -19,34 +154,471 @@ def init():
     azure_model_dir = Path(
         # environment variable is optional in local runs
         # avoid KeyError for local testing
-        __import__("os").environ.get("AZUREML_MODEL_DIR", str(model_dir))
+        os.environ.get("AZUREML_MODEL_DIR", str(model_dir))
     )
-    model_path = azure_model_dir / "model.joblib"
-    if not model_path.exists():
-        raise FileNotFoundError(f"Model not found at {model_path}")
-    MODEL = joblib.load(model_path)
+    return Path(os.environ.get("SCORING_MODEL_DIR", str(azure_model_dir)))
 
 
-def run(raw_data):
-    if MODEL is None:
-        init()
+def load_scorer(azure_model_dir: Path, mmap: bool = True):
+    config = load_scoring_config(azure_model_dir)
+    engine = ENGINE or config.get("engine") or ("compiled" if (azure_model_dir / FOREST_FILE).exists() else "sklearn")
+    model, feature_columns = load_backend(engine, azure_model_dir, mmap)
+    # SCORING_DECISION_THRESHOLD moves the operating point without retraining
+    threshold = resolve_threshold(config, os.environ.get("SCORING_DECISION_THRESHOLD"))
+    exact_model = model
+    if EARLY_EXIT and isinstance(model, CompiledForest):
+        early_exit = config.get("early_exit")
+        if early_exit is None:
+            raise ValueError(f"SCORING_EARLY_EXIT needs early_exit margins in {azure_model_dir / SCORING_CONFIG_FILE}")
+        model = EarlyExitForest(model, threshold, early_exit["margins"], early_exit["chunk_trees"])
+    # onnxruntime already spreads a batch over its own intra-op threads
+    if POOL is not None and engine != "onnx":
+        engine = "compiled" if isinstance(model, (CompiledForest, EarlyExitForest)) else "sklearn"
+        min_rows = resolve_min_rows(config, engine, PARALLEL_MIN_ROWS)
+        if min_rows > 0:
+            model = ParallelScorer(model, min_rows, POOL, PARALLEL_WORKERS)
+    table_path = azure_model_dir / SCORE_TABLE_FILE
+    if TABLE_MODE != "off" and feature_columns is not None:
+        table = None
+        if table_path.exists():
+            table = load_score_table(table_path, mmap=mmap)
+            if table.feature_names != feature_columns:
+                raise ValueError(f"{table_path} was built for different feature columns")
+        elif TABLE_MODE == "build":
+            table = build_score_table(exact_model, feature_columns)
+        if table is not None:
+            model = TabulatedModel(table, model)
+    student_path = azure_model_dir / STUDENT_FILE
+    student = load_student(student_path) if student_path.exists() else None
+    if student is not None and student.feature_names != feature_columns:
+        raise ValueError(f"{student_path} was trained on different feature columns")
+    return model, feature_columns, threshold, student
 
-    if isinstance(raw_data, str):
-        payload = json.loads(raw_data)
+
+def activate(model, threshold, student=None) -> None:
+    global ACTIVE, MODEL, DECISION_THRESHOLD
+    # One reference assignment, so a request sees either the old or the new version
+    ACTIVE = (model, threshold, student)
+    MODEL = model
+    DECISION_THRESHOLD = threshold
+
+
+def init():
+    global FEATURE_COLUMNS, BATCHER, WATCHER, REGISTRY, POOL, PREDICTION_LOG, DRIFT, DRIFT_REFERENCE
+    # Stopped and joined before taking _INIT_LOCK: the watcher thread may be
+    # inside reload_model() waiting for that lock
+    watcher, WATCHER = WATCHER, None
+    if watcher is not None:
+        watcher.stop()
+    with _INIT_LOCK:
+        # One started by a concurrent init() meanwhile is stopped after the lock is released
+        stale, WATCHER = WATCHER, None
+        load_started = time.perf_counter()
+        if POOL is None and PARALLEL_WORKERS > 1:
+            POOL = make_pool(PARALLEL_WORKERS)
+        model_dir = resolve_model_dir()
+        # Files replaced under a live memory map can fault the process, so
+        # hot-reloaded versions are read into private memory instead
+        model, FEATURE_COLUMNS, threshold, student = load_scorer(model_dir, mmap=RELOAD_INTERVAL_S <= 0)
+        if BATCHER is None and BATCH_WINDOW_MS > 0:
+            BATCHER = MicroBatcher(score_batch, BATCH_WINDOW_MS, BATCH_MAX_ROWS)
+        if DRIFT is None and DRIFT_ENABLED and FEATURE_COLUMNS is not None:
+            DRIFT_REFERENCE = load_drift_reference(model_dir)
+            DRIFT = DriftSketch.from_profile(DRIFT_REFERENCE) if DRIFT_REFERENCE is not None else DriftSketch(FEATURE_COLUMNS)
+        COLD_START["load_ms"] = (time.perf_counter() - load_started) * 1000.0
+
+        warmup_started = time.perf_counter()
+        warm_up(model, threshold, WARMUP_ROWS)
+        warm_up(student, threshold, WARMUP_ROWS)
+        COLD_START["warmup_ms"] = (time.perf_counter() - warmup_started) * 1000.0
+        activate(model, threshold, student)
+        if RELOAD_INTERVAL_S > 0:
+            WATCHER = DirectoryWatcher(model_dir, RELOAD_FILES, reload_model, RELOAD_INTERVAL_S)
+        REGISTRY = ModelRegistry(MODELS_DIR, load_selectable, int(MODELS_MAX_MB * 2**20)) if MODELS_DIR else None
+        if PREDICTION_LOG is None and PREDICTION_LOG_DIR:
+            PREDICTION_LOG = PredictionLog(
+                PREDICTION_LOG_DIR,
+                FEATURE_COLUMNS,
+                capacity_rows=PREDICTION_LOG_CAPACITY,
+                policy=PREDICTION_LOG_POLICY,
+                rotate_rows=PREDICTION_LOG_ROTATE_ROWS,
+                nice=PREDICTION_LOG_NICE,
+            )
+    if stale is not None:
+        stale.stop()
+    if PROFILE:
+        start_profile(PROFILE)
+    print(
+        f"score.py cold start: import={COLD_START['import_ms']:.1f}ms load={COLD_START['load_ms']:.1f}ms "
+        f"warmup={COLD_START['warmup_ms']:.1f}ms ({WARMUP_ROWS} rows)"
+    )
+
+
+def load_drift_reference(model_dir: Path):
+    profile_path = model_dir / DRIFT_PROFILE_FILE
+    return load_profile(profile_path) if profile_path.exists() else None
+
+
+def reload_model(model_dir: Path) -> None:
+    # Called on the watcher thread. Requests keep scoring with the current
+    # pair while the new version loads and warms up, then switch to it
+    global DRIFT_REFERENCE
+    with _INIT_LOCK:
+        started = time.perf_counter()
+        model, feature_columns, threshold, student = load_scorer(model_dir, mmap=False)
+        if feature_columns != FEATURE_COLUMNS:
+            raise ValueError("New model expects different feature columns, redeploy it instead")
+        loaded = time.perf_counter()
+        warm_up(model, threshold, WARMUP_ROWS)
+        warm_up(student, threshold, WARMUP_ROWS)
+        activate(model, threshold, student)
+        if DRIFT is not None:
+            DRIFT_REFERENCE = load_drift_reference(model_dir)
+    print(
+        f"score.py reloaded {model_dir}: load={(loaded - started) * 1000.0:.1f}ms "
+        f"warmup={(time.perf_counter() - loaded) * 1000.0:.1f}ms"
+    )
+
+
+def model_nbytes(model, model_dir: Path) -> int:
+    # sklearn pipelines and ONNX sessions have no nbytes, so the pickle size stands in
+    nbytes = 0
+    if isinstance(model, TabulatedModel):
+        nbytes, model = model.table.nbytes, model.model
+    if hasattr(model, "nbytes"):
+        return nbytes + model.nbytes
+    return nbytes + (model_dir / MODEL_FILE).stat().st_size
+
+
+def load_selectable(model_dir: Path):
+    # Selected versions reuse the default model's decoders, so they must
+    # expect the same feature columns
+    model, feature_columns, threshold, student = load_scorer(model_dir, mmap=RELOAD_INTERVAL_S <= 0)
+    if feature_columns != FEATURE_COLUMNS:
+        raise ValueError(f"Model {model_dir.name!r} expects different feature columns than the default model")
+    warm_up(model, threshold, WARMUP_ROWS)
+    warm_up(student, threshold, WARMUP_ROWS)
+    nbytes = model_nbytes(model, model_dir)
+    if student is not None:
+        nbytes += (model_dir / STUDENT_FILE).stat().st_size
+    return (model, threshold, student), nbytes
+
+
+def touch_pages(model) -> int:
+    # Reads one byte per page of every array the scorer holds so that
+    # memory-mapped sidecars are faulted in before the first request
+    parts = []
+    while model is not None:
+        parts += [model, getattr(model, "table", None)]
+        model = getattr(model, "model", None)
+    checksum = 0
+    for part in parts:
+        if part is None or not hasattr(part, "__dataclass_fields__"):
+            continue
+        for item in fields(part):
+            value = getattr(part, item.name)
+            if isinstance(value, np.ndarray) and value.flags.c_contiguous and value.nbytes:
+                checksum += int(value.reshape(-1).view(np.uint8)[::4096].sum())
+    return checksum
+
+
+def warm_up(model, threshold, n_rows: int) -> None:
+    # Sends a synthetic request through the same decode, predict and encode
+    # steps as run() so first-call allocations happen before readiness
+    if model is None or n_rows <= 0:
+        return
+    if FEATURE_COLUMNS is not None:
+        records = [dict.fromkeys(FEATURE_COLUMNS, 0.0)] * n_rows
     else:
-        payload = raw_data
+        n_features = getattr(model, "n_features_in_", None) or model.n_features
+        records = [[0.0] * n_features] * n_rows
+    touch_pages(model)
+    preds, probs = predict_scores(model, decode_features({"data": records}), threshold)
+    dumps_json(preds, probs, JSON_STYLE, RESPONSE_FIELDS)
+    response_dict(preds, probs, RESPONSE_FIELDS)
+    # Keep the warm-up out of the counters operators read
+    while model is not None:
+        if isinstance(model, (TabulatedModel, EarlyExitForest)):
+            model.reset_stats()
+        model = getattr(model, "model", None)
+
+
+def score_batch(X):
+    model, threshold, _ = ACTIVE
+    return predict_scores(model, X, threshold)
+
+
+def batch_stats():
+    return BATCHER.stats() if BATCHER is not None else None
 
+
+def reload_stats():
+    return WATCHER.stats() if WATCHER is not None else None
+
+
+def prediction_log_stats():
+    return PREDICTION_LOG.stats() if PREDICTION_LOG is not None else None
+
+
+def drift_snapshot():
+    return DRIFT.snapshot() if DRIFT is not None else None
+
+
+def drift_report():
+    # PSI/KS per feature of the inputs scored so far against the training profile
+    if DRIFT is None or DRIFT_REFERENCE is None:
+        return None
+    return compare_profiles(DRIFT_REFERENCE, DRIFT.snapshot())
+
+
+def early_exit_stats():
+    model = MODEL
+    while model is not None and not isinstance(model, EarlyExitForest):
+        model = getattr(model, "model", None)
+    return model.stats() if model is not None else None
+
+
+def model_stats():
+    return REGISTRY.stats() if REGISTRY is not None else None
+
+
+def extract_records(payload: dict):
     records = payload.get("data") or payload.get("inputs") or payload.get("instances")
     if records is None:
         raise ValueError("Request must include 'data', 'inputs', or 'instances'.")
+    return records
+
+
+def records_to_frame(records, columns=None, timer=None):
+    # pandas is only needed when a payload misses the array fast path
+    import pandas as pd
+
+    df = pd.DataFrame(records, columns=columns)
+    if timer is not None:
+        timer.mark("frame")
+    df = df.apply(pd.to_numeric, errors="coerce")
+    if timer is not None:
+        timer.mark("coerce")
+    return df
+
+
+def records_to_array(records, columns=None):
+    # Returns None whenever the payload needs the pandas path to keep its semantics
+    if FEATURE_COLUMNS is None or not isinstance(records, list) or not records:
+        return None
+    n_features = len(FEATURE_COLUMNS)
+    first = records[0]
+    try:
+        if isinstance(first, dict):
+            rows = []
+            for record in records:
+                if len(record) != n_features:
+                    return None
+                rows.append([record[name] for name in FEATURE_COLUMNS])
+            X = np.array(rows, dtype=np.float32)
+        elif isinstance(first, (list, tuple)):
+            X = np.array(records, dtype=np.float32)
+            if X.ndim != 2:
+                return None
+            if columns is not None:
+                if len(columns) != X.shape[1] or set(columns) != set(FEATURE_COLUMNS):
+                    return None
+                if list(columns) != FEATURE_COLUMNS:
+                    X = X[:, [columns.index(name) for name in FEATURE_COLUMNS]]
+            elif X.shape[1] != n_features:
+                return None
+        else:
+            return None
+    except (KeyError, TypeError, ValueError):
+        return None
+    return np.ascontiguousarray(X)
+
+
+def decode_features(payload: dict, timer=None):
+    records = extract_records(payload)
+    columns = payload.get("columns")
+    if isinstance(records, list) and records and isinstance(records[0], dict):
+        columns = None
+    if FAST_PATH:
+        X = records_to_array(records, columns)
+        if timer is not None:
+            timer.mark("decode")
+        if X is not None:
+            return X
+    return records_to_frame(records, columns, timer)
+
+
+def fill_missing(X):
+    # Missing and unparseable values score as 0. Decoders leave them as NaN so
+    # DRIFT counts them first; a new object is returned rather than filling in
+    # place, since DRIFT keeps the raw batch until its next fold
+    if hasattr(X, "columns"):
+        return X.fillna(0)
+    missing = np.isnan(X)
+    return np.where(missing, np.float32(0), X) if missing.any() else X
+
+
+def predict(X, selector=None, tier=None):
+    tier = TIER if tier is None else tier
+    if tier not in TIERS:
+        raise ValueError(f"Unknown tier {tier!r}, expected one of {TIERS}")
+    if selector is not None:
+        if REGISTRY is None:
+            raise ValueError("Model selection is disabled, set SCORING_MODELS_DIR to enable it")
+        # Selected versions are scored directly, the batcher only serves the default model
+        model, threshold, student = REGISTRY.get(str(selector))
+    elif tier == "full":
+        if BATCHER is not None and isinstance(X, np.ndarray):
+            return BATCHER.submit(X)
+        return score_batch(X)
+    else:
+        model, threshold, student = ACTIVE
+    if tier == "student":
+        if student is None:
+            raise ValueError(f"The student tier needs {STUDENT_FILE} next to the model")
+        model = student
+    return predict_scores(model, X, threshold)
+
+
+def start_profile(budget) -> ProfileSession:
+    # A session that is still running is kept rather than restarted
+    global PROFILER
+    with _PROFILE_LOCK:
+        if PROFILER is None or PROFILER.finished:
+            seconds, requests = parse_budget(budget)
+            PROFILER = ProfileSession(PROFILE_DIR or DEFAULT_PROFILE_DIR, seconds, requests).start()
+        return PROFILER
+
+
+def profile_request() -> None:
+    global PROFILER
+    profiler = PROFILER
+    if profiler is not None and profiler.request_done():
+        PROFILER = None
+
+
+def metrics_text() -> str:
+    text = METRICS.render() if METRICS is not None else ""
+    if PREDICTION_LOG is not None:
+        stats = PREDICTION_LOG.stats()
+        lines = [
+            "# HELP scoring_prediction_log_rows_total Scored rows handed to the prediction log",
+            "# TYPE scoring_prediction_log_rows_total counter",
+        ]
+        for outcome in ("logged", "dropped", "written", "failed"):
+            lines.append(f'scoring_prediction_log_rows_total{{outcome="{outcome}"}} {stats[outcome + "_rows"]}')
+        text += "\n".join(lines) + "\n"
+    return text
+
+
+def error_response(message: str, status: int, headers=None):
+    return AMLResponse(json.dumps({"error": message}), status, {"Content-Type": JSON_CONTENT_TYPE, **(headers or {})})
+
+
+def run_http(request):
+    if request.method == "GET" and "metrics" in request.args:
+        return AMLResponse(metrics_text(), 200, {"Content-Type": PROMETHEUS_CONTENT_TYPE})
+    if request.method == "GET" and "drift" in request.args:
+        body = json.dumps({"report": drift_report(), "snapshot": drift_snapshot()})
+        return AMLResponse(body, 200, {"Content-Type": JSON_CONTENT_TYPE})
+    if request.method != "POST":
+        # Rejected before scoring, so they do not count as scoring errors
+        return error_response(f"{request.method} /score only serves ?metrics and ?drift, score with POST", 405, {"Allow": "POST"})
+    body = request.get_data()
+    if not body:
+        return error_response("Request body is empty", 400)
+
+    # Binary bodies are chosen by Content-Type and binary responses by Accept;
+    # anything else is treated as JSON, as before
+    if PROFILE_DIR is not None and request.headers.get(PROFILE_HEADER):
+        start_profile(request.headers.get(PROFILE_HEADER))
+
+    timer = StageTimer()
+    content_type = media_type(request.headers.get("Content-Type"))
+    route = ROUTES.get(content_type, "json")
+    try:
+        accept = media_type(request.headers.get("Accept"))
+        response_fields = RESPONSE_FIELDS
+        selector = request.headers.get(MODEL_HEADER)
+        tier = request.headers.get(TIER_HEADER)
+        if content_type in DECODERS:
+            timer.mark("parse")
+            raw = DECODERS[content_type](body, FEATURE_COLUMNS)
+            timer.mark("decode")
+        else:
+            payload = loads_json(body)
+            timer.mark("parse")
+            response_fields = payload.get("response_fields", response_fields)
+            selector = payload.get("model", selector)
+            tier = payload.get("tier", tier)
+            raw = decode_features(payload, timer)
+        X = fill_missing(raw)
+
+        preds, probs = predict(X, selector, tier)
+        timer.mark("predict")
+        if PREDICTION_LOG is not None:
+            PREDICTION_LOG.log(X, preds, probs, selector or "default", tier or TIER)
+        if DRIFT is not None:
+            DRIFT.update(raw)
+
+        if accept in ENCODERS:
+            response = AMLResponse(ENCODERS[accept](preds, probs), 200, {"Content-Type": accept})
+        else:
+            response = AMLResponse(dumps_json(preds, probs, JSON_STYLE, response_fields), 200, {"Content-Type": JSON_CONTENT_TYPE})
+        timer.mark("serialize")
+    except Exception:
+        if METRICS is not None:
+            METRICS.count_error(route)
+        raise
+    if METRICS is not None:
+        METRICS.observe(timer, len(X), route)
+    if PROFILER is not None:
+        profile_request()
+    return response
+
+
+def run(raw_data):
+    if ACTIVE is None:
+        with _INIT_LOCK:
+            if ACTIVE is None:
+                init()
+
+    if hasattr(raw_data, "get_data"):
+        return run_http(raw_data)
+
+    timer = StageTimer()
+    try:
+        if isinstance(raw_data, (str, bytes)):
+            payload = loads_json(raw_data)
+        else:
+            payload = raw_data
+        timer.mark("parse")
+        if PROFILE_DIR is not None and "profile" in payload:
+            start_profile(payload["profile"])
+
+        raw = decode_features(payload, timer)
+        X = fill_missing(raw)
+        selector, tier = payload.get("model"), payload.get("tier")
+        preds, probs = predict(X, selector, tier)
+        timer.mark("predict")
+        if PREDICTION_LOG is not None:
+            PREDICTION_LOG.log(X, preds, probs, selector or "default", tier or TIER)
+        if DRIFT is not None:
+            DRIFT.update(raw)
+        result = response_dict(preds, probs, payload.get("response_fields", RESPONSE_FIELDS))
+        timer.mark("serialize")
+    except Exception:
+        if METRICS is not None:
+            METRICS.count_error("json")
+        raise
+    if METRICS is not None:
+        METRICS.observe(timer, len(X), "json")
+    if PROFILER is not None:
+        profile_request()
+    return result
 
-    df = pd.DataFrame(records)
-    df = df.apply(pd.to_numeric, errors="coerce").fillna(0)
 
-    preds = MODEL.predict(df)
-    probs = MODEL.predict_proba(df)[:, 1]
+if rawhttp is not None:
+    run = rawhttp(run)
 
-    return {
-        "predictions": preds.tolist(),
-        "probabilities": np.round(probs, 6).tolist(),
-    }
+COLD_START["import_ms"] = (time.perf_counter() - _IMPORT_STARTED) * 1000.0
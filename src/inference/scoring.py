@@ -0,0 +1,42 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+SCORING_CONFIG_FILE = "scoring.json"
+DEFAULT_DECISION_THRESHOLD = 0.5
+
+
+def load_scoring_config(model_dir: Path) -> dict:
+    config_path = Path(model_dir) / SCORING_CONFIG_FILE
+    if not config_path.exists():
+        return {}
+    return json.loads(config_path.read_text(encoding="utf-8"))
+
+
+def write_scoring_config(model_dir: Path, **values) -> Path:
+    config = load_scoring_config(model_dir)
+    config.update(values)
+    config_path = Path(model_dir) / SCORING_CONFIG_FILE
+    config_path.write_text(json.dumps(config, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    return config_path
+
+
+def resolve_threshold(config: dict, override=None) -> float:
+    threshold = override if override is not None else config.get("decision_threshold", DEFAULT_DECISION_THRESHOLD)
+    threshold = float(threshold)
+    if not 0.0 <= threshold <= 1.0:
+        raise ValueError(f"Decision threshold must be within [0, 1], got {threshold}")
+    return threshold
+
+
+def labels_from_proba(proba: np.ndarray, classes: np.ndarray, threshold: float = DEFAULT_DECISION_THRESHOLD) -> np.ndarray:
+    # p1 - p0 > 2t - 1 is p1 > t for normalised rows, and at t=0.5 it is exactly
+    # the argmax rule sklearn's predict() uses, ties included
+    positive = (proba[:, 1] - proba[:, 0]) > (2.0 * threshold - 1.0)
+    return classes[positive.astype(np.intp)]
+
+
+def predict_scores(model, X, threshold: float = DEFAULT_DECISION_THRESHOLD):
+    proba = model.predict_proba(X)
+    return labels_from_proba(proba, model.classes_, threshold), proba[:, 1]
@@ -0,0 +1,145 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from forest import _round_down_float32, _sibling_order, compile_forest, walk_trees
+
+STUDENT_FILE = "student.joblib"
+STUDENT_KINDS = ("tree", "gbm")
+
+
+@dataclass
+class StudentModel:
+    # Small regressor fit to the forest's positive-class probability, flattened
+    # into the same sibling-ordered node arrays as CompiledForest so loading it
+    # needs neither sklearn nor pandas. value holds each leaf's output; the
+    # positive probability is baseline plus the leaf values of every tree,
+    # added in fit order, clipped to [0, 1]. It imputes with the forest's
+    # medians and answers predict_proba in the forest's class order, so it
+    # drops in wherever the forest is scored
+    feature: np.ndarray
+    threshold: np.ndarray
+    left: np.ndarray
+    value: np.ndarray
+    roots: np.ndarray
+    max_depth: int
+    baseline: float
+    medians: np.ndarray
+    classes_: np.ndarray
+    feature_names: list | None = None
+
+    def _prepare(self, X) -> np.ndarray:
+        if hasattr(X, "columns"):
+            if self.feature_names is not None and [str(name) for name in X.columns] != self.feature_names:
+                X = X[self.feature_names]
+            X = X.to_numpy()
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != len(self.medians):
+            raise ValueError(f"Expected input with {len(self.medians)} features, got shape {X.shape}")
+        missing = np.isnan(X)
+        if missing.any():
+            X = np.where(missing, self.medians.astype(np.float32), X)
+        return np.ascontiguousarray(X)
+
+    def predict_proba(self, X) -> np.ndarray:
+        X = self._prepare(X)
+        values = self.value[walk_trees(self, X, self.roots)]
+        # Same left-to-right summation from the baseline as sklearn's regressors
+        positive = np.cumsum(np.vstack([np.full(X.shape[0], self.baseline), values]), axis=0)[-1]
+        positive = np.clip(positive, 0.0, 1.0)
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+def _regressor_trees(regressor) -> tuple:
+    # (children_left, children_right, feature, threshold, value) per tree and
+    # the baseline. Both regressors send x <= threshold left
+    from sklearn.ensemble import HistGradientBoostingRegressor
+    from sklearn.tree import DecisionTreeRegressor
+
+    if isinstance(regressor, DecisionTreeRegressor):
+        tree = regressor.tree_
+        return [(tree.children_left, tree.children_right, tree.feature, tree.threshold, tree.value[:, 0, 0])], 0.0
+    if isinstance(regressor, HistGradientBoostingRegressor):
+        trees = []
+        for (predictor,) in regressor._predictors:
+            nodes = predictor.nodes
+            if nodes["is_categorical"].any():
+                raise TypeError("Cannot compile a student with categorical splits")
+            is_leaf = nodes["is_leaf"].astype(bool)
+            children_left = np.where(is_leaf, -1, nodes["left"].astype(np.int64))
+            children_right = np.where(is_leaf, -1, nodes["right"].astype(np.int64))
+            trees.append((children_left, children_right, nodes["feature_idx"], nodes["num_threshold"], nodes["value"]))
+        return trees, float(np.asarray(regressor._baseline_prediction).ravel()[0])
+    raise TypeError(f"Cannot compile student regressor of type {type(regressor).__name__}")
+
+
+def compile_student(regressor, medians: np.ndarray, classes: np.ndarray, feature_names=None) -> StudentModel:
+    trees, baseline = _regressor_trees(regressor)
+    features, thresholds, lefts, values, roots = [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for children_left, children_right, feature, threshold, value in trees:
+        order, left = _sibling_order(children_left, children_right)
+        is_leaf = children_left[order] == -1
+        features.append(np.where(is_leaf, 0, feature[order]).astype(np.intp))
+        thresholds.append(_round_down_float32(np.where(is_leaf, np.inf, threshold[order])))
+        lefts.append((left + offset).astype(np.intp))
+        values.append(np.asarray(value, dtype=np.float64)[order])
+        roots.append(offset)
+        offset += len(order)
+        max_depth = max(max_depth, _depth(children_left, children_right))
+    return StudentModel(
+        feature=np.concatenate(features),
+        threshold=np.concatenate(thresholds),
+        left=np.concatenate(lefts),
+        value=np.concatenate(values),
+        roots=np.asarray(roots, dtype=np.intp),
+        max_depth=int(max_depth),
+        baseline=baseline,
+        medians=np.asarray(medians, dtype=np.float64),
+        classes_=np.asarray(classes),
+        feature_names=feature_names,
+    )
+
+
+def _depth(children_left: np.ndarray, children_right: np.ndarray) -> int:
+    depth = np.zeros(len(children_left), dtype=np.intp)
+    for node in range(len(children_left)):
+        if children_left[node] != -1:
+            depth[children_left[node]] = depth[children_right[node]] = depth[node] + 1
+    return int(depth.max())
+
+
+def fit_student(teacher, X, kind: str = "tree", max_depth: int = 6, random_state: int = 42) -> StudentModel:
+    from sklearn.ensemble import HistGradientBoostingRegressor
+    from sklearn.tree import DecisionTreeRegressor
+
+    if kind not in STUDENT_KINDS:
+        raise ValueError(f"Unknown student kind {kind!r}, expected one of {STUDENT_KINDS}")
+    forest = compile_forest(teacher)
+    if len(forest.classes_) != 2:
+        raise ValueError("Distillation needs a binary classifier")
+    if kind == "tree":
+        regressor = DecisionTreeRegressor(max_depth=max_depth, random_state=random_state)
+    else:
+        regressor = HistGradientBoostingRegressor(max_depth=max_depth, max_iter=100, random_state=random_state)
+    X = forest._prepare(X)
+    regressor.fit(X, forest.predict_proba(X)[:, 1])
+    return compile_student(regressor, forest.medians, forest.classes_, forest.feature_names)
+
+
+def save_student(student: StudentModel, path: Path) -> Path:
+    joblib.dump(student, path)
+    return Path(path)
+
+
+def load_student(path: Path) -> StudentModel:
+    student = joblib.load(path)
+    if not isinstance(student, StudentModel):
+        raise TypeError(f"{path} does not contain a student model")
+    return student
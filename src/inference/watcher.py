@@ -0,0 +1,95 @@
+import threading
+import time
+from pathlib import Path
+
+
+class DirectoryWatcher:
+    # Polls size and mtime of the given files and calls on_change(directory)
+    # once a new version has stayed unchanged for a whole interval, so files
+    # that are still being copied are not picked up half-written. A failing
+    # on_change is recorded and not retried until the files change again.
+
+    def __init__(self, directory: Path, files, on_change, interval_s: float = 5.0):
+        if interval_s <= 0:
+            raise ValueError("interval_s must be > 0")
+        self.directory = Path(directory)
+        self.files = tuple(files)
+        self.on_change = on_change
+        self.interval = interval_s
+        self._current = self.fingerprint()
+        self._pending = None
+        self._poll_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._checks = 0
+        self._reloads = 0
+        self._failures = 0
+        self._last_error = None
+        self._last_reload_ms = None
+        self._last_reload_at = None
+        self._stop = threading.Event()
+        self._worker = threading.Thread(target=self._loop, name="score-model-watcher", daemon=True)
+        self._worker.start()
+
+    def fingerprint(self) -> tuple:
+        entries = []
+        for name in self.files:
+            try:
+                stat = (self.directory / name).stat()
+            except FileNotFoundError:
+                continue
+            entries.append((name, stat.st_mtime_ns, stat.st_size))
+        return tuple(entries)
+
+    def poll(self) -> bool:
+        with self._poll_lock:
+            return self._poll()
+
+    def _poll(self) -> bool:
+        seen = self.fingerprint()
+        with self._stats_lock:
+            self._checks += 1
+        if seen == self._current:
+            self._pending = None
+            return False
+        if seen != self._pending:
+            self._pending = seen
+            return False
+        self._pending = None
+        self._current = seen
+        start = time.perf_counter()
+        try:
+            self.on_change(self.directory)
+        except Exception as error:
+            with self._stats_lock:
+                self._failures += 1
+                self._last_error = f"{type(error).__name__}: {error}"
+            return False
+        finished = time.perf_counter()
+        with self._stats_lock:
+            self._reloads += 1
+            self._last_error = None
+            self._last_reload_ms = (finished - start) * 1000.0
+            self._last_reload_at = finished
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._worker is not threading.current_thread():
+            self._worker.join()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "directory": str(self.directory),
+                "interval_s": self.interval,
+                "checks": self._checks,
+                "reloads": self._reloads,
+                "failures": self._failures,
+                "last_error": self._last_error,
+                "last_reload_ms": self._last_reload_ms,
+                "last_reload_at": self._last_reload_at,
+            }
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.poll()
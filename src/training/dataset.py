@@ -0,0 +1,190 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+
+DATA_FORMATS = ("parquet", "csv")
+# compact: float32 features with int8 for small-integer columns; float64: the previous layout
+INGEST_MODES = ("compact", "float64")
+# Temporary column holding the label while rows are grouped
+DEDUPE_LABEL = "__label__"
+# Files and batches decoded ahead of the consumer while streaming into arrays
+FRAGMENT_READAHEAD = 4
+BATCH_READAHEAD = 2
+
+
+def _format(data_path: Path) -> tuple:
+    # A folder is read as its top-level *.parquet files, or *.csv when it has none
+    if data_path.is_dir():
+        for fmt in DATA_FORMATS:
+            files = sorted(data_path.glob(f"*.{fmt}"))
+            if files:
+                return fmt, files
+        raise FileNotFoundError(f"No parquet or csv files found in {data_path}")
+    fmt = data_path.suffix.lower().lstrip(".")
+    if fmt not in DATA_FORMATS:
+        raise ValueError(f"Unsupported data format: {data_path}")
+    return fmt, [data_path]
+
+
+def _csv_format() -> ds.CsvFileFormat:
+    return ds.CsvFileFormat(read_options=pacsv.ReadOptions(use_threads=True))
+
+
+def scan_dataset(data_path: Path) -> ds.Dataset:
+    fmt, files = _format(Path(data_path))
+    return ds.dataset([str(file) for file in files], format=_csv_format() if fmt == "csv" else "parquet")
+
+
+def scan_schema(data_path: Path) -> pa.Schema:
+    return scan_dataset(data_path).schema
+
+
+def load_table(data_path: Path, columns=None, use_threads: bool = True) -> pa.Table:
+    # Files are scanned concurrently and only the requested columns are read.
+    # The result keeps one chunk per file, nothing is concatenated
+    data_path = Path(data_path)
+    dataset = scan_dataset(data_path)
+    missing = sorted(set(columns or []) - set(dataset.schema.names))
+    if missing:
+        raise ValueError(f"Columns {missing} not found in dataset columns")
+    fmt, files = _format(data_path)
+    if fmt == "csv" and len(files) == 1:
+        # One big CSV is split into blocks parsed on Arrow's thread pool
+        return pacsv.read_csv(
+            files[0],
+            read_options=pacsv.ReadOptions(use_threads=use_threads),
+            convert_options=pacsv.ConvertOptions(include_columns=list(columns or [])),
+        )
+    return dataset.to_table(columns=list(columns) if columns is not None else None, use_threads=use_threads)
+
+
+def load_dataset(data_path: Path, columns=None) -> pd.DataFrame:
+    # Arrow buffers are released column by column as pandas takes them over
+    return load_table(data_path, columns).to_pandas(split_blocks=True, self_destruct=True)
+
+
+def _to_numpy(array: pa.Array, dtype) -> np.ndarray:
+    # Nulls and unparseable values become NaN, as with pd.to_numeric(errors="coerce")
+    if pa.types.is_integer(array.type) or pa.types.is_floating(array.type) or pa.types.is_boolean(array.type):
+        return array.cast(pa.float64()).to_numpy(zero_copy_only=False)
+    return pd.to_numeric(array.to_pandas(), errors="coerce").to_numpy(dtype=dtype)
+
+
+def table_to_array(table: pa.Table, columns=None, dtype=np.float64) -> np.ndarray:
+    # Fills one C-ordered matrix chunk by chunk, so each value is copied once
+    columns = table.column_names if columns is None else list(columns)
+    X = np.empty((table.num_rows, len(columns)), dtype=dtype)
+    for index, name in enumerate(columns):
+        offset = 0
+        for chunk in table.column(name).chunks:
+            X[offset : offset + len(chunk), index] = _to_numpy(chunk, dtype)
+            offset += len(chunk)
+    return X
+
+
+def load_arrays(data_path: Path, label_col: str, feature_columns=None, dtype=np.float64) -> tuple:
+    # (X, y, feature_columns) for the labelled rows, reading only those columns.
+    # Parquet row counts come from the file footers, so record batches are
+    # streamed straight into the final matrix and no whole table is held
+    data_path = Path(data_path)
+    dataset = scan_dataset(data_path)
+    if feature_columns is None:
+        feature_columns = [name for name in dataset.schema.names if name != label_col]
+    columns = list(feature_columns) + [label_col]
+    missing = sorted(set(columns) - set(dataset.schema.names))
+    if missing:
+        raise ValueError(f"Columns {missing} not found in dataset columns")
+
+    if _format(data_path)[0] == "csv":
+        table = load_table(data_path, columns)
+        X, labels = table_to_array(table, feature_columns, dtype), table.column(label_col)
+        labels = labels.combine_chunks() if labels.num_chunks != 1 else labels.chunk(0)
+        y = _to_numpy(labels, np.float64)
+    else:
+        n_rows = dataset.count_rows()
+        X = np.empty((n_rows, len(feature_columns)), dtype=dtype)
+        y = np.empty(n_rows, dtype=np.float64)
+        offset = 0
+        for batch in dataset.to_batches(columns=columns, fragment_readahead=FRAGMENT_READAHEAD, batch_readahead=BATCH_READAHEAD):
+            end = offset + batch.num_rows
+            for index in range(len(feature_columns)):
+                X[offset:end, index] = _to_numpy(batch.column(index), dtype)
+            y[offset:end] = _to_numpy(batch.column(len(feature_columns)), np.float64)
+            offset = end
+    labelled = ~np.isnan(y)
+    if not labelled.all():
+        X, y = X[labelled], y[labelled]
+    return X, y.astype(int), list(feature_columns)
+
+
+def compact_frame(X: np.ndarray, columns) -> pd.DataFrame:
+    # Columns holding only small integers (one-hot flags, ordinal codes) are
+    # stored as int8, the rest stay float32. sklearn converts the frame to a
+    # single float32 matrix, the dtype its trees use anyway, so the model is
+    # fitted on the same values as before
+    data, compacted = {}, False
+    for index, name in enumerate(columns):
+        column = np.ascontiguousarray(X[:, index])
+        data[name] = column
+        # NaN fails both bounds, so only complete columns qualify
+        if len(column) and np.iinfo(np.int8).min <= column.min() and column.max() <= np.iinfo(np.int8).max:
+            small = column.astype(np.int8)
+            if np.array_equal(small, column):
+                data[name], compacted = small, True
+    if not compacted:
+        return pd.DataFrame(X, columns=list(columns), copy=False)
+    return pd.DataFrame(data, columns=list(columns))
+
+
+def load_training_frame(data_path: Path, label_col: str, ingest: str = "compact") -> tuple:
+    # Features as a frame (named, for feature_names_in_) and labels as a Series;
+    # non-numeric values become NaN and all-empty columns are dropped
+    if ingest not in INGEST_MODES:
+        raise ValueError(f"Unknown ingest mode {ingest!r}, expected one of {INGEST_MODES}")
+    if label_col not in scan_schema(data_path).names:
+        raise ValueError(f"Label column '{label_col}' not found in dataset columns")
+    X, y, features = load_arrays(data_path, label_col, dtype=np.float32 if ingest == "compact" else np.float64)
+    # min() is NaN only for columns with gaps, which are then checked in full
+    gaps = np.flatnonzero(np.isnan(X.min(axis=0, initial=np.inf)))
+    empty = [index for index in gaps if np.isnan(X[:, index]).all()]
+    if empty:
+        keep = [index for index in range(X.shape[1]) if index not in empty]
+        X, features = np.ascontiguousarray(X[:, keep]), [features[index] for index in keep]
+    if ingest == "compact":
+        return compact_frame(X, features), pd.Series(y, name=label_col)
+    return pd.DataFrame(X, columns=features, copy=False), pd.Series(y, name=label_col)
+
+
+def deduplicate(X: pd.DataFrame, y: pd.Series) -> tuple:
+    # Identical (features, label) rows collapse into one row and a count.
+    # inverse maps every original row to its unique row; NaN matches NaN
+    frame = X.assign(**{DEDUPE_LABEL: np.asarray(y)})
+    groups = frame.groupby(list(frame.columns), dropna=False, sort=False)
+    inverse = groups.ngroup().to_numpy()
+    first = np.unique(inverse, return_index=True)[1]
+    unique = frame.iloc[first].reset_index(drop=True)
+    counts = np.bincount(inverse, minlength=len(first))
+    return unique.drop(columns=[DEDUPE_LABEL]), pd.Series(unique[DEDUPE_LABEL].to_numpy(), name=y.name), counts, inverse
+
+
+def weighted_median(X: pd.DataFrame, weights: np.ndarray) -> np.ndarray:
+    # Per-column median of the rows each repeated weights times, ignoring NaN,
+    # as SimpleImputer(strategy="median") computes it on the expanded rows
+    dtype = np.result_type(*X.dtypes)
+    medians = np.full(X.shape[1], np.nan)
+    for index, name in enumerate(X.columns):
+        values = X[name].to_numpy(dtype=dtype)
+        present = ~np.isnan(values)
+        order = np.argsort(values[present], kind="stable")
+        values, cumulative = values[present][order], np.cumsum(np.asarray(weights)[present][order])
+        if not len(values):
+            continue
+        total = int(cumulative[-1])
+        low = values[np.searchsorted(cumulative, (total - 1) // 2, side="right")]
+        high = values[np.searchsorted(cumulative, total // 2, side="right")]
+        medians[index] = np.mean(np.asarray([low, high], dtype=dtype))
+    return medians
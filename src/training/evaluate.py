@@ -1,23 +1,16 @@
 import argparse
+import sys
 from pathlib import Path
 
 import joblib
 import pandas as pd
 from sklearn.metrics import accuracy_score, roc_auc_score
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "inference"))
 
-def load_dataset(data_path: Path) -> pd.DataFrame:
-    if data_path.is_dir():
-        files = list(data_path.glob("*.parquet"))
-        if not files:
-            raise FileNotFoundError(f"No parquet files found in {data_path}")
-        frames = [pd.read_parquet(file) for file in files]
-        return pd.concat(frames, ignore_index=True)
-    if data_path.suffix.lower() == ".parquet":
-        return pd.read_parquet(data_path)
-    if data_path.suffix.lower() == ".csv":
-        return pd.read_csv(data_path)
-    raise ValueError(f"Unsupported data format: {data_path}")
+from dataset import load_dataset  # noqa: E402
+from parallel import ParallelScorer, available_cores, make_pool, resolve_min_rows  # noqa: E402
+from scoring import load_scoring_config, predict_scores, resolve_threshold  # noqa: E402
 
 
 def main() -> None:
@@ -25,16 +18,32 @@ def main() -> None:
     parser.add_argument("--model_dir", required=True, help="Directory containing model.joblib and test.parquet")
     parser.add_argument("--data_path", default=None, help="Optional fallback data path if test.parquet is missing")
     parser.add_argument("--label_col", default="label", help="Label column name")
+    parser.add_argument(
+        "--decision_threshold",
+        type=float,
+        default=None,
+        help="Override the decision threshold stored in scoring.json",
+    )
+    parser.add_argument(
+        "--parallel_min_rows",
+        type=int,
+        default=None,
+        help="Override the calibrated batch size at which scoring is split across cores (0 disables)",
+    )
     args = parser.parse_args()
 
     model_dir = Path(args.model_dir)
     model_path = model_dir / "model.joblib"
     test_path = model_dir / "test.parquet"
 
+    model = joblib.load(model_path)
     if test_path.exists():
         df = pd.read_parquet(test_path)
     elif args.data_path:
-        df = load_dataset(Path(args.data_path))
+        # Only the columns the model was fitted on, plus the label, are read
+        feature_names = getattr(model, "feature_names_in_", None)
+        columns = [str(name) for name in feature_names] + [args.label_col] if feature_names is not None else None
+        df = load_dataset(Path(args.data_path), columns)
     else:
         raise FileNotFoundError("test.parquet not found and no --data_path provided")
 
@@ -46,13 +55,17 @@ def main() -> None:
     X = df.drop(columns=[args.label_col])
     X = X.apply(pd.to_numeric, errors="coerce")
 
-    model = joblib.load(model_path)
-    y_pred = model.predict(X)
-    y_prob = model.predict_proba(X)[:, 1]
+    config = load_scoring_config(model_dir)
+    workers = available_cores()
+    min_rows = resolve_min_rows(config, "sklearn", args.parallel_min_rows)
+    if workers > 1 and min_rows > 0:
+        model = ParallelScorer(model, min_rows, make_pool(workers), workers)
+    threshold = resolve_threshold(config, args.decision_threshold)
+    y_pred, y_prob = predict_scores(model, X, threshold)
 
     acc = accuracy_score(y, y_pred)
     roc_auc = roc_auc_score(y, y_prob)
-    print(f"Accuracy: {acc:.4f}, ROC-AUC: {roc_auc:.4f}")
+    print(f"Accuracy: {acc:.4f}, ROC-AUC: {roc_auc:.4f} (threshold {threshold:.3f})")
 
 
 if __name__ == "__main__":
@@ -1,10 +1,20 @@
 import argparse
+import sys
 from pathlib import Path
 
 import joblib
 import mlflow
 import mlflow.sklearn
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "inference"))
+
+from backends import ONNX_FILE  # noqa: E402
+from drift import DRIFT_PROFILE_FILE  # noqa: E402
+from forest import FOREST_FILE  # noqa: E402
+from lookup import SCORE_TABLE_FILE  # noqa: E402
+from scoring import SCORING_CONFIG_FILE  # noqa: E402
+from student import STUDENT_FILE  # noqa: E402
+
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Register a trained model with MLflow.")
@@ -17,6 +27,11 @@ def main() -> None:
 
     with mlflow.start_run():
         mlflow.sklearn.log_model(model, artifact_path="model")
+        # Scoring sidecars travel with the registered model
+        for sidecar in (SCORING_CONFIG_FILE, FOREST_FILE, ONNX_FILE, SCORE_TABLE_FILE, STUDENT_FILE, DRIFT_PROFILE_FILE):
+            sidecar_path = model_path.parent / sidecar
+            if sidecar_path.exists():
+                mlflow.log_artifact(str(sidecar_path), artifact_path="model")
         run_id = mlflow.active_run().info.run_id
         model_uri = f"runs:/{run_id}/model"
         mlflow.register_model(model_uri, args.model_name)
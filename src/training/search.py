@@ -0,0 +1,284 @@
+import time
+
+import numpy as np
+from joblib import Parallel, delayed
+from scipy.stats import rankdata
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.metrics import check_scoring
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV, ParameterGrid, StratifiedKFold
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.utils import _safe_indexing, check_random_state
+
+# warm_grid: the exhaustive grid, growing each forest once across its n_estimators values
+SEARCH_STRATEGIES = ("grid", "warm_grid", "halving")
+# Budget the halving search grows per round: training rows, or trees per forest
+HALVING_RESOURCES = ("n_samples", "n_estimators")
+PARAM_GRID = {
+    "model__n_estimators": [200, 400],
+    "model__max_depth": [None, 8, 16],
+    "model__min_samples_split": [2, 5],
+}
+CV_FOLDS = 5
+TREES_PARAM = "model__n_estimators"
+
+
+def parse_min_resources(value: str):
+    # "exhaust" and "smallest" are sklearn's own schedules; anything else is a count
+    return value if value in ("exhaust", "smallest") else int(value)
+
+
+def build_search(
+    base_model,
+    strategy: str = "grid",
+    param_grid=None,
+    random_state: int = 42,
+    resource: str = "n_samples",
+    factor: float = 3,
+    min_resources="exhaust",
+    max_resources="auto",
+    n_jobs: int = -1,
+):
+    # Exhaustive GridSearchCV, or successive halving over the same grid: every
+    # candidate starts on min_resources, and each round keeps the best 1/factor
+    # of them while multiplying their budget by factor
+    param_grid = dict(PARAM_GRID if param_grid is None else param_grid)
+    cv = StratifiedKFold(n_splits=CV_FOLDS, shuffle=True, random_state=random_state)
+    if strategy == "grid":
+        return GridSearchCV(base_model, param_grid=param_grid, scoring="roc_auc", cv=cv, n_jobs=n_jobs)
+    if strategy == "warm_grid":
+        return WarmStartGridSearch(base_model, param_grid=param_grid, scoring="roc_auc", cv=cv, n_jobs=n_jobs)
+    if strategy != "halving":
+        raise ValueError(f"Unknown search strategy {strategy!r}, expected one of {SEARCH_STRATEGIES}")
+    if resource not in HALVING_RESOURCES:
+        raise ValueError(f"Unknown halving resource {resource!r}, expected one of {HALVING_RESOURCES}")
+
+    search_class = HalvingGridSearchCV
+    if resource == "n_estimators":
+        # The tree count becomes the budget, so it leaves the grid and the
+        # last round fits the largest forest the grid allowed
+        search_class = TreesHalvingGridSearchCV
+        resource = TREES_PARAM
+        trees = param_grid.pop(resource, None)
+        if max_resources == "auto":
+            max_resources = max(trees) if trees else base_model.get_params()[resource]
+    return search_class(
+        base_model,
+        param_grid=param_grid,
+        scoring="roc_auc",
+        cv=cv,
+        resource=resource,
+        factor=factor,
+        min_resources=min_resources,
+        max_resources=max_resources,
+        random_state=random_state,
+        n_jobs=n_jobs,
+    )
+
+
+class TreesHalvingGridSearchCV(HalvingGridSearchCV):
+    # Successive halving with the tree count as the budget. sklearn truncates
+    # min_resources_ * factor**round, so 400 trees over 6 candidates end on
+    # 133 * 3 = 399 and the winner is refitted with a forest the grid never
+    # had. The round that cannot grow by another factor is snapped to
+    # max_resources_, so the last round lands exactly on it
+
+    def _run_search(self, evaluate_candidates, callback_ctx=None):
+        def evaluate(candidate_params, cv, more_results, **kwargs):
+            n_resources = more_results["n_resources"][0]
+            if n_resources < self.max_resources_ < n_resources * self.factor:
+                for candidate in candidate_params:
+                    candidate[self.resource] = self.max_resources_
+                more_results = dict(more_results, n_resources=[self.max_resources_] * len(candidate_params))
+                self.n_resources_[-1] = self.max_resources_
+            return evaluate_candidates(candidate_params, cv, more_results=more_results, **kwargs)
+
+        # sklearn >= 1.9 hands callback_ctx only to searches that declare it
+        super()._run_search(evaluate, **({} if callback_ctx is None else {"callback_ctx": callback_ctx}))
+
+
+def _count_bootstrap(seed, counts: np.ndarray) -> np.ndarray:
+    # counts.sum() row indices drawn in proportion to counts, the bootstrap of
+    # the original rows. Drawn as sklearn >= 1.9 draws a weighted bootstrap
+    # with max_samples=1.0, so both forests grow the same trees
+    n_draws = max(int(counts.sum()), 1)
+    return check_random_state(seed).choice(len(counts), n_draws, replace=True, p=counts / counts.sum()).astype(np.int32)
+
+
+class CountBootstrapTree(DecisionTreeClassifier):
+    # A CountBootstrapForest tree: sample_weight holds row counts, and the
+    # tree fits on a bootstrap drawn from them with its own random_state
+
+    def _fit(self, X, y, sample_weight=None, **kwargs):
+        draws = np.bincount(_count_bootstrap(self.random_state, sample_weight), minlength=len(sample_weight))
+        return super()._fit(X, y, sample_weight=draws.astype(np.float64), **kwargs)
+
+
+class CountBootstrapForest(RandomForestClassifier):
+    # RandomForestClassifier for deduplicated rows fitted with their copies as
+    # sample_weight. Before sklearn 1.9 a forest bootstraps the unique rows
+    # uniformly whatever their weight; here each tree draws counts.sum() rows
+    # in proportion to the counts, as it would from the repeated rows. Trees
+    # are seeded as sklearn seeds them, so warm starts grow the same forest.
+    # stock_forest() turns the fitted forest back into plain sklearn classes
+
+    def fit(self, X, y, sample_weight=None):
+        self._counts = None
+        if not self.bootstrap or sample_weight is None:
+            return super().fit(X, y, sample_weight=sample_weight)
+        if self.max_samples is not None or self.oob_score or self.class_weight is not None:
+            raise ValueError(
+                "CountBootstrapForest draws counts.sum() rows per tree: max_samples, oob_score and class_weight are not supported"
+            )
+        self._counts = np.asarray(sample_weight, dtype=np.float64)
+        # sklearn's own bootstrap is off while the trees draw theirs
+        self.bootstrap = False
+        try:
+            return super().fit(X, y, sample_weight=self._counts)
+        finally:
+            self.bootstrap = True
+
+    def _validate_estimator(self, default=None):
+        super()._validate_estimator(default)
+        if self._counts is not None:
+            self.estimator_ = CountBootstrapTree()
+
+    def _get_estimators_indices(self):
+        # estimators_samples_, and so in_bag_mask(), see the counted draws
+        if self._counts is None:
+            yield from super()._get_estimators_indices()
+            return
+        for tree in self.estimators_:
+            yield _count_bootstrap(tree.random_state, self._counts)
+
+
+def stock_forest(forest: CountBootstrapForest) -> RandomForestClassifier:
+    # The fitted forest as plain RandomForestClassifier and DecisionTreeClassifier
+    # objects, so model.joblib loads and converts to ONNX without this module.
+    # Its estimators_samples_ no longer follow the counts: take in_bag_mask() first
+    plain = RandomForestClassifier()
+    plain.__dict__.update({name: value for name, value in forest.__dict__.items() if name != "_counts"})
+    plain.estimator_ = DecisionTreeClassifier()
+    plain.estimators_ = []
+    for tree in forest.estimators_:
+        plain.estimators_.append(DecisionTreeClassifier())
+        plain.estimators_[-1].__dict__.update(tree.__dict__)
+    return plain
+
+
+def fold_counts(cv, y, inverse: np.ndarray, n_unique: int) -> np.ndarray:
+    # Copies of each deduplicated row in each CV fold. Folds are drawn over the
+    # original rows, exactly as without deduplication, then tallied per unique row
+    y = np.asarray(y)
+    counts = np.zeros((n_unique, cv.get_n_splits()), dtype=np.int64)
+    for fold, (_, test) in enumerate(cv.split(np.zeros((len(y), 1)), y)):
+        counts[:, fold] = np.bincount(inverse[test], minlength=n_unique)
+    return counts
+
+
+def _step_param(trees_param: str, name: str) -> str:
+    # warm_start or sample_weight of the step that owns the tree count
+    return trees_param.rpartition("__")[0] + "__" + name if "__" in trees_param else name
+
+
+def _grow_forest(estimator, params: dict, trees: list, X, y, fold, scorer, trees_param: str) -> list:
+    # One forest per (parameters, fold), scored each time it reaches a tree count
+    train, test, train_weight, test_weight = fold
+    estimator = clone(estimator).set_params(**params, **{_step_param(trees_param, "warm_start"): True})
+    X_train, y_train = _safe_indexing(X, train), _safe_indexing(y, train)
+    X_test, y_test = _safe_indexing(X, test), _safe_indexing(y, test)
+    fit_params = {} if train_weight is None else {_step_param(trees_param, "sample_weight"): train_weight}
+    score_params = {} if test_weight is None else {"sample_weight": test_weight}
+    scores = []
+    for count in trees:
+        estimator.set_params(**{trees_param: count}).fit(X_train, y_train, **fit_params)
+        scores.append(scorer(estimator, X_test, y_test, **score_params))
+    return scores
+
+
+class WarmStartGridSearch:
+    # GridSearchCV over the same grid, except that candidates differing only
+    # in n_estimators share one forest per fold: it is grown with warm_start
+    # and scored at each tree count. sklearn seeds tree i the same whether it
+    # is added by a warm start or built in one fit, so every score, the
+    # winner and the refitted best_estimator_ equal GridSearchCV's.
+    # With fold_counts (see fold_counts()) the rows are deduplicated: each
+    # fold trains and scores on them weighted by their copies on either side
+
+    def __init__(self, estimator, param_grid, scoring="roc_auc", cv=None, n_jobs=None, trees_param: str = TREES_PARAM):
+        self.estimator = estimator
+        self.param_grid = param_grid
+        self.scoring = scoring
+        self.cv = cv
+        self.n_jobs = n_jobs
+        self.trees_param = trees_param
+
+    def fit(self, X, y, fold_counts=None):
+        candidates = list(ParameterGrid(self.param_grid))
+        if fold_counts is None:
+            splits = [(train, test, None, None) for train, test in self.cv.split(X, y)]
+        else:
+            splits = []
+            for held_out in fold_counts.T:
+                kept = fold_counts.sum(axis=1) - held_out
+                train, test = np.flatnonzero(kept), np.flatnonzero(held_out)
+                splits.append((train, test, kept[train], held_out[test]))
+        scorer = check_scoring(self.estimator, scoring=self.scoring)
+        default_trees = self.estimator.get_params()[self.trees_param]
+        # Candidates grouped by everything but the tree count, in grid order
+        groups = {}
+        for index, params in enumerate(candidates):
+            rest = {name: value for name, value in params.items() if name != self.trees_param}
+            key = tuple(sorted(rest.items(), key=lambda item: item[0]))
+            groups.setdefault(key, (rest, []))[1].append((params.get(self.trees_param, default_trees), index))
+        groups = [(rest, sorted(members)) for rest, members in groups.values()]
+
+        fold_scores = Parallel(n_jobs=self.n_jobs)(
+            delayed(_grow_forest)(
+                self.estimator, rest, [trees for trees, _ in members], X, y, fold, scorer, self.trees_param
+            )
+            for rest, members in groups
+            for fold in splits
+        )
+        scores = np.empty((len(candidates), len(splits)))
+        position = 0
+        for _, members in groups:
+            for fold in range(len(splits)):
+                for (_, index), score in zip(members, fold_scores[position]):
+                    scores[index, fold] = score
+                position += 1
+
+        means = np.average(scores, axis=1)
+        self.cv_results_ = {
+            "params": candidates,
+            "mean_test_score": means,
+            "std_test_score": np.std(scores, axis=1),
+            "rank_test_score": rankdata(-means, method="min").astype(np.int32),
+            **{f"split{fold}_test_score": scores[:, fold] for fold in range(len(splits))},
+        }
+        self.n_splits_ = len(splits)
+        self.best_index_ = int(self.cv_results_["rank_test_score"].argmin())
+        self.best_params_ = candidates[self.best_index_]
+        self.best_score_ = float(means[self.best_index_])
+        fit_params = {} if fold_counts is None else {_step_param(self.trees_param, "sample_weight"): fold_counts.sum(axis=1)}
+        self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_).fit(X, y, **fit_params)
+        # Forests actually grown, against len(params) * n_splits_ for the plain grid
+        self.n_forests_ = len(groups) * len(splits)
+        return self
+
+
+def run_search(search, X, y, **fit_params) -> dict:
+    # Fits the search and returns what train.py logs next to cv_best_roc_auc
+    start = time.perf_counter()
+    search.fit(X, y, **fit_params)
+    summary = {
+        "best_params": search.best_params_,
+        "best_score": float(search.best_score_),
+        "seconds": time.perf_counter() - start,
+        "fits": getattr(search, "n_forests_", len(search.cv_results_["params"]) * search.n_splits_),
+    }
+    if hasattr(search, "n_resources_"):
+        summary["n_candidates"] = [int(count) for count in search.n_candidates_]
+        summary["n_resources"] = [int(count) for count in search.n_resources_]
+    return summary
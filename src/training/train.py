@@ -1,30 +1,28 @@
 import argparse
+import json
+import sys
 from pathlib import Path
 
 import joblib
 import mlflow
 import numpy as np
-import pandas as pd
 from sklearn.impute import SimpleImputer
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, roc_auc_score
 from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
-from sklearn.model_selection import GridSearchCV, StratifiedKFold
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "inference"))
 
-def load_dataset(data_path: Path) -> pd.DataFrame:
-    if data_path.is_dir():
-        files = list(data_path.glob("*.parquet"))
-        if not files:
-            raise FileNotFoundError(f"No parquet files found in {data_path}")
-        frames = [pd.read_parquet(file) for file in files]
-        return pd.concat(frames, ignore_index=True)
-    if data_path.suffix.lower() == ".parquet":
-        return pd.read_parquet(data_path)
-    if data_path.suffix.lower() == ".csv":
-        return pd.read_csv(data_path)
-    raise ValueError(f"Unsupported data format: {data_path}")
+from backends import ONNX_FILE, check_onnx_parity, export_onnx  # noqa: E402
+from dataset import INGEST_MODES, deduplicate, load_training_frame, weighted_median  # noqa: E402
+from drift import DRIFT_PROFILE_FILE, build_profile, save_profile  # noqa: E402
+from forest import FOREST_FILE, compile_forest, in_bag_mask, save_forest  # noqa: E402
+from lookup import SCORE_TABLE_FILE, build_score_table, save_score_table  # noqa: E402
+from parallel import PARALLEL_CONFIG_KEY, available_cores, calibrate_min_rows, make_pool  # noqa: E402
+from scoring import predict_scores, resolve_threshold, write_scoring_config  # noqa: E402
+from search import HALVING_RESOURCES, SEARCH_STRATEGIES, CountBootstrapForest, build_search, fold_counts, parse_min_resources, run_search, stock_forest  # noqa: E402
+from student import STUDENT_FILE, STUDENT_KINDS, fit_student, save_student  # noqa: E402
 
 
 def main() -> None:
@@ -34,22 +32,80 @@ def main() -> None:
     parser.add_argument("--label_col", default="label", help="Label column name")
     parser.add_argument("--test_size", type=float, default=0.2, help="Test split ratio")
     parser.add_argument("--random_state", type=int, default=42, help="Random seed")
-    parser.add_argument("--use_grid_search", action="store_true", help="Enable GridSearchCV for LogisticRegression")
+    parser.add_argument("--use_grid_search", action="store_true", help="Enable the hyperparameter search (see --search)")
+    parser.add_argument(
+        "--search",
+        choices=SEARCH_STRATEGIES,
+        default="grid",
+        help="Exhaustive grid, the same grid growing each forest once with warm_start, or successive halving",
+    )
+    parser.add_argument(
+        "--halving_resource",
+        choices=HALVING_RESOURCES,
+        default="n_samples",
+        help="Budget grown each halving round: training rows or trees per forest",
+    )
+    parser.add_argument("--halving_factor", type=float, default=3, help="Share of candidates kept (1/factor) and budget growth per round")
+    parser.add_argument(
+        "--halving_min_resources",
+        default="exhaust",
+        help="First-round budget: a count, 'smallest', or 'exhaust' to end on the full budget",
+    )
+    parser.add_argument(
+        "--decision_threshold",
+        type=float,
+        default=0.5,
+        help="Probability above which a row is labelled positive (saved to scoring.json)",
+    )
+    parser.add_argument(
+        "--build_score_table",
+        action="store_true",
+        help="Tabulate the model over every valid gold feature combination (score_table.joblib)",
+    )
+    parser.add_argument(
+        "--early_exit_chunk",
+        type=int,
+        default=0,
+        help="Trees per early-exit checkpoint whose out-of-bag margins are saved to scoring.json (0 skips)",
+    )
+    parser.add_argument(
+        "--compiled_forest",
+        action="store_true",
+        help="Also write the flat array forest (forest.joblib) for SCORING_ENGINE=compiled; --early_exit_chunk implies it",
+    )
+    parser.add_argument(
+        "--export_onnx",
+        action="store_true",
+        help="Export the pipeline to model.onnx for the onnxruntime backend (needs skl2onnx)",
+    )
+    parser.add_argument(
+        "--student",
+        choices=("none",) + STUDENT_KINDS,
+        default="none",
+        help="Also distil the forest into a small, fast model (student.joblib)",
+    )
+    parser.add_argument("--student_max_depth", type=int, default=8, help="Depth of the student tree(s)")
+    parser.add_argument(
+        "--ingest",
+        choices=INGEST_MODES,
+        default="compact",
+        help="Feature storage: float32 with int8 flag columns, or float64 throughout",
+    )
+    parser.add_argument(
+        "--dedupe",
+        action="store_true",
+        help="Fit and cross-validate on unique (features, label) rows weighted by their count",
+    )
     args = parser.parse_args()
+    if args.dedupe and args.use_grid_search and args.search == "halving":
+        parser.error("--dedupe does not support --search halving: its row budget would sample unique rows, not original ones")
+    threshold = resolve_threshold({}, args.decision_threshold)
 
     data_path = Path(args.data_path)
     model_output = Path(args.model_output)
     model_output.mkdir(parents=True, exist_ok=True)
 
-    df = load_dataset(data_path)
-    if args.label_col not in df.columns:
-        raise ValueError(f"Label column '{args.label_col}' not found in dataset columns")
-
-    df = df.dropna(subset=[args.label_col])
-    y = df[args.label_col].astype(int)
-    X = df.drop(columns=[args.label_col])
-    X = X.apply(pd.to_numeric, errors="coerce")
-    X = X.dropna(axis=1, how="all")
+    X, y = load_training_frame(data_path, args.label_col, args.ingest)
 
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=args.test_size, random_state=args.random_state, stratify=y
@@ -62,52 +118,133 @@ def main() -> None:
         ]
     )
 
+    X_fit, y_fit, fit_params, medians = X_train, y_train, {}, None
+    if args.dedupe:
+        X_fit, y_fit, counts, inverse = deduplicate(X_train, y_train)
+        # SimpleImputer has no sample_weight: gaps are filled up front with the
+        # medians it would learn from the original rows, which it keeps below
+        medians = weighted_median(X_fit, counts)
+        gaps = {name: median for name, median in zip(X_fit.columns, medians) if X_fit[name].isna().any()}
+        if gaps:
+            X_fit = X_fit.fillna(gaps)
+        fit_params = {"model__sample_weight": counts}
+        # Each tree bootstraps len(X_train) count-weighted draws, as it would from the repeated rows
+        base_model.set_params(model=CountBootstrapForest(random_state=args.random_state))
+        mlflow.log_param("dedupe", True)
+        mlflow.log_metric("dedupe_rows", len(X_fit))
+        mlflow.log_metric("dedupe_factor", len(X_train) / max(len(X_fit), 1))
+
     if args.use_grid_search:
-        param_grid = {
-            "model__n_estimators": [200, 400],
-            "model__max_depth": [None, 8, 16],
-            "model__min_samples_split": [2, 5],
-        }
-        cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=args.random_state)
-        search = GridSearchCV(
+        # The deduplicated grid needs per-fold weights, which only the warm-start search takes;
+        # its results equal GridSearchCV's (scripts/benchmark_search.py)
+        search = build_search(
             base_model,
-            param_grid=param_grid,
-            scoring="roc_auc",
-            cv=cv,
-            n_jobs=-1,
+            "warm_grid" if args.dedupe and args.search == "grid" else args.search,
+            random_state=args.random_state,
+            resource=args.halving_resource,
+            factor=args.halving_factor,
+            min_resources=parse_min_resources(args.halving_min_resources),
         )
-        search.fit(X_train, y_train)
+        if args.dedupe:
+            summary = run_search(search, X_fit, y_fit, fold_counts=fold_counts(search.cv, y_train, inverse, len(X_fit)))
+        else:
+            summary = run_search(search, X_train, y_train)
         model = search.best_estimator_
-        mlflow.log_param("best_params", str(search.best_params_))
-        mlflow.log_metric("cv_best_roc_auc", search.best_score_)
+        mlflow.log_param("search", args.search)
+        mlflow.log_param("best_params", str(summary["best_params"]))
+        mlflow.log_metric("cv_best_roc_auc", summary["best_score"])
+        mlflow.log_metric("search_seconds", summary["seconds"])
+        mlflow.log_metric("search_fits", summary["fits"])
+        if args.search == "halving":
+            mlflow.log_param("halving_resource", args.halving_resource)
+            mlflow.log_param("halving_schedule", str(list(zip(summary["n_candidates"], summary["n_resources"]))))
     else:
         model = base_model
-        model.fit(X_train, y_train)
+        model.fit(X_fit, y_fit, **fit_params)
+    if medians is not None:
+        imputer = model.named_steps["imputer"]
+        imputer.statistics_ = medians.astype(imputer.statistics_.dtype)
+    # Out-of-bag rows are read off the fitted forest before it is made stock below
+    in_bag = in_bag_mask(model, len(X_fit)) if args.early_exit_chunk > 0 else None
+    if args.dedupe:
+        model.steps[-1] = ("model", stock_forest(model.named_steps["model"]))
 
-    y_pred = model.predict(X_test)
-    y_prob = model.predict_proba(X_test)[:, 1]
+    y_pred, y_prob = predict_scores(model, X_test, threshold)
 
     acc = accuracy_score(y_test, y_pred)
     roc_auc = roc_auc_score(y_test, y_prob)
 
     mlflow.log_param("model_type", "random_forest")
     mlflow.log_param("test_size", args.test_size)
+    mlflow.log_param("ingest", args.ingest)
+    mlflow.log_param("decision_threshold", threshold)
     mlflow.log_metric("accuracy", acc)
     mlflow.log_metric("roc_auc", roc_auc)
 
     model_path = model_output / "model.joblib"
     joblib.dump(model, model_path)
+    # Only the compiled engine reads forest.joblib; the default sklearn engine
+    # scores model.joblib, so the sidecar is written when asked for
+    forest = None
+    if args.compiled_forest or args.early_exit_chunk > 0:
+        forest = compile_forest(model)
+        save_forest(forest, model_output / FOREST_FILE)
+    if args.export_onnx:
+        onnx_path = export_onnx(model, X_train, model_output / ONNX_FILE)
+        mlflow.log_metric("onnx_max_deviation", check_onnx_parity(model, onnx_path, X_test))
+    if args.build_score_table:
+        table = build_score_table(model, [str(name) for name in X_train.columns])
+        save_score_table(table, model_output / SCORE_TABLE_FILE)
+        mlflow.log_param("score_table_cells", table.n_cells)
+    write_scoring_config(model_output, decision_threshold=threshold)
+    # Reference distribution of the training rows that score.py compares live inputs against
+    profile = build_profile(X_train, [str(name) for name in X_train.columns])
+    save_profile(profile, model_output / DRIFT_PROFILE_FILE)
+    if args.early_exit_chunk > 0:
+        # Worst deviation from the full ensemble at each checkpoint, seen on
+        # the training rows through the trees that left them out of the bag
+        margins = forest.early_exit_margins(X_fit, args.early_exit_chunk, in_bag)
+        write_scoring_config(model_output, early_exit={"chunk_trees": args.early_exit_chunk, "margins": margins})
+        proba, n_trees = forest.predict_proba_early(X_test, threshold, margins, args.early_exit_chunk)
+        mlflow.log_metric("early_exit_mean_trees", float(n_trees.mean()))
+        mlflow.log_metric("early_exit_max_deviation", float(np.abs(proba[:, 1] - y_prob).max()))
+
+    # Batch size from which splitting rows across cores pays off on this
+    # hardware; scripts/benchmark_parallel.py recalibrates on the serving SKU
+    workers = available_cores()
+    with make_pool(workers) as pool:
+        scorers = {"sklearn": model} if forest is None else {"sklearn": model, "compiled": forest}
+        crossover = {engine: calibrate_min_rows(scorer, X_test, pool, workers) for engine, scorer in scorers.items()}
+    crossover = {engine: rows for engine, rows in crossover.items() if rows is not None}
+    if crossover:
+        write_scoring_config(model_output, **{PARALLEL_CONFIG_KEY: crossover})
+        for engine, rows in crossover.items():
+            mlflow.log_param(f"{PARALLEL_CONFIG_KEY}_{engine}", rows)
 
     test_path = model_output / "test.parquet"
     test_df = X_test.copy()
     test_df[args.label_col] = y_test.values
     test_df.to_parquet(test_path, index=False)
 
+    metrics = {"accuracy": round(acc, 6), "roc_auc": round(roc_auc, 6)}
+    if args.student != "none":
+        student = fit_student(model, X_train, args.student, args.student_max_depth, args.random_state)
+        save_student(student, model_output / STUDENT_FILE)
+        student_pred, student_prob = predict_scores(student, X_test, threshold)
+        metrics["student"] = {
+            "kind": args.student,
+            "max_depth": args.student_max_depth,
+            "accuracy": round(accuracy_score(y_test, student_pred), 6),
+            "roc_auc": round(roc_auc_score(y_test, student_prob), 6),
+            # Share of test rows where the student and the forest give the same label
+            "agreement": round(float((student_pred == y_pred).mean()), 6),
+        }
+        mlflow.log_param("student", args.student)
+        mlflow.log_metric("student_roc_auc", metrics["student"]["roc_auc"])
+        mlflow.log_metric("student_agreement", metrics["student"]["agreement"])
+
     metrics_path = model_output / "metrics.json"
-    metrics_path.write_text(
-        f'{{"accuracy": {acc:.6f}, "roc_auc": {roc_auc:.6f}}}\n',
-        encoding="utf-8",
-    )
+    metrics_path.write_text(json.dumps(metrics) + "\n", encoding="utf-8")
 
     print(f"Saved model to {model_path}")
     print(f"Accuracy: {acc:.4f}, ROC-AUC: {roc_auc:.4f}")
@@ -0,0 +1,82 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+
+from lookup import GOLD_DOMAIN
+
+RAW_DATA = Path(__file__).resolve().parents[1] / "data" / "breast-cancer.data"
+RAW_COLUMNS = ["class", "age", "menopause", "tumor_size", "inv_nodes", "node_caps", "deg_malig", "breast", "breast_quad", "irradiat"]
+
+def make_gold(n_rows: int = 400, seed: int = 0) -> tuple:
+    # Rows drawn from the gold feature domain, so they repeat like the real
+    # data does, with a label that depends on a few of them plus noise
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for names, values in GOLD_DOMAIN:
+        if values == "one_hot":
+            flags = rng.integers(0, len(names) + 1, size=n_rows)
+            for position, name in enumerate(names, start=1):
+                columns[name] = (flags == position).astype(np.float64)
+        else:
+            columns[names[0]] = rng.choice(np.asarray(values, dtype=np.float64), size=n_rows)
+    X = pd.DataFrame(columns)
+    risk = X["deg_malig_num"] + X["node_caps_num"] + X["inv_nodes_mid"] / 10.0 + rng.normal(0.0, 1.0, n_rows)
+    y = pd.Series((risk > 2.5).astype(np.int64), name="label")
+    return X, y
+
+
+def read_gold(path: Path = RAW_DATA) -> tuple:
+    # The shipped source rows through the bronze-silver and silver-gold data
+    # flows (terraform/09 and 11): distinct raw rows, range midpoints and flags,
+    # with 0 for gaps
+    raw = pd.read_csv(path, header=None, names=RAW_COLUMNS, dtype=str, na_values="?", keep_default_na=False)
+    raw = raw.assign(breast_quad=raw["breast_quad"].str.replace("_", "-")).drop_duplicates().reset_index(drop=True)
+
+    def midpoint(column: str) -> pd.Series:
+        bounds = raw[column].str.split("-", expand=True).astype(np.float64)
+        return (bounds[0] + bounds[1]) / 2.0
+
+    X = pd.DataFrame(
+        {
+            "age_mid": midpoint("age"),
+            "tumor_size_mid": midpoint("tumor_size"),
+            "inv_nodes_mid": midpoint("inv_nodes"),
+            "deg_malig_num": raw["deg_malig"].astype(np.float64),
+            "node_caps_num": raw["node_caps"] == "yes",
+            "irradiat_num": raw["irradiat"] == "yes",
+            "breast_right": raw["breast"] == "right",
+            **{f"menopause_{value}": raw["menopause"] == value for value in ("lt40", "ge40", "premeno")},
+            **{
+                f"breast_quad_{value.replace('-', '_')}": raw["breast_quad"] == value
+                for value in ("left-up", "left-low", "right-up", "right-low", "central")
+            },
+        }
+    )
+    y = pd.Series((raw["class"] == "recurrence-events").astype(np.int64), name="label")
+    return X.astype(np.float64).fillna(0.0), y
+
+
+def fit_forest(X, y, n_estimators: int = 30, random_state: int = 0) -> Pipeline:
+    model = Pipeline(
+        steps=[
+            ("imputer", SimpleImputer(strategy="median")),
+            ("model", RandomForestClassifier(n_estimators=n_estimators, random_state=random_state)),
+        ]
+    )
+    return model.fit(X, y)
+
+
+@pytest.fixture(scope="session")
+def gold():
+    return make_gold()
+
+
+@pytest.fixture(scope="session")
+def fitted_model(gold):
+    X, y = gold
+    return fit_forest(X, y)
@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+import sklearn
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.utils.fixes import parse_version
+
+from conftest import read_gold
+from dataset import deduplicate, weighted_median
+from search import CV_FOLDS, CountBootstrapForest, fold_counts, stock_forest
+
+
+@pytest.fixture(scope="module")
+def split():
+    # Training rows are 1000 draws of the real gold records, so most repeat;
+    # gaps repeat too, and must group and impute like any other value. Test
+    # rows are held-out records, not copies of training ones
+    rng = np.random.default_rng(3)
+    X, y = read_gold()
+    X, X_test, y, y_test = train_test_split(X, y, test_size=0.3, random_state=3, stratify=y)
+    X = X.mask(rng.random(X.shape) < 0.05)
+    draws = rng.integers(0, len(X), size=1000)
+    return X.iloc[draws].reset_index(drop=True), X_test, y.iloc[draws].reset_index(drop=True), y_test
+
+
+def splitter(seed: int = 42) -> StratifiedKFold:
+    return StratifiedKFold(n_splits=CV_FOLDS, shuffle=True, random_state=seed)
+
+
+def test_unique_rows_expand_back(split):
+    X_train, _, y_train, _ = split
+    X_unique, y_unique, counts, inverse = deduplicate(X_train, y_train)
+    assert len(X_unique) < len(X_train) == counts.sum()
+    assert X_unique.iloc[inverse].reset_index(drop=True).equals(X_train.reset_index(drop=True))
+    assert np.array_equal(y_unique.to_numpy()[inverse], y_train.to_numpy())
+
+
+def test_weighted_medians_match_simple_imputer(split):
+    X_train, _, y_train, _ = split
+    X_unique, _, counts, _ = deduplicate(X_train, y_train)
+    statistics = SimpleImputer(strategy="median").fit(X_train).statistics_
+    assert np.array_equal(weighted_median(X_unique, counts).astype(statistics.dtype), statistics)
+
+
+def test_weighted_folds_match_the_original_folds(split):
+    # Same rows per fold, and the same per-fold ROC-AUC for a fixed model
+    X_train, _, y_train, _ = split
+    X_unique, y_unique, counts, inverse = deduplicate(X_train, y_train)
+    folds = fold_counts(splitter(), y_train, inverse, len(X_unique))
+    model = RandomForestClassifier(n_estimators=20, random_state=0).fit(X_train.fillna(0), y_train)
+    for fold, (train, test) in enumerate(splitter().split(X_train, y_train)):
+        held_out = folds[:, fold]
+        assert (counts - held_out).sum() == len(train)
+        assert held_out.sum() == len(test)
+        expected = roc_auc_score(y_train.iloc[test], model.predict_proba(X_train.iloc[test].fillna(0))[:, 1])
+        rows = np.flatnonzero(held_out)
+        weighted = roc_auc_score(y_unique.iloc[rows], model.predict_proba(X_unique.iloc[rows].fillna(0))[:, 1], sample_weight=held_out[rows])
+        assert weighted == expected
+
+
+def test_count_bootstrap_grows_and_exports_one_forest(split):
+    X_train, _, y_train, _ = split
+    X_unique, y_unique, counts, _ = deduplicate(X_train.fillna(0), y_train)
+    model = CountBootstrapForest(n_estimators=20, random_state=0).fit(X_unique, y_unique, sample_weight=counts)
+    # Each tree bootstraps as many count-weighted draws as there were rows
+    assert all(len(rows) == counts.sum() for rows in model.estimators_samples_)
+    # Grown by warm starts as in WarmStartGridSearch, the trees are the same
+    warm = CountBootstrapForest(n_estimators=5, random_state=0, warm_start=True).fit(X_unique, y_unique, sample_weight=counts)
+    warm.set_params(n_estimators=20).fit(X_unique, y_unique, sample_weight=counts)
+    assert np.array_equal(warm.predict_proba(X_unique), model.predict_proba(X_unique))
+    plain = stock_forest(model)
+    assert type(plain) is RandomForestClassifier and {type(tree) for tree in plain.estimators_} == {DecisionTreeClassifier}
+    assert np.array_equal(plain.predict_proba(X_unique), model.predict_proba(X_unique))
+
+
+@pytest.mark.skipif(parse_version(sklearn.__version__) < parse_version("1.9"), reason="weighted max_samples needs scikit-learn >= 1.9")
+def test_count_bootstrap_matches_weighted_max_samples(split):
+    # sklearn >= 1.9 bootstraps max_samples * sample_weight.sum() weighted draws itself
+    X_train, _, y_train, _ = split
+    X_unique, y_unique, counts, _ = deduplicate(X_train.fillna(0), y_train)
+    model = CountBootstrapForest(n_estimators=20, random_state=0).fit(X_unique, y_unique, sample_weight=counts)
+    native = RandomForestClassifier(n_estimators=20, max_samples=1.0, random_state=0).fit(X_unique, y_unique, sample_weight=counts)
+    assert np.array_equal(native.predict_proba(X_unique), model.predict_proba(X_unique))
+
+
+def test_weighted_forest_matches_repeated_rows(split):
+    # Forests differ per seed either way, so the mean test ROC-AUC over seeds
+    # must agree within z standard errors of the seed-to-seed spread
+    X_train, X_test, y_train, y_test = split
+    X_train, X_test = X_train.fillna(0), X_test.fillna(0)
+    X_unique, y_unique, counts, _ = deduplicate(X_train, y_train)
+    full, dedupe = [], []
+    for seed in range(20):
+        model = RandomForestClassifier(n_estimators=50, random_state=seed).fit(X_train, y_train)
+        full.append(roc_auc_score(y_test, model.predict_proba(X_test)[:, 1]))
+        model = CountBootstrapForest(n_estimators=50, random_state=seed).fit(X_unique, y_unique, sample_weight=counts)
+        dedupe.append(roc_auc_score(y_test, model.predict_proba(X_test)[:, 1]))
+    full, dedupe = np.asarray(full), np.asarray(dedupe)
+    standard_error = np.sqrt(full.var(ddof=1) / len(full) + dedupe.var(ddof=1) / len(dedupe))
+    assert abs(dedupe.mean() - full.mean()) <= 3.0 * standard_error
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import fit_forest, make_gold
+from forest import FOREST_FILE, compile_forest, in_bag_mask, load_forest, save_forest
+
+
+def parity_inputs(X: pd.DataFrame, seed: int = 1) -> dict:
+    # The gold rows themselves, then rows off the training grid and rows with gaps
+    rng = np.random.default_rng(seed)
+    shifted = X + rng.integers(-10, 11, size=X.shape)
+    noisy = pd.DataFrame(rng.normal(X.mean(), X.std() + 1.0, size=(2000, X.shape[1])), columns=X.columns)
+    missing = noisy.mask(rng.random(noisy.shape) < 0.1)
+    return {"gold": X, "shifted": shifted, "noisy": noisy, "missing": missing}
+
+
+@pytest.mark.parametrize("name", ["gold", "shifted", "noisy", "missing"])
+def test_compiled_forest_matches_sklearn(gold, fitted_model, name):
+    X = parity_inputs(gold[0])[name]
+    forest = compile_forest(fitted_model)
+    expected = fitted_model.predict_proba(X)
+    assert np.array_equal(forest.predict_proba(X), expected)
+    assert np.array_equal(forest.predict_proba(X.to_numpy(dtype=np.float32)), expected)
+    assert np.array_equal(forest.predict(X), fitted_model.predict(X))
+
+
+def test_compiled_forest_reorders_named_columns(gold, fitted_model):
+    X = gold[0]
+    forest = compile_forest(fitted_model)
+    assert np.array_equal(forest.predict_proba(X[X.columns[::-1]]), fitted_model.predict_proba(X))
+    with pytest.raises(ValueError, match="Feature mismatch"):
+        forest.predict_proba(X.drop(columns=X.columns[0]))
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_saved_forest_matches_sklearn(tmp_path, gold, fitted_model, mmap):
+    X = gold[0]
+    forest = load_forest(save_forest(compile_forest(fitted_model), tmp_path / FOREST_FILE), mmap=mmap)
+    assert forest.feature_names == [str(name) for name in X.columns]
+    assert np.array_equal(forest.predict_proba(X), fitted_model.predict_proba(X))
+
+
+def test_unsupported_estimator_is_rejected(gold):
+    from sklearn.tree import DecisionTreeClassifier
+
+    X, y = gold
+    with pytest.raises(TypeError, match="Cannot compile"):
+        compile_forest(DecisionTreeClassifier(random_state=0).fit(X, y))
+
+
+def test_in_bag_mask_matches_bootstrap(gold, fitted_model):
+    X = gold[0]
+    in_bag = in_bag_mask(fitted_model, len(X))
+    samples = fitted_model.named_steps["model"].estimators_samples_
+    assert in_bag.shape == (len(samples), len(X))
+    assert all(np.array_equal(np.flatnonzero(row), np.unique(rows)) for row, rows in zip(in_bag, samples))
+
+
+def test_out_of_bag_margins_hold_on_unseen_rows():
+    X, y = make_gold(n_rows=1200, seed=3)
+    X_train, X_test, y_train = X.iloc[:900], X.iloc[900:], y.iloc[:900]
+    model = fit_forest(X_train, y_train, n_estimators=100)
+    forest = compile_forest(model)
+    chunk_trees = 20
+    margins = forest.early_exit_margins(X_train, chunk_trees, in_bag_mask(model, len(X_train)))
+    assert np.all(np.asarray(margins) >= np.asarray(forest.early_exit_margins(X_train, chunk_trees)))
+    # No held-out row strays further from the full ensemble than its checkpoint's margin
+    assert np.all(np.asarray(forest.early_exit_margins(X_test, chunk_trees)) <= margins)
+    full = forest.predict_proba(X_test)
+    proba, n_trees = forest.predict_proba_early(X_test, 0.5, margins, chunk_trees)
+    assert np.array_equal(proba[:, 1] > 0.5, full[:, 1] > 0.5)
+    assert np.array_equal(proba[n_trees == forest.n_estimators], full[n_trees == forest.n_estimators])
+    assert n_trees.mean() < forest.n_estimators
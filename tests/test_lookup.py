@@ -0,0 +1,28 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from forest import compile_forest
+from lookup import TabulatedModel, build_score_table
+
+
+def test_table_matches_model_in_and_out_of_domain(gold, fitted_model):
+    X = gold[0].to_numpy(dtype=np.float32, copy=True)
+    outside = X.copy()
+    outside[::2, 0] += 1.0
+    model = TabulatedModel(build_score_table(fitted_model, list(gold[0].columns)), compile_forest(fitted_model))
+    assert np.array_equal(model.predict_proba(X), fitted_model.predict_proba(X))
+    assert np.array_equal(model.predict_proba(outside), fitted_model.predict_proba(outside))
+    assert (model.hits, model.misses) == (2 * len(X) - len(X[::2]), len(X[::2]))
+
+
+def test_counters_add_up_across_threads(gold, fitted_model):
+    X = gold[0].to_numpy(dtype=np.float32, copy=True)
+    X[::3, 0] += 1.0
+    model = TabulatedModel(build_score_table(fitted_model, list(gold[0].columns)), compile_forest(fitted_model))
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda rows: model.predict_proba(X[rows]), [slice(start, start + 7) for start in range(0, len(X), 7)] * 50))
+    assert model.hits + model.misses == 50 * len(X)
+    assert model.misses == 50 * len(X[::3])
+    model.reset_stats()
+    assert (model.hits, model.misses) == (0, 0)
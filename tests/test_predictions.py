@@ -0,0 +1,79 @@
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pyarrow.parquet as pq
+
+from predictions import PredictionLog
+
+INFERENCE = Path(__file__).resolve().parents[1] / "src" / "inference"
+
+
+def read_back(directory) -> tuple:
+    files = sorted(Path(directory).glob("*.parquet"))
+    return pq.read_table(files) if files else None, sorted(Path(directory).glob("*.tmp"))
+
+
+def test_logged_rows_round_trip(tmp_path, gold):
+    X = gold[0].iloc[:50]
+    probs = np.linspace(0.0, 1.0, len(X))
+    log = PredictionLog(tmp_path, list(X.columns), rotate_rows=30)
+    # An audit trail by default: a full buffer holds requests rather than dropping rows
+    assert log.policy == "block"
+    assert log.log(X, (probs > 0.5).astype(int), probs, model="a", tier="full")
+    # Arrays arrive in training column order and are logged under its names
+    assert log.log(X.to_numpy(dtype=np.float32), (probs > 0.5).astype(int), probs, model="b", tier="fast")
+    log.close()
+    table, leftovers = read_back(tmp_path)
+    stats = log.stats()
+    assert not leftovers
+    assert stats["written_rows"] == stats["logged_rows"] == table.num_rows == 2 * len(X)
+    assert stats["files"] == len(list(tmp_path.glob("*.parquet"))) == 4
+    assert np.array_equal(table.column("probability").to_numpy(), np.tile(probs, 2))
+    assert table.column("model").to_pylist() == ["a"] * len(X) + ["b"] * len(X)
+    assert table.column("tier").to_pylist() == ["full"] * len(X) + ["fast"] * len(X)
+    for name in X.columns:
+        assert np.array_equal(table.column(name).to_numpy(), np.tile(X[name].to_numpy(dtype=np.float32), 2))
+
+
+def test_exit_without_close_finishes_the_file(tmp_path):
+    # A server that never calls close() still leaves a readable, renamed file
+    script = (
+        "import numpy as np\n"
+        "from predictions import PredictionLog\n"
+        f"log = PredictionLog({str(tmp_path)!r}, ['a', 'b'])\n"
+        "log.log(np.ones((7, 2)), np.ones(7), np.full(7, 0.25))\n"
+    )
+    subprocess.run([sys.executable, "-c", script], check=True, cwd=INFERENCE, timeout=120)
+    table, leftovers = read_back(tmp_path)
+    assert not leftovers
+    assert table.column("probability").to_pylist() == [0.25] * 7
+
+
+def test_drop_counts_what_the_full_buffer_refused(tmp_path):
+    log = PredictionLog(tmp_path, ["a"], capacity_rows=10, policy="drop")
+    X, probs = np.zeros((10, 1)), np.zeros(10)
+    # Holding the buffer's lock keeps the writer from draining it in between
+    with log._cond:
+        assert log.log(X, probs, probs)
+        assert not log.log(X, probs, probs)
+    log.close()
+    stats = log.stats()
+    assert (stats["logged_rows"], stats["dropped_rows"], stats["written_rows"]) == (10, 10, 10)
+    assert read_back(tmp_path)[0].num_rows == 10
+
+
+def test_block_writes_every_row(tmp_path):
+    log = PredictionLog(tmp_path, ["a"], capacity_rows=100, policy="block", flush_rows=100)
+    X, probs = np.zeros((40, 1)), np.zeros(40)
+    workers = [threading.Thread(target=lambda: [log.log(X, probs, probs) for _ in range(25)]) for _ in range(4)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    log.close()
+    stats = log.stats()
+    assert stats["dropped_rows"] == 0
+    assert stats["logged_rows"] == stats["written_rows"] == read_back(tmp_path)[0].num_rows == 4 * 25 * len(X)
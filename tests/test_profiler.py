@@ -0,0 +1,22 @@
+import time
+
+from profiler import ProfileSession
+
+
+def test_request_budget_ends_at_the_wall_clock_cap(tmp_path):
+    # No request ever arrives, as when traffic stops mid-session
+    session = ProfileSession(tmp_path, requests=200, interval_s=0.01, max_seconds=0.2).start()
+    deadline = time.perf_counter() + 10
+    while not session.finished and time.perf_counter() < deadline:
+        time.sleep(0.02)
+    assert session.finished
+    session._thread.join(10)
+    assert not session._thread.is_alive()
+    assert all(path.exists() for path in session.paths)
+    assert session.n_requests == 0
+
+
+def test_request_budget_still_ends_on_its_count(tmp_path):
+    session = ProfileSession(tmp_path, requests=3, interval_s=0.01).start()
+    assert [session.request_done() for _ in range(3)] == [False, False, True]
+    assert all(path.exists() for path in session.paths)
@@ -0,0 +1,193 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.pipeline import Pipeline
+
+import score
+from backends import MODEL_FILE
+from forest import FOREST_FILE, CompiledForest, compile_forest, save_forest
+from scoring import write_scoring_config
+from watcher import DirectoryWatcher
+
+INFERENCE = Path(__file__).resolve().parents[1] / "src" / "inference"
+
+
+@pytest.fixture
+def model_dir(tmp_path, fitted_model):
+    joblib.dump(fitted_model, tmp_path / MODEL_FILE)
+    return tmp_path
+
+
+@pytest.mark.parametrize(
+    "forest_file, env_engine, config_engine, expected",
+    [
+        (False, None, None, Pipeline),
+        # forest.joblib is only written on request, and then scored by default
+        (True, None, None, CompiledForest),
+        (True, None, "sklearn", Pipeline),
+        (False, None, "compiled", CompiledForest),
+        (False, "compiled", None, CompiledForest),
+        (True, "sklearn", "compiled", Pipeline),
+    ],
+)
+def test_engine_resolution(monkeypatch, model_dir, fitted_model, gold, forest_file, env_engine, config_engine, expected):
+    monkeypatch.setattr(score, "ENGINE", env_engine)
+    monkeypatch.setattr(score, "TABLE_MODE", "off")
+    if forest_file:
+        save_forest(compile_forest(fitted_model), model_dir / FOREST_FILE)
+    if config_engine is not None:
+        write_scoring_config(model_dir, engine=config_engine)
+    model, feature_columns, threshold, student = score.load_scorer(model_dir)
+    assert isinstance(model, expected)
+    assert feature_columns == list(gold[0].columns)
+    assert student is None
+    assert np.array_equal(model.predict_proba(gold[0]), joblib.load(model_dir / MODEL_FILE).predict_proba(gold[0]))
+
+
+def test_default_compiled_init_imports_neither_sklearn_nor_pandas(model_dir, fitted_model):
+    save_forest(compile_forest(fitted_model), model_dir / FOREST_FILE)
+    script = (
+        "import json, sys\n"
+        "import score\n"
+        "score.init()\n"
+        "score.run(json.dumps({'data': [[1.0] * len(score.FEATURE_COLUMNS)]}))\n"
+        "print(type(score.MODEL).__name__, sorted({'sklearn', 'pandas'} & set(sys.modules)))\n"
+    )
+    env = {**os.environ, "AZUREML_MODEL_DIR": str(model_dir), "PYTHONPATH": str(INFERENCE)}
+    env.pop("SCORING_ENGINE", None)
+    result = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True, timeout=120)
+    assert result.stdout.splitlines()[-1] == "CompiledForest []"
+
+
+class FakeRequest:
+    # The parts of the inference server's request object run_http reads
+
+    def __init__(self, method: str, body: bytes = b"", args=None, headers=None):
+        self.method = method
+        self.args = args or {}
+        self.headers = headers or {}
+        self._body = body
+
+    def get_data(self) -> bytes:
+        return self._body
+
+
+class FakeResponse:
+    def __init__(self, body, status: int, headers: dict):
+        self.body = body
+        self.status = status
+        self.headers = headers
+
+
+@pytest.fixture
+def http(monkeypatch, fitted_model, gold):
+    monkeypatch.setattr(score, "AMLResponse", FakeResponse)
+    monkeypatch.setattr(score, "METRICS", score.ScoringMetrics())
+    monkeypatch.setattr(score, "FEATURE_COLUMNS", list(gold[0].columns))
+    for name in ("ACTIVE", "MODEL", "DECISION_THRESHOLD", "BATCHER", "PREDICTION_LOG", "DRIFT"):
+        monkeypatch.setattr(score, name, None)
+    score.activate(fitted_model, 0.5)
+    return score.METRICS
+
+
+@pytest.mark.parametrize("request_", [FakeRequest("GET"), FakeRequest("GET", args={"verbose": ""}), FakeRequest("PUT", b"{}")])
+def test_unsupported_methods_are_rejected(http, request_):
+    response = score.run_http(request_)
+    assert response.status == 405
+    assert response.headers["Allow"] == "POST"
+    assert "error" in json.loads(response.body)
+    assert "outcome=" not in http.render()
+
+
+def test_empty_body_is_rejected(http):
+    response = score.run_http(FakeRequest("POST", headers={"Content-Type": "application/json"}))
+    assert response.status == 400
+    assert "outcome=" not in http.render()
+
+
+def test_get_metrics_and_scoring_still_work(http, gold, fitted_model):
+    records = gold[0].head(5).to_dict(orient="records")
+    response = score.run_http(FakeRequest("POST", json.dumps({"data": records}).encode()))
+    assert response.status == 200
+    assert json.loads(response.body)["probabilities"] == pytest.approx(fitted_model.predict_proba(gold[0].head(5))[:, 1].tolist(), abs=1e-6)
+    response = score.run_http(FakeRequest("GET", args={"metrics": ""}))
+    assert response.status == 200
+    assert 'scoring_requests_total{route="json",outcome="ok"} 1' in response.body
+
+
+def missing_bodies(X, columns) -> dict:
+    # The same rows with the first feature missing, once per decoder
+    import io
+
+    rows = [[None if index == 0 else value for index, value in enumerate(row)] for row in X.tolist()]
+    npy = io.BytesIO()
+    np.save(npy, np.where(np.arange(X.shape[1]) == 0, np.nan, X).astype(np.float32), allow_pickle=False)
+    return {
+        "json_array": ("application/json", json.dumps({"data": rows}).encode()),
+        # An unparseable value sends the batch down the pandas path
+        "json_frame": ("application/json", json.dumps({"columns": columns, "data": [["n/a"] + row[1:] for row in rows]}).encode()),
+        "npy": (score.NPY_CONTENT_TYPE, npy.getvalue()),
+    }
+
+
+@pytest.mark.parametrize("decoder", ["json_array", "json_frame", "npy"])
+def test_drift_counts_missing_values_before_imputation(http, monkeypatch, gold, fitted_model, decoder):
+    columns = list(gold[0].columns)
+    monkeypatch.setattr(score, "DRIFT", score.DriftSketch(columns))
+    X = gold[0].head(6).to_numpy(dtype=np.float64)
+    content_type, body = missing_bodies(X, columns)[decoder]
+    response = score.run_http(FakeRequest("POST", body, headers={"Content-Type": content_type}))
+    assert response.status == 200
+    features = score.drift_snapshot()["features"]
+    assert features[columns[0]]["missing"] == len(X)
+    assert all(features[name]["missing"] == 0 for name in columns[1:])
+    # The model still sees the missing feature as 0
+    filled = X.copy()
+    filled[:, 0] = 0
+    assert json.loads(response.body)["probabilities"] == pytest.approx(fitted_model.predict_proba(filled)[:, 1].tolist(), abs=1e-6)
+
+
+def test_init_while_a_reload_waits_for_the_lock(monkeypatch, model_dir):
+    # The watcher thread enters reload_model() just after init() has started;
+    # init() must not hold the lock that reload is waiting for while it joins it
+    monkeypatch.setenv("AZUREML_MODEL_DIR", str(model_dir))
+    monkeypatch.delenv("SCORING_MODEL_DIR", raising=False)
+    monkeypatch.setattr(score, "RELOAD_INTERVAL_S", 0)
+    monkeypatch.setattr(score, "PARALLEL_WORKERS", 1)
+    monkeypatch.setattr(score, "WARMUP_ROWS", 8)
+    for name in ("ACTIVE", "MODEL", "DECISION_THRESHOLD", "FEATURE_COLUMNS", "BATCHER", "WATCHER", "DRIFT", "REGISTRY"):
+        monkeypatch.setattr(score, name, None)
+    for name in ("PROFILE", "MODELS_DIR", "PREDICTION_LOG", "PREDICTION_LOG_DIR"):
+        monkeypatch.setattr(score, name, None)
+    init_started, reloaded = threading.Event(), threading.Event()
+
+    def on_change(directory):
+        init_started.wait(10)
+        time.sleep(0.2)
+        score.reload_model(directory)
+        reloaded.set()
+
+    score.init()
+    monkeypatch.setattr(score, "WATCHER", DirectoryWatcher(model_dir, score.RELOAD_FILES, on_change, 0.05))
+    write_scoring_config(model_dir, decision_threshold=0.4)
+
+    def reinit():
+        init_started.set()
+        score.init()
+
+    worker = threading.Thread(target=reinit, daemon=True)
+    time.sleep(0.3)
+    worker.start()
+    worker.join(30)
+    assert not worker.is_alive()
+    assert reloaded.is_set()
+    assert score.WATCHER is None
+    assert score.DECISION_THRESHOLD == 0.4
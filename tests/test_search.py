@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+
+from search import build_search
+
+# Six candidates besides the tree count, as in train.py's grid, on small forests
+SMALL_GRID = {
+    "model__n_estimators": [10, 20],
+    "model__max_depth": [None, 4, 8],
+    "model__min_samples_split": [2, 5],
+}
+
+
+def base_model() -> Pipeline:
+    return Pipeline(
+        steps=[
+            ("imputer", SimpleImputer(strategy="median")),
+            ("model", RandomForestClassifier(random_state=0)),
+        ]
+    )
+
+
+@pytest.mark.parametrize(
+    "min_resources, schedule",
+    # "exhaust" starts on 20 // 3 = 6 trees, and 6 * 3 = 18 is snapped to 20;
+    # a schedule that stops short of the grid's largest forest is left alone
+    [("exhaust", [6, 20]), (2, [2, 6])],
+)
+def test_halving_over_trees_ends_on_the_grid(gold, min_resources, schedule):
+    X, y = gold
+    search = build_search(
+        base_model(), "halving", param_grid=SMALL_GRID, resource="n_estimators", min_resources=min_resources, n_jobs=1
+    ).fit(X, y)
+    assert search.n_resources_ == schedule
+    trees = search.cv_results_["param_model__n_estimators"]
+    assert sorted(set(trees)) == schedule
+    assert search.best_params_["model__n_estimators"] == schedule[-1]
+    assert len(search.best_estimator_.named_steps["model"].estimators_) == schedule[-1]
+
+
+def test_warm_start_grid_matches_grid_search(gold):
+    X, y = gold
+    grid = build_search(base_model(), "grid", param_grid=SMALL_GRID, n_jobs=1).fit(X, y)
+    warm = build_search(base_model(), "warm_grid", param_grid=SMALL_GRID, n_jobs=1).fit(X, y)
+    assert warm.cv_results_["params"] == grid.cv_results_["params"]
+    assert np.array_equal(warm.cv_results_["mean_test_score"], grid.cv_results_["mean_test_score"])
+    for fold in range(grid.n_splits_):
+        assert np.array_equal(warm.cv_results_[f"split{fold}_test_score"], grid.cv_results_[f"split{fold}_test_score"])
+    assert warm.best_params_ == grid.best_params_
+    assert np.array_equal(warm.best_estimator_.predict_proba(X), grid.best_estimator_.predict_proba(X))
+    # One forest per fold for each of the six non-tree settings instead of twelve
+    assert warm.n_forests_ == 6 * grid.n_splits_
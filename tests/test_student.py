@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.tree import DecisionTreeRegressor
+
+import student
+from forest import compile_forest
+from student import STUDENT_FILE, compile_student, fit_student, load_student, save_student
+
+
+@pytest.mark.parametrize("regressor", [DecisionTreeRegressor(max_depth=8, random_state=0), HistGradientBoostingRegressor(max_depth=4, max_iter=50, random_state=0)])
+def test_compiled_student_matches_regressor(gold, fitted_model, regressor):
+    X = gold[0]
+    forest = compile_forest(fitted_model)
+    rng = np.random.default_rng(2)
+    noisy = rng.normal(X.mean(), X.std() + 1.0, size=(2000, X.shape[1])).astype(np.float32)
+    regressor.fit(forest._prepare(X), forest.predict_proba(X)[:, 1])
+    student = compile_student(regressor, forest.medians, forest.classes_, forest.feature_names)
+    for rows in (X.to_numpy(dtype=np.float32), noisy):
+        positive = np.clip(regressor.predict(rows), 0.0, 1.0)
+        assert np.array_equal(student.predict_proba(rows), np.column_stack([1.0 - positive, positive]))
+
+
+@pytest.mark.parametrize("kind", ["tree", "gbm"])
+def test_saved_student_scores_named_and_missing_columns(tmp_path, gold, fitted_model, kind):
+    X = gold[0]
+    student = fit_student(fitted_model, X, kind, max_depth=4)
+    loaded = load_student(save_student(student, tmp_path / STUDENT_FILE))
+    with_gaps = X.mask(np.random.default_rng(3).random(X.shape) < 0.1)
+    filled = with_gaps.fillna(dict(zip(X.columns, student.medians)))
+    assert np.array_equal(loaded.predict_proba(with_gaps[X.columns[::-1]]), student.predict_proba(filled.to_numpy()))
+    assert set(np.unique(loaded.predict(X))) <= set(fitted_model.classes_)
+
+
+def test_loading_the_student_imports_neither_sklearn_nor_pandas(tmp_path, gold, fitted_model):
+    path = save_student(fit_student(fitted_model, gold[0], "gbm", max_depth=4), tmp_path / STUDENT_FILE)
+    check = (
+        "import sys; from student import load_student; "
+        f"load_student({str(path)!r}).predict_proba([[0.0] * {gold[0].shape[1]}]); "
+        "print(sorted({'sklearn', 'pandas'} & set(sys.modules)))"
+    )
+    source = str(Path(student.__file__).resolve().parent)
+    result = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True, check=True, env={**os.environ, "PYTHONPATH": source})
+    assert result.stdout.strip() == "[]"